@@ -9,6 +9,7 @@ from prompt import load_prompts, save_prompts
 from llm import feature_creation, feature_dor, story_creation, story_dor
 import jira
 import firestore
+import capacity_engine
 import confluence
 from ui import feature_pages
 from ui import story_pages
@@ -220,8 +221,8 @@ class FeatureCreatePage(ttk.Frame):
         if not self.generated:
             messagebox.showinfo("Info", "Generate features first")
             return
-        created = [jira.create_issue(f) for f in self.generated]
-        keys = ", ".join(x["key"] for x in created)
+        created = jira.create_issues_bulk(self.generated)
+        keys = ", ".join(x["key"] for x in created if x.get("key"))
         messagebox.showinfo("JIRA", f"Created: {keys}")
 
 class FeatureUploadPage(ttk.Frame):
@@ -299,8 +300,8 @@ class FeatureUploadPage(ttk.Frame):
         if not self.generated:
             messagebox.showinfo("Info", "Generate features first")
             return
-        created = [jira.create_issue(f) for f in self.generated]
-        keys = ", ".join(x["key"] for x in created)
+        created = jira.create_issues_bulk(self.generated)
+        keys = ", ".join(x["key"] for x in created if x.get("key"))
         messagebox.showinfo("JIRA", f"Created: {keys}")
 
 class FeatureFromJiraPage(ttk.Frame):
@@ -354,8 +355,8 @@ class FeatureFromJiraPage(ttk.Frame):
     def create_jira(self):
         if not self.generated:
             return
-        created = [jira.create_issue(f) for f in self.generated]
-        keys = ", ".join(x["key"] for x in created)
+        created = jira.create_issues_bulk(self.generated)
+        keys = ", ".join(x["key"] for x in created if x.get("key"))
         messagebox.showinfo("JIRA", f"Created: {keys}")
 
 class FeatureDorPage(ttk.Frame):
@@ -389,13 +390,18 @@ class FeatureDorPage(ttk.Frame):
             self.gridv.insert("", "end", values=(r.get("key",""), r.get("summary",""), "", "", ""))
 
     def check_dor(self):
-        for iid in self.gridv.get_children():
+        iids = list(self.gridv.get_children())
+        summaries = [self.gridv.item(iid, "values")[1] for iid in iids]
+        try:
+            scored = feature_dor.score_many(summaries, self.prompts.get("feature_dor_prompt", ""))
+        except Exception as e:
+            messagebox.showerror("Error", str(e))
+            return
+        for iid, r in zip(iids, scored):
             vals = list(self.gridv.item(iid, "values"))
-            summary = vals[1]
-            score, status, reason = feature_dor.score(summary, self.prompts.get("feature_dor_prompt", ""))
-            vals[2] = score
-            vals[3] = status
-            vals[4] = reason
+            vals[2] = r["score"]
+            vals[3] = r["status"]
+            vals[4] = r.get("error") or r["reason"]
             self.gridv.item(iid, values=tuple(vals))
 
 class StoryCreatePage(ttk.Frame):
@@ -449,8 +455,8 @@ class StoryCreatePage(ttk.Frame):
     def create_jira(self):
         if not self.generated:
             return
-        created = [jira.create_issue(s) for s in self.generated]
-        keys = ", ".join(x["key"] for x in created)
+        created = jira.create_issues_bulk(self.generated)
+        keys = ", ".join(x["key"] for x in created if x.get("key"))
         messagebox.showinfo("JIRA", f"Created: {keys}")
 
 class EditableTree(ttk.Treeview):
@@ -569,36 +575,18 @@ class SprintCapacityPage(ttk.Frame):
             self.res.insert("", "end", values=("", "DEV", "", "0"))
 
     def _calc(self):
-        try:
-            total = float(self.total_days.get())
-        except Exception:
-            total = 0.0
-        try:
-            hc = float(self.haircut.get())
-        except Exception:
-            hc = 0.0
-        hcd = (hc / 100.0) * total
-        leaves_total = 0.0
-        for iid in self.res.get_children():
-            vals = self.res.item(iid, "values")
-            try:
-                leaves_total += float(vals[3])
-            except Exception:
-                pass
-        avail_days = max(0.0, total - (hcd + leaves_total))
-        avail_hours = avail_days * 8.0
+        rows = [self.res.item(iid, "values") for iid in self.res.get_children()]
+        out = capacity_engine.compute_one({
+            "sprint_days": self.total_days.get(),
+            "haircut_percent": self.haircut.get(),
+            "resources": [{"name": v[0], "role": v[1], "tech": v[2], "leave": v[3]} for v in rows],
+        })
         for i in self.out.get_children():
             self.out.delete(i)
-        for iid in self.res.get_children():
-            name, role, tech, leave = self.res.item(iid, "values")
-            try:
-                ld = float(leave)
-            except Exception:
-                ld = 0.0
-            r_days = max(0.0, total - (hcd + ld))
-            r_hours = r_days * 8.0
-            self.out.insert("", "end", values=(name, role, tech, f"{r_days:.2f}", f"{r_hours:.2f}", f"{ld:.2f}"))
-        self.sum_var.set(f"Capacity Days: {avail_days:.2f} | Hours: {avail_hours:.2f} | Leaves: {leaves_total:.2f}")
+        for r in out["resources"]:
+            self.out.insert("", "end", values=(r["name"], r["role"], r["tech"], f"{r['available_capacity']:.2f}", f"{r['available_hours']:.2f}", f"{r['leave']:.2f}"))
+        s = out["summary"]
+        self.sum_var.set(f"Capacity Days: {s['available_capacity']:.2f} | Hours: {s['available_hours']:.2f} | Leaves: {s['leave_days']:.2f}")
 
     def _save(self):
         record = {
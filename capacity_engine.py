@@ -0,0 +1,103 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Sprint capacity math shared by the web page (/api/sprint/capacity/compute)
+# and the desktop app. For a sprint of D days with a haircut of H percent:
+#   resource capacity = max(0, D - (H/100 * D + leave)) days, hours = days * 8
+#   team total days   = D * team members (team_members when given, else the resource count)
+#   team capacity     = max(0, total - (H/100 * total + all leave))
+# Every resource of every sprint in a call goes through one set of NumPy array
+# operations; without NumPy the same formulas run row by row.
+
+HOURS_PER_DAY = 8.0
+
+def _num(v):
+    try:
+        v = float(v or 0)
+    except Exception:
+        return 0.0
+    return v if v == v else 0.0
+
+def _sprint_input(sprint):
+    sprint = sprint or {}
+    days = _num(sprint.get("sprint_days", sprint.get("total_days")))
+    hc = _num(sprint.get("haircut_percent", sprint.get("haircut")))
+    resources = [r for r in sprint.get("resources") or [] if isinstance(r, dict)]
+    team = sprint.get("team_members")
+    if team is None or team == "":
+        # callers without a team count (the desktop app) use the resource rows
+        team = len(resources)
+    else:
+        # an explicit 0 stays 0, as the web page's own math did
+        team = max(0.0, _num(team))
+    return days, hc, team, resources
+
+def _resource_row(r, leave, cap):
+    return {
+        "name": str(r.get("name") or ""),
+        "role": str(r.get("role") or ""),
+        "tech": str(r.get("tech") or ""),
+        "leave": round(leave, 2),
+        "available_capacity": round(cap, 2),
+        "available_hours": round(cap * HOURS_PER_DAY, 2),
+    }
+
+def _summary_row(total, leaves, cap):
+    return {
+        "total_sprint_days": round(total, 2),
+        "available_sprint_days": round(max(0.0, total - leaves), 2),
+        "available_capacity": round(cap, 2),
+        "available_hours": round(cap * HOURS_PER_DAY, 2),
+        "leave_days": round(leaves, 2),
+    }
+
+def _compute_numpy(inputs):
+    n = len(inputs)
+    counts = np.array([len(x[3]) for x in inputs], dtype=np.int64)
+    days = np.array([x[0] for x in inputs], dtype=np.float64)
+    hc = np.array([x[1] for x in inputs], dtype=np.float64) / 100.0
+    team = np.array([x[2] for x in inputs], dtype=np.float64)
+    leave = np.array([_num(r.get("leave")) for x in inputs for r in x[3]], dtype=np.float64)
+    idx = np.repeat(np.arange(n), counts)
+    res_cap = np.maximum(0.0, days[idx] - (hc[idx] * days[idx] + leave))
+    leaves = np.bincount(idx, weights=leave, minlength=n)
+    total = days * team
+    team_cap = np.maximum(0.0, total - (hc * total + leaves))
+    out = []
+    pos = 0
+    leave_l, cap_l = leave.tolist(), res_cap.tolist()
+    for i, x in enumerate(inputs):
+        out.append({
+            "summary": _summary_row(float(total[i]), float(leaves[i]), float(team_cap[i])),
+            "resources": [_resource_row(r, leave_l[pos + j], cap_l[pos + j]) for j, r in enumerate(x[3])],
+        })
+        pos += len(x[3])
+    return out
+
+def _compute_python(inputs):
+    out = []
+    for days, hc, team, resources in inputs:
+        leave = [_num(r.get("leave")) for r in resources]
+        hcd = (hc / 100.0) * days
+        total = days * team
+        leaves = sum(leave, 0.0)
+        out.append({
+            "summary": _summary_row(total, leaves, max(0.0, total - ((hc / 100.0) * total + leaves))),
+            "resources": [_resource_row(r, ld, max(0.0, days - (hcd + ld))) for r, ld in zip(resources, leave)],
+        })
+    return out
+
+def compute(sprints):
+    # sprints: [{"sprint_days", "haircut_percent", "team_members"?, "resources": [{name, role, tech, leave}]}]
+    # -> [{"summary": {...}, "resources": [...]}] in the saved record shapes, one per sprint
+    inputs = [_sprint_input(s) for s in sprints or []]
+    if not inputs:
+        return []
+    if np is not None:
+        return _compute_numpy(inputs)
+    return _compute_python(inputs)
+
+def compute_one(sprint):
+    return compute([sprint])[0]
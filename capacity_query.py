@@ -0,0 +1,184 @@
+import datetime
+
+# Resource utilization facts: one row per resource per sprint, taken from a
+# sprint capacity record's resource_summary ("sprint" source) or from a QBR
+# record's per-sprint avail_i/hours_i/leave_i columns ("qbr" source). Sprint
+# records carry no dates, so their start/end come from a QBR sprint of the same
+# name when there is one. Both storage backends answer the same query shape;
+# this module validates it and holds the in-memory implementation.
+
+FIELDS = ("source", "record", "sprint", "start", "end", "name", "role", "tech", "leave", "capacity", "hours", "saved")
+GROUPS = ("source", "record", "sprint", "name", "role", "tech")
+METRICS = ("capacity", "hours", "leave")
+AGGS = ("sum", "avg", "min", "max")
+
+def _list(v):
+    if v is None or v == "":
+        return []
+    if isinstance(v, (list, tuple)):
+        return [str(x).strip() for x in v if str(x or "").strip()]
+    return [s.strip() for s in str(v).split(",") if s.strip()]
+
+def _num(v):
+    try:
+        return float(v)
+    except Exception:
+        return None
+
+def _date(v, field):
+    if not v:
+        return None
+    try:
+        return datetime.date.fromisoformat(str(v).strip()).isoformat()
+    except Exception:
+        raise ValueError(f"invalid {field}: expected YYYY-MM-DD")
+
+def parse_query(data):
+    data = data or {}
+    q = {
+        "source": str(data.get("source") or "sprint").strip().lower(),
+        "names": _list(data.get("names") or data.get("name")),
+        "roles": _list(data.get("roles") or data.get("role")),
+        "techs": _list(data.get("techs") or data.get("tech")),
+        "sprints": _list(data.get("sprints") or data.get("sprint")),
+        "records": _list(data.get("records") or data.get("qbr")),
+        "from": _date(data.get("from"), "from"),
+        "to": _date(data.get("to"), "to"),
+        "group_by": _list(data.get("group_by")),
+        "metrics": _list(data.get("metrics")) or list(METRICS),
+        "aggs": _list(data.get("agg") or data.get("aggs")) or ["sum", "avg"],
+        "detail": bool(data.get("detail")),
+    }
+    if q["source"] not in ("sprint", "qbr", "all"):
+        raise ValueError("invalid source: use sprint, qbr or all")
+    for key, allowed in (("group_by", GROUPS), ("metrics", METRICS), ("aggs", AGGS)):
+        bad = [v for v in q[key] if v not in allowed]
+        if bad:
+            raise ValueError(f"invalid {key}: {', '.join(bad)}")
+    try:
+        last = int(data.get("last") or 0)
+    except Exception:
+        raise ValueError("invalid last: expected a number of sprints")
+    q["last"] = last if last > 0 else None
+    try:
+        limit = int(data.get("limit") or 1000)
+    except Exception:
+        limit = 1000
+    q["limit"] = max(1, min(10000, limit))
+    return q
+
+def sprint_dates(qbr_records):
+    # sprint name -> (first start, last end) over every QBR that plans it
+    out = {}
+    for rec in qbr_records:
+        for s in (rec or {}).get("sprints") or []:
+            if not isinstance(s, dict) or not s.get("name"):
+                continue
+            old_start, old_end = out.get(s["name"], (None, None))
+            starts = [x for x in (str(s.get("start") or ""), old_start) if x]
+            ends = [x for x in (str(s.get("end") or ""), old_end) if x]
+            out[s["name"]] = (min(starts) if starts else None, max(ends) if ends else None)
+    return out
+
+def sprint_facts(record, dates, saved=None):
+    name = record.get("sprint_name") or ""
+    start, end = dates.get(name, (None, None))
+    rows = record.get("resource_summary") or record.get("resources") or []
+    return [
+        ("sprint", name, name, start, end, str(r.get("name") or ""), str(r.get("role") or ""), str(r.get("tech") or ""),
+         _num(r.get("leave")), _num(r.get("available_capacity")), _num(r.get("available_hours")), saved)
+        for r in rows if isinstance(r, dict)
+    ]
+
+def qbr_rows(record):
+    # (sprint index, name, role, tech, leave, capacity, hours) per resource per QBR sprint
+    n = len([s for s in record.get("sprints") or [] if isinstance(s, dict)])
+    leave = {}
+    for r in record.get("resources") or []:
+        if isinstance(r, dict):
+            leave[str(r.get("name") or "")] = r
+    out = []
+    for r in record.get("resource_summary") or []:
+        if not isinstance(r, dict):
+            continue
+        who = str(r.get("name") or "")
+        for i in range(n):
+            if f"avail_{i}" not in r and f"hours_{i}" not in r:
+                continue
+            out.append((
+                i, who, str(r.get("role") or ""), str(r.get("tech") or ""),
+                _num(leave.get(who, {}).get(f"leave_{i}")), _num(r.get(f"avail_{i}")), _num(r.get(f"hours_{i}")),
+            ))
+    return out
+
+def qbr_facts(record, saved=None):
+    name = record.get("qbr_name") or ""
+    sprints = [s for s in record.get("sprints") or [] if isinstance(s, dict)]
+    out = []
+    for i, who, role, tech, leave, cap, hours in qbr_rows(record):
+        s = sprints[i]
+        out.append((
+            "qbr", name, str(s.get("name") or ""), str(s.get("start") or "") or None, str(s.get("end") or "") or None,
+            who, role, tech, leave, cap, hours, saved,
+        ))
+    return out
+
+def _order_key(f):
+    return (f[3] or "", f[11] or 0)
+
+def finish_row(row):
+    return {k: (round(v, 2) if isinstance(v, float) else v) for k, v in row.items()}
+
+def run_query(facts, q):
+    # in-memory implementation of the query over a list of FIELDS tuples
+    names, roles, techs = set(q["names"]), set(q["roles"]), set(q["techs"])
+    sprints, records = set(q["sprints"]), set(q["records"])
+    sel = []
+    for f in facts:
+        if q["source"] != "all" and f[0] != q["source"]:
+            continue
+        if names and f[5] not in names or roles and f[6] not in roles or techs and f[7] not in techs:
+            continue
+        if sprints and f[2] not in sprints or records and f[1] not in records:
+            continue
+        if q["from"] and not (f[3] and f[3] >= q["from"]):
+            continue
+        if q["to"] and not (f[3] and f[3] <= q["to"]):
+            continue
+        sel.append(f)
+    if q["last"]:
+        latest = {}
+        for f in sel:
+            k = _order_key(f)
+            if f[2] not in latest or k > latest[f[2]]:
+                latest[f[2]] = k
+        keep = set(sorted(latest, key=lambda s: (latest[s], s), reverse=True)[:q["last"]])
+        sel = [f for f in sel if f[2] in keep]
+    if q["detail"]:
+        sel.sort(key=lambda f: (f[3] or "", f[11] or 0, f[2], f[5]), reverse=True)
+        return [finish_row(dict(zip(FIELDS[:11], f[:11]))) for f in sel[:q["limit"]]]
+    idx = [FIELDS.index(g) for g in q["group_by"]]
+    groups = {}
+    for f in sel:
+        groups.setdefault(tuple(f[i] for i in idx), []).append(f)
+    out = []
+    for key in sorted(groups, key=lambda k: tuple(str(x) for x in k)):
+        fs = groups[key]
+        row = dict(zip(q["group_by"], key))
+        row["rows"] = len(fs)
+        row["sprints"] = len(set(f[2] for f in fs))
+        for m in q["metrics"]:
+            vals = [f[FIELDS.index(m)] for f in fs if f[FIELDS.index(m)] is not None]
+            for a in q["aggs"]:
+                if not vals:
+                    row[f"{m}_{a}"] = None
+                elif a == "sum":
+                    row[f"{m}_{a}"] = sum(vals)
+                elif a == "avg":
+                    row[f"{m}_{a}"] = sum(vals) / len(vals)
+                elif a == "min":
+                    row[f"{m}_{a}"] = min(vals)
+                else:
+                    row[f"{m}_{a}"] = max(vals)
+        out.append(finish_row(row))
+    return out[:q["limit"]]
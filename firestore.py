@@ -1,5 +1,45 @@
 import os
 import json
+import copy
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+import capacity_query
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+# Each store is a base snapshot (<name>) plus an append-only change log
+# (<name>.log, one {"k": key, "v": record} line per save), so a save costs one
+# appended line instead of rewriting the file. Loading replays the log over
+# the snapshot; a background compaction folds the log back into the snapshot
+# once it grows past _COMPACT_BYTES. Snapshots are replaced atomically
+# (temp file, fsync, rename) and every write holds a cross-process lock on
+# <name>.lock. Replaying a log over a snapshot that already contains it is
+# harmless, so a crash between the two steps of a compaction loses nothing.
+#
+# Parsed documents are cached per file and re-read only when the snapshot or
+# log changed (mtime/size); a grown log is read from where the cache left off.
+# The stat itself is skipped for _CHECK_SECS after the last check, so repeated
+# reads don't touch the disk; a write from another process is picked up within
+# that window.
+#
+# _LOCK only guards the in-memory tables below and is never held across file
+# I/O or while waiting for another process's lock, so reads served from the
+# cache don't queue behind writes or compactions.
+_CACHE = {}
+_LOCK = threading.RLock()
+_CHECK_SECS = 1.0
+_COMPACT_BYTES = 256 * 1024
+_COMPACTING = set()
+_NAME_LOCKS = {}
+_TLS = threading.local()
 
 def _dir():
     return os.path.join(os.path.dirname(__file__), "data")
@@ -13,6 +53,48 @@ def _path(name):
     _ensure()
     return os.path.join(_dir(), name)
 
+def _stamp(p):
+    try:
+        st = os.stat(p)
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+def _name_lock(name):
+    with _LOCK:
+        lk = _NAME_LOCKS.get(name)
+        if lk is None:
+            lk = _NAME_LOCKS[name] = threading.Lock()
+        return lk
+
+@contextmanager
+def _locked(name):
+    # exclusive across threads and processes for the duration of a write;
+    # re-entrant within a thread
+    held = getattr(_TLS, "held", None)
+    if held is None:
+        held = _TLS.held = set()
+    if name in held:
+        yield
+        return
+    with _name_lock(name):
+        with open(_path(name) + ".lock", "a+") as lf:
+            if fcntl is not None:
+                fcntl.flock(lf.fileno(), fcntl.LOCK_EX)
+            elif msvcrt is not None:
+                lf.seek(0)
+                msvcrt.locking(lf.fileno(), msvcrt.LK_LOCK, 1)
+            held.add(name)
+            try:
+                yield
+            finally:
+                held.discard(name)
+                if fcntl is not None:
+                    fcntl.flock(lf.fileno(), fcntl.LOCK_UN)
+                elif msvcrt is not None:
+                    lf.seek(0)
+                    msvcrt.locking(lf.fileno(), msvcrt.LK_UNLCK, 1)
+
 def _load(name):
     p = _path(name)
     try:
@@ -23,38 +105,261 @@ def _load(name):
 
 def _save(name, data):
     p = _path(name)
-    with open(p, "w") as f:
-        json.dump(data, f)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(p), prefix=os.path.basename(p) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, p)
+    except Exception:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    try:
+        dfd = os.open(os.path.dirname(p), os.O_RDONLY)
+        try:
+            os.fsync(dfd)
+        finally:
+            os.close(dfd)
+    except Exception:
+        pass
+
+def _read_log(name, offset=0):
+    # complete log lines from offset, and the offset after the last one
+    try:
+        with open(_path(name) + ".log", "rb") as f:
+            f.seek(offset)
+            raw = f.read()
+    except OSError:
+        return b"", offset
+    end = raw.rfind(b"\n") + 1
+    return raw[:end], offset + end
+
+def _replay(data, raw):
+    for line in raw.splitlines():
+        try:
+            op = json.loads(line.decode("utf-8"))
+            data[op["k"]] = op["v"]
+        except Exception:
+            continue
+
+def _install(name, old, ent):
+    # keep whatever another thread installed since old was read; it is newer
+    with _LOCK:
+        cur = _CACHE.get(name)
+        if cur is old:
+            _CACHE[name] = ent
+            return ent
+        return cur if cur is not None else ent
+
+def _doc(name, fresh=False):
+    # cache entry {"base", "log", "offset", "checked", "data", "names"}; treat data as read-only
+    now = time.monotonic()
+    with _LOCK:
+        ent = _CACHE.get(name)
+    if ent is not None and not fresh and now - ent["checked"] < _CHECK_SECS:
+        return ent
+    base = _stamp(_path(name))
+    log = _stamp(_path(name) + ".log")
+    if ent is not None and ent["base"] == base:
+        if ent["log"] == log:
+            ent["checked"] = now
+            return ent
+        if log is not None and log[1] >= ent["offset"]:
+            raw, offset = _read_log(name, ent["offset"])
+            data = dict(ent["data"])
+            _replay(data, raw)
+            return _install(name, ent, {"base": base, "log": log, "offset": offset, "checked": now, "data": data, "names": None})
+    # log before snapshot: a compaction in between leaves a newer snapshot with
+    # an old log, which replays harmlessly, never an old snapshot with an empty log
+    raw, offset = _read_log(name)
+    data = _load(name)
+    _replay(data, raw)
+    return _install(name, ent, {"base": base, "log": log, "offset": offset, "checked": now, "data": data, "names": None})
+
+def _put(name, key, value):
+    # append one record to the log; the cache takes it without re-reading the file
+    value = copy.deepcopy(value)
+    line = (json.dumps({"k": key, "v": value}) + "\n").encode("utf-8")
+    with _locked(name):
+        ent = _doc(name, fresh=True)
+        lp = _path(name) + ".log"
+        with open(lp, "ab") as f:
+            if f.tell() > ent["offset"]:
+                # a torn line from a crashed writer: end it so it can't swallow this record
+                f.write(b"\n")
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        data = dict(ent["data"])
+        data[key] = value
+        log = _stamp(lp)
+        with _LOCK:
+            _CACHE[name] = {"base": ent["base"], "log": log, "offset": log[1] if log else 0, "checked": time.monotonic(), "data": data, "names": None}
+    if log and log[1] >= _COMPACT_BYTES:
+        _compact_async(name)
+
+def _compact(name):
+    # fold the log into a new snapshot, then empty the log; readers keep the
+    # cached copy meanwhile and pick up the new files on their next check
+    with _locked(name):
+        data = dict(_doc(name, fresh=True)["data"])
+        _save(name, data)
+        lp = _path(name) + ".log"
+        with open(lp, "wb") as f:
+            f.flush()
+            os.fsync(f.fileno())
+        with _LOCK:
+            _CACHE.pop(name, None)
+
+def _compact_async(name):
+    with _LOCK:
+        if name in _COMPACTING:
+            return
+        _COMPACTING.add(name)
+
+    def run():
+        try:
+            _compact(name)
+        except Exception:
+            pass
+        finally:
+            with _LOCK:
+                _COMPACTING.discard(name)
+    threading.Thread(target=run, daemon=True).start()
+
+def _names(name):
+    ent = _doc(name)
+    names = ent["names"]
+    if names is None:
+        names = ent["names"] = sorted(list(ent["data"].keys()))
+    return list(names)
+
+def _get(name, key):
+    return copy.deepcopy(_doc(name)["data"].get(key, {}))
+
+class JsonBackend:
+    # The original store: one JSON document per kind of record under data/.
+    # Fine for small installs; see sqlite_store.SqliteBackend for larger ones.
+    def save_sprint_capacity(self, record):
+        _put("sprint_capacity.json", record["sprint_name"], record)
+
+    def get_sprint_names(self):
+        return _names("sprint_capacity.json")
+
+    def get_sprint_capacity(self, name):
+        return _get("sprint_capacity.json", name)
+
+    def save_qbr_capacity(self, record):
+        _put("qbr_capacity.json", record["qbr_name"], record)
+
+    def get_qbr_names(self):
+        return _names("qbr_capacity.json")
+
+    def get_qbr_capacity(self, name):
+        return _get("qbr_capacity.json", name)
+
+    def save_sprint_allocation(self, sprint_name, keys):
+        with _locked("sprint_allocations.json"):
+            existing = _doc("sprint_allocations.json", fresh=True)["data"].get(sprint_name, {}).get("story_keys", [])
+            merged = sorted(set([str(k) for k in existing] + [str(k) for k in (keys or []) if k]))
+            _put("sprint_allocations.json", sprint_name, {"story_keys": merged})
+
+    def get_sprint_allocation(self, sprint_name):
+        return _get("sprint_allocations.json", sprint_name)
+
+    def query_capacity(self, q):
+        # facts are rebuilt only when either document changed
+        sprints = _doc("sprint_capacity.json")
+        qbrs = _doc("qbr_capacity.json")
+        with _LOCK:
+            ent = _CACHE.get("capacity_facts")
+        if ent is None or ent["sprints"] is not sprints or ent["qbrs"] is not qbrs:
+            dates = capacity_query.sprint_dates(qbrs["data"].values())
+            facts = []
+            for rec in sprints["data"].values():
+                if isinstance(rec, dict):
+                    facts.extend(capacity_query.sprint_facts(rec, dates))
+            for rec in qbrs["data"].values():
+                if isinstance(rec, dict):
+                    facts.extend(capacity_query.qbr_facts(rec))
+            ent = {"sprints": sprints, "qbrs": qbrs, "facts": facts}
+            with _LOCK:
+                _CACHE["capacity_facts"] = ent
+        return capacity_query.run_query(ent["facts"], q)
+
+# Backend selection: storage.backend is "json" (default) or "sqlite"
+# (storage.file, default data/agile.sqlite3). Any object with the methods of
+# JsonBackend can be installed with set_backend().
+_BACKEND = None
+
+def _storage_cfg():
+    try:
+        from config import load_config
+        return load_config().get("storage", {}) or {}
+    except Exception:
+        return {}
+
+def migrate_json(target, force=False):
+    # One-shot import of data/*.json (logs included) into a SqliteBackend.
+    # Skipped once the target has recorded a migration, unless force is set.
+    if not force and target.migrated():
+        return None
+    docs = [dict(_doc(n, fresh=True)["data"]) for n in ("sprint_capacity.json", "qbr_capacity.json", "sprint_allocations.json")]
+    return target.import_json(*docs, force=force)
+
+def backend():
+    global _BACKEND
+    if _BACKEND is None:
+        with _LOCK:
+            if _BACKEND is None:
+                cfg = _storage_cfg()
+                if str(cfg.get("backend", "json")).strip().lower() == "sqlite":
+                    from sqlite_store import SqliteBackend
+                    b = SqliteBackend(cfg.get("file") or _path("agile.sqlite3"))
+                    migrate_json(b)
+                else:
+                    b = JsonBackend()
+                _BACKEND = b
+    return _BACKEND
+
+def set_backend(b):
+    global _BACKEND
+    with _LOCK:
+        _BACKEND = b
 
 def save_sprint_capacity(record):
-    data = _load("sprint_capacity.json")
-    data[record["sprint_name"]] = record
-    _save("sprint_capacity.json", data)
+    backend().save_sprint_capacity(record)
 
 def get_sprint_names():
-    data = _load("sprint_capacity.json")
-    return sorted(list(data.keys()))
+    return backend().get_sprint_names()
 
 def get_sprint_capacity(name):
-    data = _load("sprint_capacity.json")
-    return data.get(name, {})
+    return backend().get_sprint_capacity(name)
 
 def save_qbr_capacity(record):
-    data = _load("qbr_capacity.json")
-    data[record["qbr_name"]] = record
-    _save("qbr_capacity.json", data)
+    backend().save_qbr_capacity(record)
 
 def get_qbr_names():
-    data = _load("qbr_capacity.json")
-    return sorted(list(data.keys()))
+    return backend().get_qbr_names()
 
 def get_qbr_capacity(name):
-    data = _load("qbr_capacity.json")
-    return data.get(name, {})
+    return backend().get_qbr_capacity(name)
 
 def save_sprint_allocation(sprint_name, keys):
-    data = _load("sprint_allocations.json")
-    existing = data.get(sprint_name, {}).get("story_keys", [])
-    merged = sorted(set([str(k) for k in existing] + [str(k) for k in (keys or []) if k]))
-    data[sprint_name] = {"story_keys": merged}
-    _save("sprint_allocations.json", data)
+    backend().save_sprint_allocation(sprint_name, keys)
+
+def get_sprint_allocation(sprint_name):
+    return backend().get_sprint_allocation(sprint_name)
+
+def query_capacity(q):
+    # q comes from capacity_query.parse_query
+    return backend().query_capacity(q)
+
+if __name__ == "__main__":
+    # python firestore.py: import data/*.json into the configured SQLite file again
+    from sqlite_store import SqliteBackend
+    print(migrate_json(SqliteBackend(_storage_cfg().get("file") or _path("agile.sqlite3")), force=True))
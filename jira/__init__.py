@@ -1 +1 @@
-from .client import create_issue, search, link, update_dor_flag, update_status, update_sprint, add_issues_to_sprint, get_open_sprint_names
+from .client import create_issue, create_issues_bulk, search, iter_search, link, update_dor_flag, update_status, update_dor_batch, update_sprint, add_issues_to_sprint, get_open_sprint_names, invalidate_sprint_directory, invalidate_metadata, sync_mirror, reconfigure
@@ -4,8 +4,15 @@ import base64
 import ssl as _ssl
 import logging
 import os
+import threading
+import time
+from collections import OrderedDict
 from urllib import request as _req
 from urllib.error import HTTPError, URLError
+import transport
+from .metadata import MetadataCache, as_table
+from .ratelimit import RateLimiter, AimdGate
+from .mirror import Mirror, compile_jql
 
 def _load_config():
     try:
@@ -217,26 +224,18 @@ def _adf_bullets_doc(items):
         return _adf_text_doc("")
     return {"type": "doc", "version": 1, "content": [{"type": "bulletList", "content": arr}]}
 
+_SIZE_DEFAULTS = {
+    "XS": ["XS", "Extra Small", "X-Small"],
+    "S": ["S", "Small"],
+    "M": ["M", "Medium"],
+    "L": ["L", "Large"],
+    "XL": ["XL", "Extra Large", "X-Large"],
+}
+
 def _match_size_option(size, options, mapping):
     synonyms = mapping.get("size_synonyms", {})
-    default = {
-        "XS": ["XS", "Extra Small", "X-Small"],
-        "S": ["S", "Small"],
-        "M": ["M", "Medium"],
-        "L": ["L", "Large"],
-        "XL": ["XL", "Extra Large", "X-Large"],
-    }
-    alias = synonyms.get(size, default.get(size, [size]))
-    alower = [a.lower() for a in alias]
-    for opt in options or []:
-        name = (opt.get("name") or opt.get("value") or "").lower()
-        if name in alower:
-            return opt
-        # partial startswith for common labels
-        for a in alower:
-            if name.startswith(a) or a in name:
-                return opt
-    return None
+    alias = synonyms.get(size, _SIZE_DEFAULTS.get(size, [size]))
+    return as_table(options).match(alias)
 
 def _normalize_size_value(val):
     s = str(val or "").upper()
@@ -262,22 +261,64 @@ def _normalize_size_value(val):
             return "XL"
     return s.strip()
 
+# Common Jira priorities: synonym -> canonical lowercase name
+_PRIORITY_SYNONYMS = {"critical": "highest", "urgent": "highest"}
+
 def _match_option(value, options, synonyms):
     alias = synonyms.get(value, [value])
-    alower = [str(a).lower() for a in alias]
-    for opt in options or []:
-        name = (opt.get("name") or opt.get("value") or "").lower()
-        if name in alower:
-            return opt
-        for a in alower:
-            if name.startswith(a) or a in name:
-                return opt
-    return None
+    return as_table(options).match(alias)
 
-def create_issue(issue):
-    cfg = _load_config()
-    mapping = _load_mapping()
-    jira_cfg = cfg.get("jira", {})
+_META = None
+_META_LOCK = threading.Lock()
+
+def _meta_cache():
+    global _META
+    if _META is None:
+        with _META_LOCK:
+            if _META is None:
+                jira_cfg = _load_config().get("jira", {})
+                try:
+                    ttl = int(jira_cfg.get("meta_cache_secs", 3600))
+                except Exception:
+                    ttl = 3600
+                path = jira_cfg.get("meta_cache_file")
+                if path is None:
+                    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "jira_metadata.json")
+                _META = MetadataCache(ttl=ttl, path=(path or None))
+    return _META
+
+def invalidate_metadata(base_url=None, project_key=None, issue_type=None, field_id=None):
+    base = base_url.rstrip("/") if base_url else None
+    _meta_cache().invalidate(base, project_key, issue_type, field_id)
+
+def _cached_createmeta(base_url, auth, project_key, itype_name):
+    def _load():
+        try:
+            return _get_createmeta(base_url, auth, project_key, itype_name)
+        except Exception:
+            return None
+    return _meta_cache().get((base_url.rstrip("/"), project_key, itype_name, "createmeta"), _load)
+
+def _allowed_table(base_url, auth, project_key, itype_name, field_id):
+    def _load():
+        meta = _cached_createmeta(base_url, auth, project_key, itype_name)
+        return _get_field_allowed_values(meta, field_id) if meta else []
+    return _meta_cache().table((base_url.rstrip("/"), project_key, itype_name, field_id), _load)
+
+def _select_table(base_url, auth, field_id):
+    return _meta_cache().table((base_url.rstrip("/"), "", "", field_id), lambda: _get_select_options(base_url, auth, field_id))
+
+def _merged_table(base_url, auth, project_key, itype_name, field_id):
+    def _load():
+        dedup = {}
+        for opt in list(_allowed_table(base_url, auth, project_key, itype_name, field_id)) + list(_select_table(base_url, auth, field_id)):
+            key = opt.get("id") or (opt.get("name") or opt.get("value"))
+            if key and key not in dedup:
+                dedup[key] = opt
+        return list(dedup.values())
+    return _meta_cache().table((base_url.rstrip("/"), project_key, itype_name, field_id + ":all"), _load)
+
+def _issue_type_name(issue, mapping):
     itypes = mapping.get("issue_types", {})
     raw_type = issue.get("Issue_type") or issue.get("issue_type") or ""
     t = str(raw_type or "").strip().lower()
@@ -294,23 +335,14 @@ def create_issue(issue):
         tnorm = "feature"
     else:
         tnorm = t
-    itype_in = tnorm
-    itype_name = itypes.get(itype_in, itype_in.title())
+    return itypes.get(tnorm, tnorm.title())
+
+def _is_story(issue):
+    raw_type = (issue.get("Issue_type") or issue.get("issue_type") or "").strip().lower()
+    return ("story" in raw_type) or (issue.get("Story Point") is not None)
+
+def _resolve_issue_fields(issue, mapping, base_url, auth, project_key, itype_name):
     fields = _map_fields(issue, mapping)
-    base_url = jira_cfg.get("url", "").strip()
-    user = jira_cfg.get("user", "").strip()
-    token = jira_cfg.get("token", "").strip()
-    if not base_url or not user or not token:
-        try:
-            _jira_logger.info("CreateIssue MOCK type=%r fields=%r", itype_name, fields)
-        except Exception:
-            pass
-        key = "JIRA-LOCAL"
-        return {"key": key, "status": "mock"}
-    auth = _auth_header(user, token)
-    project_key = jira_cfg.get("project", "").strip() or _get_project_key(base_url, auth)
-    if not project_key:
-        raise RuntimeError("jira_project_missing")
     fields["project"] = {"key": project_key}
     fields["issuetype"] = {"name": itype_name}
     # resolve select options using CreateMeta preferred, then field options fallback
@@ -325,34 +357,9 @@ def create_issue(issue):
             pr_name_in = pr_val_obj
         pr_name_in = str(pr_name_in or "").strip()
         if pr_name_in:
-            meta = None
-            try:
-                meta = _get_createmeta(base_url, auth, project_key, itype_name)
-            except Exception:
-                meta = None
-            options = _get_field_allowed_values(meta, pr_field_id) if meta else []
-            # Common Jira priorities
-            pr_syn = {
-                "highest": ["highest", "critical", "urgent"],
-                "high": ["high"],
-                "medium": ["medium"],
-                "low": ["low"],
-                "lowest": ["lowest"]
-            }
-            def _match_priority(name, opts):
-                n = str(name).strip().lower()
-                for opt in opts or []:
-                    nm = (opt.get("name") or opt.get("value") or "").strip().lower()
-                    if nm == n:
-                        return opt
-                for key, syns in pr_syn.items():
-                    if n == key or n in syns:
-                        for opt in opts or []:
-                            nm = (opt.get("name") or opt.get("value") or "").strip().lower()
-                            if nm == key:
-                                return opt
-                return None
-            match = _match_priority(pr_name_in, options)
+            options = _allowed_table(base_url, auth, project_key, itype_name, pr_field_id)
+            n = pr_name_in.lower()
+            match = options.by_name.get(n) or options.by_name.get(_PRIORITY_SYNONYMS.get(n, n))
             if match and match.get("id"):
                 fields[pr_field_id] = {"id": match.get("id")}
             elif match and match.get("name"):
@@ -362,55 +369,33 @@ def create_issue(issue):
                 fields[pr_field_id] = {"name": pr_name_in}
     except Exception:
         pass
-    meta = None
-    try:
-        meta = _get_createmeta(base_url, auth, project_key, itype_name)
-    except Exception:
-        meta = None
+    meta = _cached_createmeta(base_url, auth, project_key, itype_name)
     # resolve size select option id
     size_val = issue.get("size") or issue.get("T-Shirt Size")
     if size_val:
         field_id = mapping.get("fields", {}).get("Size", "customfield_10114")
-        options = _get_field_allowed_values(meta, field_id) if meta else []
+        options = _allowed_table(base_url, auth, project_key, itype_name, field_id)
         if not options:
-            options = _get_select_options(base_url, auth, field_id)
+            options = _select_table(base_url, auth, field_id)
         norm = _normalize_size_value(size_val)
         match = _match_size_option(norm, options, mapping)
         if match and match.get("id"):
             fields[field_id] = {"id": match.get("id")}
-        else:
-            # try strict name equality fallback
-            for opt in options or []:
-                nm = opt.get("name") or opt.get("value")
-                if nm and str(nm).strip().lower() == str(norm).strip().lower():
-                    if opt.get("id"):
-                        fields[field_id] = {"id": opt.get("id")}
-                    break
     # resolve work_type select option id
     wt_val = issue.get("work_type") or issue.get("Issue_type") or issue.get("issue_type")
     if wt_val:
         wt_field_id = mapping.get("fields", {}).get("work_type", "customfield_10112")
-        wt_options = _get_field_allowed_values(meta, wt_field_id) if meta else []
+        wt_options = _allowed_table(base_url, auth, project_key, itype_name, wt_field_id)
         if not wt_options:
-            wt_options = _get_select_options(base_url, auth, wt_field_id)
+            wt_options = _select_table(base_url, auth, wt_field_id)
         wt_syn = mapping.get("work_type_synonyms", {})
         wt_match = _match_option(str(wt_val).strip(), wt_options, wt_syn)
         if wt_match and wt_match.get("id"):
             fields[wt_field_id] = {"id": wt_match.get("id")}
-        else:
-            # strict equality fallback
-            for opt in wt_options or []:
-                nm = opt.get("name") or opt.get("value")
-                if nm and str(nm).strip().lower() == str(wt_val).strip().lower():
-                    if opt.get("id"):
-                        fields[wt_field_id] = {"id": opt.get("id")}
-                    break
     # Set Epic Link if creating a story and a feature key is provided
     try:
-        raw_type = (issue.get("Issue_type") or issue.get("issue_type") or "").strip().lower()
-        is_story = ("story" in raw_type) or (issue.get("Story Point") is not None)
         fkey = str((issue.get("Feature Key") or issue.get("feature_key") or "")).strip()
-        if is_story and fkey:
+        if _is_story(issue) and fkey:
             epic_field = mapping.get("fields", {}).get("epic_link", "customfield_10014")
             has_epic = False
             try:
@@ -435,6 +420,71 @@ def create_issue(issue):
                 fields[epic_field] = fkey
     except Exception:
         pass
+    return fields
+
+def _issue_tasks(issue):
+    tasks = issue.get("Tasks") or issue.get("Subtasks") or []
+    if _is_story(issue) and isinstance(tasks, list):
+        return tasks
+    return []
+
+def _link_feature(new_key, issue):
+    fkey = str((issue.get("Feature Key") or issue.get("feature_key") or "")).strip()
+    if new_key and fkey:
+        try:
+            link(new_key, fkey)
+        except RuntimeError as le:
+            raise
+        except Exception as e:
+            raise RuntimeError(f"jira_link_error:{e}")
+
+def _comment_tasks(new_key, tasks, sub_keys):
+    lines = []
+    for i, t in enumerate(tasks):
+        nm = (t.get("name") or t.get("title") or f"Task {i+1}")
+        hrs = t.get("hours")
+        sk = (sub_keys[i] if i < len(sub_keys) else "").strip()
+        suffix = f" ({sk})" if sk else ""
+        part = f"{nm}{suffix} — {hrs}h" if hrs is not None else f"{nm}{suffix}"
+        lines.append(part)
+    try:
+        add_comment(new_key, lines)
+    except Exception:
+        pass
+
+def _finish_created(new_key, issue):
+    _link_feature(new_key, issue)
+    # create subtasks and add comment if tasks are provided and the issue is a story
+    tasks = _issue_tasks(issue)
+    if new_key and tasks:
+        sub_keys = []
+        try:
+            sub_keys = create_subtasks(new_key, tasks)
+        except Exception:
+            sub_keys = []
+        _comment_tasks(new_key, tasks, sub_keys)
+    return {"key": new_key, "status": "created"}
+
+def create_issue(issue):
+    cfg = _load_config()
+    mapping = _load_mapping()
+    jira_cfg = cfg.get("jira", {})
+    itype_name = _issue_type_name(issue, mapping)
+    base_url = jira_cfg.get("url", "").strip()
+    user = jira_cfg.get("user", "").strip()
+    token = jira_cfg.get("token", "").strip()
+    if not base_url or not user or not token:
+        try:
+            _jira_logger.info("CreateIssue MOCK type=%r fields=%r", itype_name, _map_fields(issue, mapping))
+        except Exception:
+            pass
+        key = "JIRA-LOCAL"
+        return {"key": key, "status": "mock"}
+    auth = _auth_header(user, token)
+    project_key = jira_cfg.get("project", "").strip() or _get_project_key(base_url, auth)
+    if not project_key:
+        raise RuntimeError("jira_project_missing")
+    fields = _resolve_issue_fields(issue, mapping, base_url, auth, project_key, itype_name)
     url = base_url.rstrip("/") + "/rest/api/3/issue"
     payload = json.dumps({"fields": fields}).encode("utf-8")
     try:
@@ -455,38 +505,7 @@ def create_issue(issue):
                 resp.close()
             except Exception:
                 pass
-        new_key = data.get("key", "")
-        fkey = str((issue.get("Feature Key") or issue.get("feature_key") or "")).strip()
-        if new_key and fkey:
-            try:
-                link(new_key, fkey)
-            except RuntimeError as le:
-                raise
-            except Exception as e:
-                raise RuntimeError(f"jira_link_error:{e}")
-        # create subtasks and add comment if tasks are provided and the issue is a story
-        tasks = issue.get("Tasks") or issue.get("Subtasks") or []
-        raw_type = (issue.get("Issue_type") or issue.get("issue_type") or "").strip().lower()
-        is_story = ("story" in raw_type) or (issue.get("Story Point") is not None)
-        if new_key and is_story and isinstance(tasks, list) and tasks:
-            sub_keys = []
-            try:
-                sub_keys = create_subtasks(new_key, tasks)
-            except Exception:
-                sub_keys = []
-            lines = []
-            for i, t in enumerate(tasks):
-                nm = (t.get("name") or t.get("title") or f"Task {i+1}")
-                hrs = t.get("hours")
-                sk = (sub_keys[i] if i < len(sub_keys) else "").strip()
-                suffix = f" ({sk})" if sk else ""
-                part = f"{nm}{suffix} — {hrs}h" if hrs is not None else f"{nm}{suffix}"
-                lines.append(part)
-            try:
-                add_comment(new_key, lines)
-            except Exception:
-                pass
-        return {"key": new_key, "status": "created"}
+        return _finish_created(data.get("key", ""), issue)
     except HTTPError as e:
         try:
             msg = e.read().decode("utf-8")
@@ -514,37 +533,7 @@ def create_issue(issue):
                         resp2.close()
                     except Exception:
                         pass
-                new_key = data.get("key", "")
-                fkey = str((issue.get("Feature Key") or issue.get("feature_key") or "")).strip()
-                if new_key and fkey:
-                    try:
-                        link(new_key, fkey)
-                    except RuntimeError as le:
-                        raise
-                    except Exception as e:
-                        raise RuntimeError(f"jira_link_error:{e}")
-                tasks = issue.get("Tasks") or issue.get("Subtasks") or []
-                raw_type = (issue.get("Issue_type") or issue.get("issue_type") or "").strip().lower()
-                is_story = ("story" in raw_type) or (issue.get("Story Point") is not None)
-                if new_key and is_story and isinstance(tasks, list) and tasks:
-                    sub_keys = []
-                    try:
-                        sub_keys = create_subtasks(new_key, tasks)
-                    except Exception:
-                        sub_keys = []
-                    lines = []
-                    for i, t in enumerate(tasks):
-                        nm = (t.get("name") or t.get("title") or f"Task {i+1}")
-                        hrs = t.get("hours")
-                        sk = (sub_keys[i] if i < len(sub_keys) else "").strip()
-                        suffix = f" ({sk})" if sk else ""
-                        part = f"{nm}{suffix} — {hrs}h" if hrs is not None else f"{nm}{suffix}"
-                        lines.append(part)
-                    try:
-                        add_comment(new_key, lines)
-                    except Exception:
-                        pass
-                return {"key": new_key, "status": "created"}
+                return _finish_created(data.get("key", ""), issue)
         except Exception:
             pass
         raise RuntimeError(f"jira_http_error:{msg}")
@@ -557,7 +546,168 @@ def create_issue(issue):
         raise RuntimeError(f"jira_network_error:{e.reason}")
     except _ssl.SSLError:
         raise RuntimeError("jira_cert_missing:TLS certificate bundle not found. Install 'certifi' or system CA certificates.")
-    
+
+_BULK_CHUNK = 50
+
+def _bulk_error_text(err):
+    parts = []
+    el = err.get("elementErrors") or {}
+    for m in el.get("errorMessages") or []:
+        parts.append(str(m))
+    for k, v in (el.get("errors") or {}).items():
+        parts.append(f"{k}: {v}")
+    return "; ".join(parts) or json.dumps(err)
+
+def _post_bulk(base_url, auth, field_list):
+    # Returns one (key, error) pair per input element, in input order
+    out = [("", "") for _ in field_list]
+    url = base_url.rstrip("/") + "/rest/api/3/issue/bulk"
+    payload = json.dumps({"issueUpdates": [{"fields": f} for f in field_list]}).encode("utf-8")
+    req = _req.Request(url, data=payload, headers={
+        "Authorization": auth,
+        "Content-Type": "application/json",
+        "Accept": "application/json"
+    }, method="POST")
+    try:
+        resp = _urlopen(req, timeout=60)
+        try:
+            data = json.loads(resp.read().decode("utf-8"))
+        finally:
+            try:
+                resp.close()
+            except Exception:
+                pass
+    except HTTPError as e:
+        # JIRA answers 400 when every element failed, with the same body shape
+        try:
+            msg = e.read().decode("utf-8")
+        except Exception:
+            msg = str(e)
+        try:
+            data = json.loads(msg)
+        except Exception:
+            data = None
+        if not isinstance(data, dict) or not isinstance(data.get("errors"), list):
+            return [("", f"jira_http_error:{msg}") for _ in field_list]
+    except URLError as e:
+        try:
+            if isinstance(e.reason, _ssl.SSLError):
+                return [("", "jira_cert_missing:TLS certificate bundle not found. Install 'certifi' or system CA certificates.") for _ in field_list]
+        except Exception:
+            pass
+        return [("", f"jira_network_error:{e.reason}") for _ in field_list]
+    except _ssl.SSLError:
+        return [("", "jira_cert_missing:TLS certificate bundle not found. Install 'certifi' or system CA certificates.") for _ in field_list]
+    failed = {}
+    for err in data.get("errors") or []:
+        try:
+            idx = int(err.get("failedElementNumber"))
+        except Exception:
+            continue
+        if 0 <= idx < len(field_list):
+            failed[idx] = "jira_http_error:" + _bulk_error_text(err)
+    created = list(data.get("issues") or [])
+    pos = 0
+    for i in range(len(field_list)):
+        if i in failed:
+            out[i] = ("", failed[i])
+        elif pos < len(created):
+            out[i] = (created[pos].get("key", ""), "")
+            pos += 1
+        else:
+            out[i] = ("", "jira_http_error:No result returned for issue")
+    return out
+
+def _create_bulk(base_url, auth, field_list):
+    out = []
+    for start in range(0, len(field_list), _BULK_CHUNK):
+        out.extend(_post_bulk(base_url, auth, field_list[start:start + _BULK_CHUNK]))
+    return out
+
+def create_issues_bulk(issues):
+    cfg = _load_config()
+    mapping = _load_mapping()
+    jira_cfg = cfg.get("jira", {})
+    items = list(issues or [])
+    base_url = jira_cfg.get("url", "").strip()
+    user = jira_cfg.get("user", "").strip()
+    token = jira_cfg.get("token", "").strip()
+    if not base_url or not user or not token:
+        try:
+            _jira_logger.info("CreateIssuesBulk MOCK count=%d", len(items))
+        except Exception:
+            pass
+        return [{"key": "JIRA-LOCAL", "status": "mock"} for _ in items]
+    if not items:
+        return []
+    auth = _auth_header(user, token)
+    project_key = jira_cfg.get("project", "").strip() or _get_project_key(base_url, auth)
+    if not project_key:
+        raise RuntimeError("jira_project_missing")
+    results = [None] * len(items)
+    field_list = []
+    for i, issue in enumerate(items):
+        try:
+            itype_name = _issue_type_name(issue, mapping)
+            field_list.append(_resolve_issue_fields(issue, mapping, base_url, auth, project_key, itype_name))
+        except Exception as e:
+            field_list.append(None)
+            results[i] = {"key": "", "status": "error", "error": str(e)}
+    idxs = [i for i, f in enumerate(field_list) if f is not None]
+    try:
+        _jira_logger.info("CreateIssuesBulk project=%r count=%d", project_key, len(idxs))
+    except Exception:
+        pass
+    outcome = dict(zip(idxs, _create_bulk(base_url, auth, [field_list[i] for i in idxs])))
+    # Retry rows rejected only because of the Epic Link field without it
+    epic_field = mapping.get("fields", {}).get("epic_link", "customfield_10014")
+    retry = [i for i, (k, err) in outcome.items() if not k and epic_field in err and epic_field in field_list[i]]
+    if retry:
+        for i in retry:
+            del field_list[i][epic_field]
+        outcome.update(dict(zip(retry, _create_bulk(base_url, auth, [field_list[i] for i in retry]))))
+    for i, (k, err) in outcome.items():
+        if k:
+            results[i] = {"key": k, "status": "created"}
+        else:
+            results[i] = {"key": "", "status": "error", "error": err or "jira_http_error:Issue create failed"}
+    # Second bulk pass: every subtask of every created story
+    sub_owner = []
+    sub_fields = []
+    itype_sub = mapping.get("issue_types", {}).get("subtask", "Sub-task")
+    for i, issue in enumerate(items):
+        new_key = results[i].get("key")
+        if results[i].get("status") != "created":
+            continue
+        for j, t in enumerate(_issue_tasks(issue)):
+            sub_owner.append(i)
+            sub_fields.append(_subtask_fields(project_key, itype_sub, new_key, t, j))
+    sub_keys = {}
+    if sub_fields:
+        for owner, (k, _) in zip(sub_owner, _create_bulk(base_url, auth, sub_fields)):
+            sub_keys.setdefault(owner, []).append(k)
+    # Links and task comments have no bulk endpoint; run them on a small pool
+    def _follow_up(i):
+        issue = items[i]
+        new_key = results[i]["key"]
+        try:
+            _link_feature(new_key, issue)
+        except Exception as e:
+            results[i]["error"] = str(e)
+        tasks = _issue_tasks(issue)
+        if tasks:
+            _comment_tasks(new_key, tasks, sub_keys.get(i, []))
+    todo = [i for i, r in enumerate(results) if r.get("status") == "created"]
+    if todo:
+        try:
+            workers = max(1, int(jira_cfg.get("bulk_workers", 8)))
+        except Exception:
+            workers = 8
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=min(workers, len(todo))) as ex:
+            list(ex.map(_follow_up, todo))
+    return results
+
 def add_issues_to_sprint(sprint_name, keys):
     cfg = _load_config()
     jira_cfg = cfg.get("jira", {})
@@ -572,19 +722,8 @@ def add_issues_to_sprint(sprint_name, keys):
             pass
         return True
     auth = _auth_header(user, token)
-    boards = _get_boards(base_url, auth, project_key)
-    sid = None
-    target = str(sprint_name or "").strip().lower()
-    for b in boards or []:
-        bid = b.get("id")
-        sprints = _get_sprints_for_board(base_url, auth, bid)
-        for sp in sprints or []:
-            nm = str((sp.get("name") or "").strip().lower())
-            if nm == target:
-                sid = sp.get("id")
-                break
-        if sid:
-            break
+    hit = _resolve_sprint(base_url, auth, project_key, sprint_name)
+    sid = hit.get("id") if hit else None
     if not sid:
         raise RuntimeError("jira_http_error:Sprint not found")
     url = base_url.rstrip("/") + f"/rest/agile/1.0/sprint/{_req.quote(str(sid))}/issue"
@@ -621,151 +760,233 @@ def add_issues_to_sprint(sprint_name, keys):
         raise RuntimeError("jira_cert_missing:TLS certificate bundle not found. Install 'certifi' or system CA certificates.")
 
 def _ssl_context():
+    return transport.ssl_context()
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+def _pool():
+    global _POOL
+    if _POOL is None:
+        with _POOL_LOCK:
+            if _POOL is None:
+                jira_cfg = _load_config().get("jira", {})
+                try:
+                    size = int(jira_cfg.get("pool_size", 10))
+                except Exception:
+                    size = 10
+                try:
+                    idle = int(jira_cfg.get("pool_idle_secs", 30))
+                except Exception:
+                    idle = 30
+                _POOL = transport.ConnectionPool(maxsize=size, idle_secs=idle)
+    return _POOL
+
+def configure_pool(size=None, idle_secs=None):
+    _pool().configure(maxsize=size, idle_secs=idle_secs)
+
+_RATE_DEFAULTS = {
+    "search": {"rate": 10, "burst": 20},
+    "write": {"rate": 5, "burst": 10},
+    "agile": {"rate": 5, "burst": 10},
+}
+
+_LIMITER = None
+_LIMITER_LOCK = threading.Lock()
+
+def _cfg_num(jira_cfg, key, default, cast=float):
     try:
-        import certifi
-        return _ssl.create_default_context(cafile=certifi.where())
+        return cast(jira_cfg.get(key, default))
     except Exception:
-        try:
-            return _ssl.create_default_context()
-        except Exception:
-            return None
+        return default
+
+def _build_limiter(jira_cfg):
+    limits = {k: dict(v) for k, v in _RATE_DEFAULTS.items()}
+    user_limits = jira_cfg.get("rate_limits") or {}
+    if isinstance(user_limits, dict):
+        for cls, spec in user_limits.items():
+            if isinstance(spec, dict):
+                limits.setdefault(cls, {}).update(spec)
+    aimd = None
+    if jira_cfg.get("aimd", True):
+        aimd = AimdGate(
+            initial=_cfg_num(jira_cfg, "max_concurrency", 16, int),
+            minimum=_cfg_num(jira_cfg, "min_concurrency", 1, int),
+            maximum=_cfg_num(jira_cfg, "max_concurrency", 16, int),
+        )
+    return RateLimiter(
+        limits=limits,
+        max_retries=_cfg_num(jira_cfg, "rate_max_retries", 4, int),
+        backoff_secs=_cfg_num(jira_cfg, "rate_backoff_secs", 1.0),
+        max_backoff_secs=_cfg_num(jira_cfg, "rate_max_backoff_secs", 60.0),
+        max_wait_secs=_cfg_num(jira_cfg, "rate_max_wait_secs", 120.0),
+        aimd=aimd,
+    )
+
+def _limiter():
+    global _LIMITER
+    if _LIMITER is None:
+        with _LIMITER_LOCK:
+            if _LIMITER is None:
+                _LIMITER = _build_limiter(_load_config().get("jira", {}))
+    return _LIMITER
+
+def configure_rate_limits(jira_cfg=None):
+    # rebuild from config (or the given jira section) after settings change
+    global _LIMITER
+    with _LIMITER_LOCK:
+        _LIMITER = _build_limiter(jira_cfg if jira_cfg is not None else _load_config().get("jira", {}))
+
+def reconfigure(jira_cfg=None):
+    # apply saved pool and rate limit settings to this process without a restart
+    jira_cfg = jira_cfg if jira_cfg is not None else _load_config().get("jira", {})
+    configure_pool(_cfg_num(jira_cfg, "pool_size", 10, int), _cfg_num(jira_cfg, "pool_idle_secs", 30, int))
+    configure_rate_limits(jira_cfg)
+
+def _endpoint_class(req):
+    url = req.full_url or ""
+    if "/rest/agile/" in url:
+        return "agile"
+    if req.get_method() == "GET" or "/search" in url:
+        return "search"
+    return "write"
 
 def _urlopen(req, timeout=30):
-    ctx = _ssl_context()
-    if ctx is not None:
-        return _req.urlopen(req, timeout=timeout, context=ctx)
-    return _req.urlopen(req, timeout=timeout)
+    cls = _endpoint_class(req)
+    if cls == "write":
+        # something changed in JIRA; the mirror must catch up before it answers again
+        _MIRROR_DIRTY.set()
+    # a POST that fails with 503 may already have been applied; only searches
+    # are safe to send again
+    idempotent = req.get_method() != "POST" or cls == "search"
+    return _limiter().call(cls, lambda: _pool().urlopen(req, timeout=timeout), idempotent=idempotent)
 
-def search(jql):
-    cfg = _load_config()
-    jira_cfg = cfg.get("jira", {})
-    base_url = jira_cfg.get("url", "").strip()
-    user = jira_cfg.get("user", "").strip()
-    token = jira_cfg.get("token", "").strip()
-    if not jql:
-        return []
+_SEARCH_FIELDS = [
+    "summary", "description", "issuetype", "status", "priority", "assignee", "reporter", "created", "updated", "duedate",
+    "customfield_10016", "customfield_10112", "customfield_10114", "customfield_10041", "customfield_10043", "customfield_10115", "customfield_10113"
+]
+
+def _adf_to_text(doc):
     try:
-        jql = _sanitize_jql(jql)
+        if isinstance(doc, str):
+            return doc
+        if not isinstance(doc, dict):
+            return ""
+        def _walk(node):
+            t = node.get("type")
+            if t == "text":
+                return node.get("text", "")
+            out = []
+            for child in node.get("content", []) or []:
+                out.append(_walk(child))
+            if t in ("paragraph", "listItem"):
+                return (" ".join(out)).strip()
+            return " ".join(out)
+        return _walk(doc).strip()
     except Exception:
-        pass
-    # Mock if not configured
-    if not base_url or not user or not token:
+        return ""
+
+def _parse_rows(data):
+    issues = data.get("issues", [])
+    rows = []
+    for it in issues:
+        f = it.get("fields", {})
+        def _name(x):
+            if isinstance(x, dict):
+                return x.get("name") or x.get("value") or x.get("displayName") or x.get("key")
+            return x
+        desc = f.get("description", "")
+        ac = f.get("customfield_10041")
+        ac_text = ""
         try:
-            _jira_logger.info("Search MOCK jql=%r", jql)
-        except Exception:
-            pass
-        return []
-    auth = _auth_header(user, token)
-    # New endpoint as per Atlassian migration: /rest/api/3/search/jql
-    url = base_url.rstrip("/") + "/rest/api/3/search/jql?jql=" + _req.quote(jql)
-    url += "&maxResults=100&fields=summary,description,issuetype,status,priority,assignee,reporter,created,updated,duedate,customfield_10016,customfield_10112,customfield_10114,customfield_10041,customfield_10043,customfield_10115,customfield_10113"
-    try:
-        _jira_logger.info("Search JQL=%r", jql)
-    except Exception:
-        pass
-    def _adf_to_text(doc):
-        try:
-            if isinstance(doc, str):
-                return doc
-            if not isinstance(doc, dict):
-                return ""
-            def _walk(node):
-                t = node.get("type")
-                if t == "text":
-                    return node.get("text", "")
-                out = []
-                for child in node.get("content", []) or []:
-                    out.append(_walk(child))
-                if t in ("paragraph", "listItem"):
-                    return (" ".join(out)).strip()
-                return " ".join(out)
-            return _walk(doc).strip()
+            if isinstance(ac, list):
+                ac_text = "; ".join([str(a) for a in ac if a])
+            else:
+                ac_text = _adf_to_text(ac)
         except Exception:
-            return ""
-    def _parse_rows(data):
-        issues = data.get("issues", [])
-        rows = []
-        for it in issues:
-            f = it.get("fields", {})
-            def _name(x):
-                if isinstance(x, dict):
-                    return x.get("name") or x.get("value") or x.get("displayName") or x.get("key")
-                return x
-            desc = f.get("description", "")
-            ac = f.get("customfield_10041")
             ac_text = ""
+        rows.append({
+            "key": it.get("key", ""),
+            "summary": f.get("summary", ""),
+            "description": _adf_to_text(desc),
+            "acceptance": ac_text,
+            "story_points": f.get("customfield_10016", 0),
+            "benefit": f.get("customfield_10043", ""),
+            "businessValue": f.get("customfield_10115", 0),
+            "dor": _name(f.get("customfield_10113")),
+            "issue_type": _name(f.get("issuetype")),
+            "status": _name(f.get("status")),
+            "priority": _name(f.get("priority")),
+            "assignee": _name(f.get("assignee")),
+            "reporter": _name(f.get("reporter")),
+            "created": f.get("created", ""),
+            "updated": f.get("updated", ""),
+            "dueDate": f.get("duedate", ""),
+            "work_type": _name(f.get("customfield_10112")),
+            "size": _normalize_size_value(_name(f.get("customfield_10114"))),
+        })
+    return rows
+
+def _search_page(base_url, auth, jql, page_size, page_token, mode):
+    # mode "get" tries GET first and falls back to POST; "post" sticks to POST
+    base = base_url.rstrip("/")
+    if mode == "get":
+        url = base + "/rest/api/3/search/jql?jql=" + _req.quote(jql)
+        url += "&maxResults=" + str(int(page_size)) + "&fields=" + ",".join(_SEARCH_FIELDS)
+        if page_token:
+            url += "&nextPageToken=" + _req.quote(str(page_token))
+        try:
+            req = _req.Request(url, headers={"Authorization": auth, "Accept": "application/json"}, method="GET")
+            resp = _urlopen(req, timeout=30)
             try:
-                if isinstance(ac, list):
-                    ac_text = "; ".join([str(a) for a in ac if a])
-                else:
-                    ac_text = _adf_to_text(ac)
+                return json.loads(resp.read().decode("utf-8")), "get"
+            finally:
+                try:
+                    resp.close()
+                except Exception:
+                    pass
+        except HTTPError as e:
+            # Fallback to POST if GET is removed or blocked
+            try:
+                msg = e.read().decode("utf-8")
+            except Exception:
+                msg = str(e)
+            try:
+                return _search_page(base_url, auth, jql, page_size, page_token, "post")
             except Exception:
-                ac_text = ""
-            rows.append({
-                "key": it.get("key", ""),
-                "summary": f.get("summary", ""),
-                "description": _adf_to_text(desc),
-                "acceptance": ac_text,
-                "story_points": f.get("customfield_10016", 0),
-                "benefit": f.get("customfield_10043", ""),
-                "businessValue": f.get("customfield_10115", 0),
-                "dor": _name(f.get("customfield_10113")),
-                "issue_type": _name(f.get("issuetype")),
-                "status": _name(f.get("status")),
-                "priority": _name(f.get("priority")),
-                "assignee": _name(f.get("assignee")),
-                "reporter": _name(f.get("reporter")),
-                "created": f.get("created", ""),
-                "updated": f.get("updated", ""),
-                "dueDate": f.get("duedate", ""),
-                "work_type": _name(f.get("customfield_10112")),
-                "size": _normalize_size_value(_name(f.get("customfield_10114"))),
-            })
-        return rows
-    # Try GET first
+                raise RuntimeError(f"jira_http_error:{msg}")
+        except URLError as e:
+            try:
+                if isinstance(e.reason, _ssl.SSLError):
+                    raise RuntimeError("jira_cert_missing:TLS certificate bundle not found. Install 'certifi' or system CA certificates.")
+            except Exception:
+                pass
+            raise RuntimeError(f"jira_network_error:{e.reason}")
+        except _ssl.SSLError:
+            raise RuntimeError("jira_cert_missing:TLS certificate bundle not found. Install 'certifi' or system CA certificates.")
+    body = {"jql": jql, "maxResults": int(page_size), "fields": list(_SEARCH_FIELDS)}
+    if page_token:
+        body["nextPageToken"] = page_token
+    req2 = _req.Request(base + "/rest/api/3/search/jql", data=json.dumps(body).encode("utf-8"), headers={
+        "Authorization": auth,
+        "Accept": "application/json",
+        "Content-Type": "application/json"
+    }, method="POST")
     try:
-        req = _req.Request(url, headers={"Authorization": auth, "Accept": "application/json"}, method="GET")
-        resp = _urlopen(req, timeout=30)
+        resp2 = _urlopen(req2, timeout=30)
         try:
-            data = json.loads(resp.read().decode("utf-8"))
+            return json.loads(resp2.read().decode("utf-8")), "post"
         finally:
             try:
-                resp.close()
+                resp2.close()
             except Exception:
                 pass
-        return _parse_rows(data)
     except HTTPError as e:
-        # Fallback to POST if GET is removed or blocked
         try:
             msg = e.read().decode("utf-8")
         except Exception:
             msg = str(e)
-        # Attempt POST to /search/jql
-        try:
-            body = json.dumps({
-                "jql": jql,
-                "maxResults": 100,
-                "fields": [
-                        "summary","description","issuetype","status","priority","assignee","reporter","created","updated","duedate","customfield_10112","customfield_10114","customfield_10041","customfield_10043","customfield_10115","customfield_10113"
-                ]
-            }).encode("utf-8")
-            post_url = base_url.rstrip("/") + "/rest/api/3/search/jql"
-            req2 = _req.Request(post_url, data=body, headers={
-                "Authorization": auth,
-                "Accept": "application/json",
-                "Content-Type": "application/json"
-            }, method="POST")
-            resp2 = _urlopen(req2, timeout=30)
-            try:
-                data2 = json.loads(resp2.read().decode("utf-8"))
-            finally:
-                try:
-                    resp2.close()
-                except Exception:
-                    pass
-            return _parse_rows(data2)
-        except Exception:
-            raise RuntimeError(f"jira_http_error:{msg}")
+        raise RuntimeError(f"jira_http_error:{msg}")
     except URLError as e:
         try:
             if isinstance(e.reason, _ssl.SSLError):
@@ -776,6 +997,170 @@ def search(jql):
     except _ssl.SSLError:
         raise RuntimeError("jira_cert_missing:TLS certificate bundle not found. Install 'certifi' or system CA certificates.")
 
+_MIRROR = None
+_MIRROR_LOCK = threading.Lock()
+_MIRROR_SYNC_LOCK = threading.Lock()
+_MIRROR_DIRTY = threading.Event()
+
+def _mirror():
+    global _MIRROR
+    if _MIRROR is None:
+        with _MIRROR_LOCK:
+            if _MIRROR is None:
+                path = _load_config().get("jira", {}).get("mirror_file")
+                if not path:
+                    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "jira_mirror.sqlite3")
+                _MIRROR = Mirror(path)
+    return _MIRROR
+
+def _mirror_scope(jira_cfg):
+    base_url = jira_cfg.get("url", "").strip().rstrip("/")
+    project_key = jira_cfg.get("project", "").strip()
+    if not base_url or not project_key or not jira_cfg.get("user", "").strip() or not jira_cfg.get("token", "").strip():
+        return None, None
+    return base_url + "|" + project_key, project_key
+
+def sync_mirror(full=False):
+    # Full sync replaces the project's rows (this is also how deletions and
+    # moves are picked up); otherwise only issues updated since the last sync
+    # are fetched. The relative "-Nm" form avoids JQL's user-timezone dates.
+    jira_cfg = _load_config().get("jira", {})
+    scope, project_key = _mirror_scope(jira_cfg)
+    if not scope:
+        return 0
+    try:
+        full_secs = int(jira_cfg.get("mirror_full_sync_secs", 86400))
+    except Exception:
+        full_secs = 86400
+    m = _mirror()
+    with _MIRROR_SYNC_LOCK:
+        started = time.time()
+        _MIRROR_DIRTY.clear()
+        last_sync, last_full = m.state(scope)
+        pq = '"' + project_key.replace('"', '') + '"'
+        try:
+            if full or not last_sync or not last_full or started - last_full >= full_secs:
+                rows = list(iter_search(f"project = {pq} ORDER BY key ASC", use_mirror=False))
+                n = m.upsert(scope, rows, replace=True)
+                m.set_state(scope, started, started)
+            else:
+                mins = int((started - last_sync) // 60) + 2
+                rows = list(iter_search(f"project = {pq} AND updated >= -{mins}m ORDER BY updated ASC", use_mirror=False))
+                n = m.upsert(scope, rows)
+                m.set_state(scope, started)
+        except Exception:
+            _MIRROR_DIRTY.set()
+            raise
+    try:
+        _jira_logger.info("Mirror sync scope=%r rows=%r", scope, n)
+    except Exception:
+        pass
+    return n
+
+def _mirror_search(jql, max_rows, jira_cfg):
+    # rows from the mirror, or None when the JQL or the mirror state can't answer it
+    scope, project_key = _mirror_scope(jira_cfg)
+    if not scope:
+        return None
+    compiled = compile_jql(jql, project_key)
+    if compiled is None:
+        return None
+    try:
+        sync_secs = int(jira_cfg.get("mirror_sync_secs", 60))
+    except Exception:
+        sync_secs = 60
+    try:
+        last_sync, _ = _mirror().state(scope)
+        if _MIRROR_DIRTY.is_set() or not last_sync or time.time() - last_sync >= sync_secs:
+            sync_mirror()
+        where, params, order = compiled
+        return _mirror().query(scope, where, params, order, max_rows)
+    except Exception as e:
+        try:
+            _jira_logger.info("Mirror unavailable, searching JIRA: %s", e)
+        except Exception:
+            pass
+        return None
+
+def iter_search(jql, max_rows=None, page_size=100, prefetch=False, use_mirror=None):
+    cfg = _load_config()
+    jira_cfg = cfg.get("jira", {})
+    base_url = jira_cfg.get("url", "").strip()
+    user = jira_cfg.get("user", "").strip()
+    token = jira_cfg.get("token", "").strip()
+    if not jql:
+        return
+    try:
+        jql = _sanitize_jql(jql)
+    except Exception:
+        pass
+    # Mock if not configured
+    if not base_url or not user or not token:
+        try:
+            _jira_logger.info("Search MOCK jql=%r", jql)
+        except Exception:
+            pass
+        return
+    try:
+        max_rows = int(max_rows) if max_rows is not None else None
+    except Exception:
+        max_rows = None
+    if max_rows is not None and max_rows <= 0:
+        return
+    if use_mirror is None:
+        use_mirror = bool(jira_cfg.get("mirror", False))
+    if use_mirror:
+        rows = _mirror_search(jql, max_rows, jira_cfg)
+        if rows is not None:
+            for row in rows:
+                yield row
+            return
+    try:
+        page_size = max(1, min(100, int(page_size)))
+    except Exception:
+        page_size = 100
+    if max_rows is not None:
+        page_size = min(page_size, max_rows)
+    auth = _auth_header(user, token)
+    try:
+        _jira_logger.info("Search JQL=%r max_rows=%r", jql, max_rows)
+    except Exception:
+        pass
+    # New endpoint as per Atlassian migration: /rest/api/3/search/jql, paged by nextPageToken
+    executor = None
+    if prefetch:
+        from concurrent.futures import ThreadPoolExecutor
+        executor = ThreadPoolExecutor(max_workers=1)
+    try:
+        data, mode = _search_page(base_url, auth, jql, page_size, None, "get")
+        count = 0
+        seen_tokens = set()
+        while True:
+            next_token = data.get("nextPageToken")
+            last = bool(data.get("isLast")) or not next_token or next_token in seen_tokens
+            pending = None
+            if not last:
+                seen_tokens.add(next_token)
+                if executor is not None and (max_rows is None or count + len(data.get("issues") or []) < max_rows):
+                    pending = executor.submit(_search_page, base_url, auth, jql, page_size, next_token, mode)
+            for row in _parse_rows(data):
+                yield row
+                count += 1
+                if max_rows is not None and count >= max_rows:
+                    return
+            if last:
+                return
+            if pending is not None:
+                data, mode = pending.result()
+            else:
+                data, mode = _search_page(base_url, auth, jql, page_size, next_token, mode)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+def search(jql, max_rows=None, prefetch=False, use_mirror=None):
+    return list(iter_search(jql, max_rows=max_rows, prefetch=prefetch, use_mirror=use_mirror))
+
 def link(story_key, feature_key):
     cfg = _load_config()
     jira_cfg = cfg.get("jira", {})
@@ -877,6 +1262,17 @@ def add_comment(issue_key, lines):
     except _ssl.SSLError:
         raise RuntimeError("jira_cert_missing:TLS certificate bundle not found. Install 'certifi' or system CA certificates.")
 
+def _subtask_fields(project_key, itype_name, parent_key, task, i):
+    name = (task.get("name") or task.get("title") or f"Task {i+1}")
+    hours = task.get("hours")
+    return {
+        "project": {"key": project_key},
+        "issuetype": {"name": itype_name},
+        "parent": {"key": parent_key},
+        "summary": str(name)[:255],
+        "description": _adf_text_doc(f"Estimated: {hours}h" if hours is not None else "")
+    }
+
 def create_subtasks(parent_key, tasks):
     cfg = _load_config()
     mapping = _load_mapping()
@@ -899,15 +1295,7 @@ def create_subtasks(parent_key, tasks):
     itype_name = mapping.get("issue_types", {}).get("subtask", "Sub-task")
     created = []
     for i, t in enumerate(tasks or []):
-        name = (t.get("name") or t.get("title") or f"Task {i+1}")
-        hours = t.get("hours")
-        fields = {
-            "project": {"key": project_key},
-            "issuetype": {"name": itype_name},
-            "parent": {"key": parent_key},
-            "summary": str(name)[:255],
-            "description": _adf_text_doc(f"Estimated: {hours}h" if hours is not None else "")
-        }
+        fields = _subtask_fields(project_key, itype_name, parent_key, t, i)
         url = base_url.rstrip("/") + "/rest/api/3/issue"
         payload = json.dumps({"fields": fields}).encode("utf-8")
         req = _req.Request(url, data=payload, headers={
@@ -953,49 +1341,14 @@ def update_dor_flag(issue_key, flag="Y"):
     try:
         project_key = jira_cfg.get("project", "").strip() or _get_project_key(base_url, auth)
         synonyms = {"Y": ["Y", "Yes", "Ready", "True"], "N": ["N", "No", "Not Ready", "False"]}
-        meta = None
-        try:
-            if project_key:
-                itypes = _load_mapping().get("issue_types", {})
-                itype_name = itypes.get("feature", "Feature")
-                meta = _get_createmeta(base_url, auth, project_key, itype_name)
-        except Exception:
-            meta = None
-        options = []
-        try:
-            opts_meta = _get_field_allowed_values(meta, field_id) if meta else []
-            if isinstance(opts_meta, list):
-                options.extend(opts_meta)
-        except Exception:
-            pass
-        try:
-            opts_field = _get_select_options(base_url, auth, field_id)
-            if isinstance(opts_field, list):
-                options.extend(opts_field)
-        except Exception:
-            pass
-        # Deduplicate options by id or name
-        dedup = {}
-        for opt in options or []:
-            key = opt.get("id") or (opt.get("name") or opt.get("value"))
-            if key and key not in dedup:
-                dedup[key] = opt
-        options = list(dedup.values())
+        itype_name = mapping.get("issue_types", {}).get("feature", "Feature")
+        if project_key:
+            options = _merged_table(base_url, auth, project_key, itype_name, field_id)
+        else:
+            options = _select_table(base_url, auth, field_id)
         # Match against synonyms
         wanted = synonyms.get(str(flag).strip(), [str(flag).strip()])
-        flset = [str(w).strip().lower() for w in wanted]
-        match = None
-        for opt in options or []:
-            name = (opt.get("name") or opt.get("value") or "").strip().lower()
-            if name in flset:
-                match = opt
-                break
-            for w in flset:
-                if name.startswith(w) or w in name:
-                    match = opt
-                    break
-            if match:
-                break
+        match = options.match(wanted)
         if match and match.get("id"):
             val = {"id": match.get("id")}
         elif match:
@@ -1034,22 +1387,7 @@ def update_dor_flag(issue_key, flag="Y"):
             continue
     raise RuntimeError(f"jira_http_error:{last_err}")
 
-def update_status(issue_key, status_name="READY"):
-    cfg = _load_config()
-    jira_cfg = cfg.get("jira", {})
-    base_url = jira_cfg.get("url", "").strip()
-    user = jira_cfg.get("user", "").strip()
-    token = jira_cfg.get("token", "").strip()
-    if not issue_key:
-        raise RuntimeError("jira_issue_missing")
-    if not base_url or not user or not token:
-        try:
-            _jira_logger.info("Update Status MOCK key=%r status=%r", issue_key, status_name)
-        except Exception:
-            pass
-        return True
-    auth = _auth_header(user, token)
-    base = base_url.rstrip("/")
+def _get_transitions(base, auth, issue_key):
     url = base + f"/rest/api/3/issue/{_req.quote(issue_key)}/transitions"
     req = _req.Request(url, headers={"Authorization": auth, "Accept": "application/json"}, method="GET")
     try:
@@ -1076,7 +1414,9 @@ def update_status(issue_key, status_name="READY"):
         raise RuntimeError(f"jira_network_error:{e.reason}")
     except _ssl.SSLError:
         raise RuntimeError("jira_cert_missing:TLS certificate bundle not found. Install 'certifi' or system CA certificates.")
-    trans = obj.get("transitions", [])
+    return obj.get("transitions", [])
+
+def _find_transition(trans, status_name):
     wanted = str(status_name or "").strip().lower()
     tid = None
     for t in trans or []:
@@ -1094,8 +1434,10 @@ def update_status(issue_key, status_name="READY"):
             if "ready" in nm or "ready" in to_nm or "ready" in cat_nm:
                 tid = t.get("id")
                 break
-    if not tid:
-        raise RuntimeError("jira_http_error:No matching transition for status")
+    return tid
+
+def _post_transition(base, auth, issue_key, tid):
+    url = base + f"/rest/api/3/issue/{_req.quote(issue_key)}/transitions"
     body = json.dumps({"transition": {"id": tid}}).encode("utf-8")
     preq = _req.Request(url, data=body, headers={"Authorization": auth, "Accept": "application/json", "Content-Type": "application/json"}, method="POST")
     try:
@@ -1123,7 +1465,154 @@ def update_status(issue_key, status_name="READY"):
         raise RuntimeError(f"jira_network_error:{e.reason}")
     except _ssl.SSLError:
         raise RuntimeError("jira_cert_missing:TLS certificate bundle not found. Install 'certifi' or system CA certificates.")
-def get_issue_details_with_links(issue_key):
+
+# Transition ids per (base url, project, issue type, current status, target status).
+# Issues that share a workflow and current status share their transitions.
+# Filled from update_dor_batch's worker threads: locked, LRU-bounded and
+# expired after _TRANSITION_TTL so workflow edits are picked up.
+_TRANSITIONS = OrderedDict()
+_TRANSITIONS_LOCK = threading.Lock()
+_TRANSITIONS_MAX = 512
+_TRANSITION_TTL = 3600
+
+def _transition_get(ck):
+    with _TRANSITIONS_LOCK:
+        ent = _TRANSITIONS.get(ck)
+        if ent is None:
+            return None
+        if time.time() - ent[1] >= _TRANSITION_TTL:
+            _TRANSITIONS.pop(ck, None)
+            return None
+        _TRANSITIONS.move_to_end(ck)
+        return ent[0]
+
+def _transition_put(ck, tid):
+    with _TRANSITIONS_LOCK:
+        _TRANSITIONS[ck] = (tid, time.time())
+        _TRANSITIONS.move_to_end(ck)
+        while len(_TRANSITIONS) > _TRANSITIONS_MAX:
+            _TRANSITIONS.popitem(last=False)
+
+def _transition_drop(ck):
+    with _TRANSITIONS_LOCK:
+        _TRANSITIONS.pop(ck, None)
+
+def update_status(issue_key, status_name="READY", workflow_key=None):
+    cfg = _load_config()
+    jira_cfg = cfg.get("jira", {})
+    base_url = jira_cfg.get("url", "").strip()
+    user = jira_cfg.get("user", "").strip()
+    token = jira_cfg.get("token", "").strip()
+    if not issue_key:
+        raise RuntimeError("jira_issue_missing")
+    if not base_url or not user or not token:
+        try:
+            _jira_logger.info("Update Status MOCK key=%r status=%r", issue_key, status_name)
+        except Exception:
+            pass
+        return True
+    auth = _auth_header(user, token)
+    base = base_url.rstrip("/")
+    ck = None
+    if workflow_key:
+        ck = (base,) + tuple(workflow_key) + (str(status_name or "").strip().lower(),)
+        tid = _transition_get(ck)
+        if tid:
+            try:
+                return _post_transition(base, auth, issue_key, tid)
+            except RuntimeError as e:
+                # stale cache entry (workflow edited); fall through and look it up again
+                if not str(e).startswith("jira_http_error:"):
+                    raise
+                _transition_drop(ck)
+    tid = _find_transition(_get_transitions(base, auth, issue_key), status_name)
+    if not tid:
+        raise RuntimeError("jira_http_error:No matching transition for status")
+    if ck:
+        _transition_put(ck, tid)
+    return _post_transition(base, auth, issue_key, tid)
+
+def _workflow_keys(keys):
+    # key -> (project, issue type id, status id) from one search per 100 keys
+    out = {}
+    cfg = _load_config()
+    jira_cfg = cfg.get("jira", {})
+    base_url = jira_cfg.get("url", "").strip()
+    user = jira_cfg.get("user", "").strip()
+    token = jira_cfg.get("token", "").strip()
+    if not base_url or not user or not token:
+        return out
+    auth = _auth_header(user, token)
+    base = base_url.rstrip("/")
+    keys = [str(k) for k in keys if k]
+    for start in range(0, len(keys), 100):
+        chunk = keys[start:start + 100]
+        body = {"jql": "key in (" + ",".join(chunk) + ")", "maxResults": len(chunk), "fields": ["project", "issuetype", "status"]}
+        try:
+            sreq = _req.Request(base + "/rest/api/3/search/jql", data=json.dumps(body).encode("utf-8"), headers={"Authorization": auth, "Accept": "application/json", "Content-Type": "application/json"}, method="POST")
+            sresp = _urlopen(sreq, timeout=30)
+            try:
+                sobj = json.loads(sresp.read().decode("utf-8"))
+            finally:
+                try:
+                    sresp.close()
+                except Exception:
+                    pass
+        except Exception:
+            continue
+        for it in sobj.get("issues", []) or []:
+            f = it.get("fields", {}) or {}
+            proj = (f.get("project") or {}).get("key") or ""
+            itype = (f.get("issuetype") or {}).get("id") or ""
+            st = (f.get("status") or {}).get("id") or ""
+            if it.get("key") and itype and st:
+                out[it.get("key")] = (proj, itype, st)
+    return out
+
+def update_dor_batch(pass_keys, fail_keys, status_name="READY", max_workers=None):
+    jira_cfg = _load_config().get("jira", {})
+    if max_workers is None:
+        try:
+            max_workers = int(jira_cfg.get("update_workers", 8))
+        except Exception:
+            max_workers = 8
+    pass_keys = [str(k) for k in pass_keys or []]
+    fail_keys = [str(k) for k in fail_keys or []]
+    wf = _workflow_keys(pass_keys) if pass_keys else {}
+    def _pass(k):
+        try:
+            update_dor_flag(k, "YES")
+        except Exception as e:
+            return {"key": k, "dor": "YES", "status": status_name, "success": False, "error": str(e)}, False
+        try:
+            update_status(k, status_name, wf.get(k))
+            return {"key": k, "dor": "YES", "status": status_name, "success": True}, True
+        except Exception as e:
+            return {"key": k, "dor": "YES", "status": status_name, "success": False, "error": str(e)}, True
+    def _fail(k):
+        try:
+            update_dor_flag(k, "No")
+            return {"key": k, "dor": "No", "status": "", "success": True}, True
+        except Exception as e:
+            return {"key": k, "dor": "No", "status": "", "success": False, "error": str(e)}, False
+    jobs = [(_pass, k) for k in pass_keys] + [(_fail, k) for k in fail_keys]
+    outcomes = []
+    if jobs:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=max(1, min(int(max_workers or 1), len(jobs)))) as ex:
+            outcomes = list(ex.map(lambda job: job[0](job[1]), jobs))
+    updated = []
+    errors = []
+    results = []
+    for res, flag_ok in outcomes:
+        results.append(res)
+        if flag_ok:
+            updated.append(res["key"])
+        if not res.get("success"):
+            errors.append(f"{res['key']}:{res.get('error', '')}")
+    return {"updated": updated, "errors": errors, "results": results}
+
+def get_issue_details_with_links(issue_key, max_workers=None):
     cfg = _load_config()
     jira_cfg = cfg.get("jira", {})
     base_url = jira_cfg.get("url", "").strip()
@@ -1210,49 +1699,84 @@ def get_issue_details_with_links(issue_key):
             "fields": data.get("fields", {}),
             "names": {}
         }
-    links = []
+    entries = []
     for lk in issue.get("fields", {}).get("issuelinks", []) or []:
         rel = (lk.get("type") or {}).get("name")
         direction = "outward" if lk.get("outwardIssue") else ("inward" if lk.get("inwardIssue") else "")
         other = lk.get("outwardIssue") or lk.get("inwardIssue") or {}
-        k = other.get("key")
-        linked = None
-        if k:
+        entries.append((rel, direction, other.get("key")))
+    if max_workers is None:
+        try:
+            max_workers = int(jira_cfg.get("link_fetch_workers", 8))
+        except Exception:
+            max_workers = 8
+    linked = _fetch_linked_issues(base, auth, [k for _, _, k in entries if k], max_workers)
+    links = []
+    for rel, direction, k in entries:
+        links.append({"relation": rel, "direction": direction, "key": k, "issue": linked.get(k) if k else None})
+    return {"issue": issue, "links": links}
+
+_LINK_FIELDS = ["summary", "issuetype", "status", "priority", "assignee", "reporter", "created", "updated", "duedate"]
+
+def _fetch_linked_issues(base, auth, keys, max_workers=8):
+    # One "key in (...)" search per 100 keys; anything it misses is fetched
+    # individually on a bounded pool. Returns key -> {"key", "fields"}.
+    wanted = []
+    for k in keys:
+        if k not in wanted:
+            wanted.append(k)
+    found = {}
+    for start in range(0, len(wanted), 100):
+        chunk = wanted[start:start + 100]
+        token = None
+        while True:
+            body = {"jql": "key in (" + ",".join(chunk) + ")", "maxResults": len(chunk), "fields": _LINK_FIELDS}
+            if token:
+                body["nextPageToken"] = token
             try:
-                lurl = base + "/rest/api/3/issue/" + _req.quote(k)
-                lreq = _req.Request(lurl, headers={"Authorization": auth, "Accept": "application/json"}, method="GET")
-                lr = _urlopen(lreq, timeout=30)
+                sreq = _req.Request(base + "/rest/api/3/search/jql", data=json.dumps(body).encode("utf-8"), headers={"Authorization": auth, "Accept": "application/json", "Content-Type": "application/json"}, method="POST")
+                sresp = _urlopen(sreq, timeout=30)
                 try:
-                    obj = json.loads(lr.read().decode("utf-8"))
+                    sobj = json.loads(sresp.read().decode("utf-8"))
                 finally:
                     try:
-                        lr.close()
+                        sresp.close()
                     except Exception:
                         pass
-                linked = {"key": obj.get("key", k), "fields": obj.get("fields", {})}
             except Exception:
-                # Try search fallback
+                break
+            for it in sobj.get("issues", []) or []:
+                if it.get("key"):
+                    found[it.get("key")] = {"key": it.get("key"), "fields": it.get("fields", {})}
+            token = sobj.get("nextPageToken")
+            if sobj.get("isLast", True) or not token:
+                break
+    missing = [k for k in wanted if k not in found]
+    def _one(k):
+        try:
+            lurl = base + "/rest/api/3/issue/" + _req.quote(k) + "?fields=" + ",".join(_LINK_FIELDS)
+            lreq = _req.Request(lurl, headers={"Authorization": auth, "Accept": "application/json"}, method="GET")
+            lr = _urlopen(lreq, timeout=30)
+            try:
+                obj = json.loads(lr.read().decode("utf-8"))
+            finally:
                 try:
-                    body = json.dumps({"jql": f"key = {k}", "maxResults": 1, "fields": ["summary","status","priority","assignee","reporter","created","updated","duedate"]}).encode("utf-8")
-                    sreq2 = _req.Request(base + "/rest/api/3/search/jql", data=body, headers={"Authorization": auth, "Accept": "application/json", "Content-Type": "application/json"}, method="POST")
-                    sresp2 = _urlopen(sreq2, timeout=30)
-                    try:
-                        sobj2 = json.loads(sresp2.read().decode("utf-8"))
-                    finally:
-                        try:
-                            sresp2.close()
-                        except Exception:
-                            pass
-                    items = sobj2.get("issues", [])
-                    if items:
-                        it2 = items[0]
-                        linked = {"key": it2.get("key", k), "fields": it2.get("fields", {})}
-                    else:
-                        linked = {"key": k, "fields": {}}
+                    lr.close()
                 except Exception:
-                    linked = {"key": k, "fields": {}}
-        links.append({"relation": rel, "direction": direction, "key": k, "issue": linked})
-    return {"issue": issue, "links": links}
+                    pass
+            return {"key": obj.get("key", k), "fields": obj.get("fields", {})}
+        except Exception:
+            return {"key": k, "fields": {}}
+    if missing:
+        try:
+            workers = max(1, int(max_workers or 1))
+        except Exception:
+            workers = 1
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=min(workers, len(missing))) as ex:
+            for k, res in zip(missing, ex.map(_one, missing)):
+                found[k] = res
+    return found
 
 def get_issue_raw(issue_key):
     cfg = _load_config()
@@ -1323,12 +1847,12 @@ def get_issue_raw(issue_key):
         raise RuntimeError("jira_http_error:Issue fetch failed")
     return data
 
-def _get_boards(base_url, auth, project_key):
-    url = base_url.rstrip("/") + "/rest/agile/1.0/board?maxResults=50"
-    if project_key:
-        url += "&projectKeyOrId=" + _req.quote(project_key)
-    req = _req.Request(url, headers={"Authorization": auth, "Accept": "application/json"}, method="GET")
-    try:
+def _get_paged_values(url, auth):
+    values = []
+    start = 0
+    sep = "&" if "?" in url else "?"
+    while True:
+        req = _req.Request(url + f"{sep}startAt={start}", headers={"Authorization": auth, "Accept": "application/json"}, method="GET")
         resp = _urlopen(req, timeout=30)
         try:
             obj = json.loads(resp.read().decode("utf-8"))
@@ -1337,25 +1861,94 @@ def _get_boards(base_url, auth, project_key):
                 resp.close()
             except Exception:
                 pass
-        return obj.get("values", [])
-    except Exception:
-        return []
+        page = obj.get("values", []) or []
+        values.extend(page)
+        if obj.get("isLast", True) or not page:
+            return values
+        start += len(page)
+
+def _get_boards(base_url, auth, project_key):
+    url = base_url.rstrip("/") + "/rest/agile/1.0/board?maxResults=50"
+    if project_key:
+        url += "&projectKeyOrId=" + _req.quote(project_key)
+    return _get_paged_values(url, auth)
 
 def _get_sprints_for_board(base_url, auth, board_id):
     url = base_url.rstrip("/") + f"/rest/agile/1.0/board/{_req.quote(str(board_id))}/sprint?maxResults=50&state=active,future,closed"
-    req = _req.Request(url, headers={"Authorization": auth, "Accept": "application/json"}, method="GET")
     try:
-        resp = _urlopen(req, timeout=30)
-        try:
-            obj = json.loads(resp.read().decode("utf-8"))
-        finally:
-            try:
-                resp.close()
-            except Exception:
-                pass
-        return obj.get("values", [])
+        return _get_paged_values(url, auth)
+    except HTTPError as e:
+        # kanban boards answer 400: they have no sprints
+        if e.code == 400:
+            return []
+        raise
+
+# Process-wide sprint directory keyed by (base url, project): name -> id/state
+_SPRINT_DIR = {}
+_SPRINT_LOCK = threading.Lock()
+
+def _sprint_ttl():
+    try:
+        return max(0, int(_load_config().get("jira", {}).get("sprint_cache_secs", 300)))
     except Exception:
-        return []
+        return 300
+
+def _build_sprint_directory(base_url, auth, project_key):
+    sprints = []
+    index = {}
+    for b in _get_boards(base_url, auth, project_key) or []:
+        bid = b.get("id")
+        for sp in _get_sprints_for_board(base_url, auth, bid) or []:
+            nm = str((sp.get("name") or "").strip())
+            if not nm:
+                continue
+            ent = {
+                "id": sp.get("id"),
+                "name": nm,
+                "state": str((sp.get("state") or "").strip().lower()),
+                "board": bid,
+            }
+            sprints.append(ent)
+            index.setdefault(nm.lower(), ent)
+    return {"t": time.time(), "sprints": sprints, "index": index}
+
+def _sprint_directory(base_url, auth, project_key, refresh=False):
+    key = (base_url.rstrip("/"), project_key or "")
+    ttl = _sprint_ttl()
+    d = _SPRINT_DIR.get(key)
+    if d and not refresh and time.time() - d["t"] < ttl:
+        return d
+    with _SPRINT_LOCK:
+        cur = _SPRINT_DIR.get(key)
+        # another thread may have rebuilt it while we waited for the lock
+        if cur and cur is not d and time.time() - cur["t"] < ttl:
+            return cur
+        # a failed board or sprint fetch raises, so a partial directory is
+        # never cached; the last complete one keeps answering meanwhile
+        try:
+            built = _build_sprint_directory(base_url, auth, project_key)
+        except Exception:
+            if cur:
+                return cur
+            raise
+        _SPRINT_DIR[key] = built
+        return built
+
+def _resolve_sprint(base_url, auth, project_key, sprint_name):
+    target = str(sprint_name or "").strip().lower()
+    if not target:
+        return None
+    d = _sprint_directory(base_url, auth, project_key)
+    hit = d["index"].get(target)
+    # refresh once on a miss, but not more than every few seconds for unknown names
+    if hit is None and time.time() - d["t"] >= 5:
+        d = _sprint_directory(base_url, auth, project_key, refresh=True)
+        hit = d["index"].get(target)
+    return hit
+
+def invalidate_sprint_directory():
+    with _SPRINT_LOCK:
+        _SPRINT_DIR.clear()
 
 def update_sprint(issue_key, sprint_name):
     cfg = _load_config()
@@ -1375,21 +1968,11 @@ def update_sprint(issue_key, sprint_name):
             pass
         return True
     auth = _auth_header(user, token)
-    # find sprint id by name across boards
+    # find sprint id by name from the shared sprint directory
     sid = None
     try:
-        boards = _get_boards(base_url, auth, project_key)
-        target = str(sprint_name or "").strip().lower()
-        for b in boards or []:
-            bid = b.get("id")
-            sprints = _get_sprints_for_board(base_url, auth, bid)
-            for sp in sprints or []:
-                nm = str((sp.get("name") or "").strip().lower())
-                if nm == target:
-                    sid = sp.get("id")
-                    break
-            if sid:
-                break
+        hit = _resolve_sprint(base_url, auth, project_key, sprint_name)
+        sid = hit.get("id") if hit else None
     except Exception:
         sid = None
     if not sid:
@@ -1444,19 +2027,16 @@ def get_open_sprint_names():
     names = []
     seen = set()
     try:
-        boards = _get_boards(base_url, auth, project_key)
-        for b in boards or []:
-            bid = b.get("id")
-            sprints = _get_sprints_for_board(base_url, auth, bid)
-            for sp in sprints or []:
-                st = str((sp.get("state") or "").strip().lower())
-                nm = str((sp.get("name") or "").strip())
-                if st in ("active", "future") and nm and nm not in seen:
-                    seen.add(nm)
-                    names.append(nm)
+        d = _sprint_directory(base_url, auth, project_key)
+        for sp in d.get("sprints") or []:
+            nm = sp.get("name")
+            if sp.get("state") in ("active", "future") and nm and nm not in seen:
+                seen.add(nm)
+                names.append(nm)
     except Exception:
         pass
     return names
+
 def _sanitize_jql(jql):
     try:
         mapping = _load_mapping()
@@ -0,0 +1,239 @@
+import atexit
+import json
+import os
+import threading
+import time
+
+def _opt_name(opt):
+    return str((opt or {}).get("name") or (opt or {}).get("value") or "").strip().lower()
+
+class OptionTable:
+    # Allowed values for one select field with lowercase lookups precomputed.
+    # Exact names resolve through a dict; partial (prefix/substring) matches are
+    # scanned once per alias set and memoized.
+    def __init__(self, options):
+        self.options = [o for o in (options or []) if isinstance(o, dict)]
+        self.by_name = {}
+        self.by_id = {}
+        for opt in self.options:
+            nm = _opt_name(opt)
+            if nm and nm not in self.by_name:
+                self.by_name[nm] = opt
+            oid = opt.get("id")
+            if oid and str(oid) not in self.by_id:
+                self.by_id[str(oid)] = opt
+        self._partial = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.options)
+
+    def __iter__(self):
+        return iter(self.options)
+
+    def __bool__(self):
+        return bool(self.options)
+
+    def match(self, aliases):
+        alower = tuple(str(a).strip().lower() for a in (aliases or []) if str(a or "").strip())
+        for a in alower:
+            hit = self.by_name.get(a)
+            if hit is not None:
+                return hit
+        if alower in self._partial:
+            return self._partial[alower]
+        found = None
+        for opt in self.options:
+            name = _opt_name(opt)
+            if not name:
+                continue
+            for a in alower:
+                if name.startswith(a) or a in name:
+                    found = opt
+                    break
+            if found is not None:
+                break
+        with self._lock:
+            self._partial[alower] = found
+        return found
+
+def as_table(options):
+    if isinstance(options, OptionTable):
+        return options
+    return OptionTable(options)
+
+class MetadataCache:
+    # TTL cache for JIRA metadata keyed by (base url, project, issue type, field id).
+    # Raw payloads are optionally persisted to a JSON file so that a freshly
+    # started worker can reuse what another worker already fetched. The file
+    # also keeps invalidations as tombstones, so an entry dropped by one worker
+    # is dropped by the others on their next load instead of being written back.
+    # New entries are written at most every flush_secs; flush() writes the rest.
+    def __init__(self, ttl=3600, path=None, empty_ttl=60, flush_secs=5):
+        self.ttl = max(0, int(ttl))
+        self.empty_ttl = min(self.ttl, max(0, int(empty_ttl)))
+        self.flush_secs = max(0, float(flush_secs))
+        self.path = path
+        self._data = {}
+        self._tables = {}
+        self._tombs = {}
+        self._lock = threading.Lock()
+        self._disk_mtime = None
+        self._dirty = False
+        self._saved = 0.0
+        self._load_disk()
+        if path:
+            atexit.register(self.flush)
+
+    def _skey(self, key):
+        return "|".join(str(k or "") for k in key)
+
+    def _dead(self, sk, t):
+        # an entry fetched no later than a matching invalidation is gone
+        parts = sk.split("|")
+        for want, tt in self._tombs.items():
+            if t <= tt and all(self._part_matches(parts, i, w) for i, w in enumerate(want)):
+                return True
+        return False
+
+    def _bury(self, want, t):
+        if t > self._tombs.get(want, 0):
+            self._tombs[want] = t
+        for sk in list(self._data.keys()):
+            if self._dead(sk, self._data[sk][0]):
+                self._data.pop(sk, None)
+                self._tables.pop(sk, None)
+
+    def _load_disk(self):
+        if not self.path:
+            return
+        try:
+            st = os.stat(self.path)
+        except Exception:
+            return
+        if self._disk_mtime == st.st_mtime_ns:
+            return
+        try:
+            with open(self.path, "r") as f:
+                raw = json.load(f)
+        except Exception:
+            return
+        self._disk_mtime = st.st_mtime_ns
+        raw = raw if isinstance(raw, dict) else {}
+        if isinstance(raw.get("entries"), dict):
+            entries = raw["entries"]
+            tombs = raw.get("tombstones") or []
+        else:
+            # files written before tombstones were kept hold the entries only
+            entries = raw
+            tombs = []
+        for tomb in tombs:
+            try:
+                want = tuple(None if w is None else str(w) for w in tomb[0])
+                self._bury(want, float(tomb[1]))
+            except Exception:
+                continue
+        now = time.time()
+        for sk, ent in entries.items():
+            try:
+                t = float(ent.get("t", 0))
+            except Exception:
+                continue
+            if now - t >= self._limit(ent.get("v")) or self._dead(sk, t):
+                continue
+            cur = self._data.get(sk)
+            if cur is None or cur[0] < t:
+                self._data[sk] = (t, ent.get("v"))
+                self._tables.pop(sk, None)
+
+    def _save_disk(self):
+        if not self.path:
+            return
+        # pick up what other workers wrote since our last load, so their
+        # entries and invalidations survive this rewrite
+        self._load_disk()
+        now = time.time()
+        for want, t in list(self._tombs.items()):
+            # past the TTL every entry it covered has expired anyway
+            if now - t >= self.ttl:
+                self._tombs.pop(want, None)
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w") as f:
+                json.dump({
+                    "entries": {k: {"t": t, "v": v} for k, (t, v) in self._data.items() if now - t < self._limit(v)},
+                    "tombstones": [[list(w), t] for w, t in self._tombs.items()],
+                }, f)
+            os.replace(tmp, self.path)
+            self._disk_mtime = os.stat(self.path).st_mtime_ns
+        except Exception:
+            pass
+        self._dirty = False
+        self._saved = now
+
+    def flush(self):
+        with self._lock:
+            if self._dirty:
+                self._save_disk()
+
+    def _limit(self, value):
+        # empty answers are often transient failures; keep them only briefly
+        return self.ttl if value else self.empty_ttl
+
+    def _fresh(self, sk):
+        ent = self._data.get(sk)
+        if ent and time.time() - ent[0] < self._limit(ent[1]):
+            return ent
+        return None
+
+    def get(self, key, loader):
+        sk = self._skey(key)
+        ent = self._fresh(sk)
+        if ent:
+            return ent[1]
+        with self._lock:
+            self._load_disk()
+            ent = self._fresh(sk)
+            if ent:
+                return ent[1]
+        value = loader()
+        with self._lock:
+            self._data[sk] = (time.time(), value)
+            self._tables.pop(sk, None)
+            self._dirty = True
+            if time.time() - self._saved >= self.flush_secs:
+                self._save_disk()
+        return value
+
+    def table(self, key, loader):
+        sk = self._skey(key)
+        ent = self._fresh(sk)
+        if ent:
+            tab = self._tables.get(sk)
+            if tab is not None and tab[0] == ent[0]:
+                return tab[1]
+        value = self.get(key, loader)
+        ent = self._fresh(sk)
+        tab = OptionTable(value)
+        if ent:
+            with self._lock:
+                self._tables[sk] = (ent[0], tab)
+        return tab
+
+    def _part_matches(self, parts, i, wanted):
+        if wanted is None:
+            return True
+        if i >= len(parts):
+            return False
+        if i == 3:
+            # a field id also matches its derived entries such as "<field>:all"
+            return parts[i].split(":")[0] == str(wanted)
+        return parts[i] == str(wanted)
+
+    def invalidate(self, base_url=None, project=None, issue_type=None, field_id=None):
+        want = tuple(None if w is None else str(w) for w in (base_url, project, issue_type, field_id))
+        with self._lock:
+            self._bury(want, time.time())
+            # invalidations are written right away so other workers see them
+            self._save_disk()
@@ -0,0 +1,281 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+
+# Columns a mirrored JQL clause may filter on, keyed by JQL field name.
+_FIELDS = {
+    "project": "project",
+    "key": "key",
+    "issuekey": "key",
+    "issuetype": "issue_type",
+    "type": "issue_type",
+    "status": "status",
+    "priority": "priority",
+    "assignee": "assignee",
+    "reporter": "reporter",
+    "summary": "summary",
+    "description": "description",
+}
+_TEXT_FIELDS = {
+    "summary": ("summary",),
+    "description": ("description",),
+    "text": ("summary", "description", "acceptance"),
+}
+_ORDER_FIELDS = {
+    "key": "project {d}, key_num {d}",
+    "issuekey": "project {d}, key_num {d}",
+    "created": "created {d}",
+    "updated": "updated {d}",
+    "summary": "summary {d}",
+    "status": "status {d}",
+    "issuetype": "issue_type {d}",
+    "assignee": "assignee {d}",
+}
+_TOKEN = re.compile(r'\s*(?:"((?:[^"\\]|\\.)*)"|\'((?:[^\'\\]|\\.)*)\'|(!=|!~|~|=|\(|\)|,)|([^\s=!~(),"\']+))')
+
+def _tokens(jql):
+    out = []
+    pos = 0
+    s = jql or ""
+    while pos < len(s):
+        if not s[pos:].strip():
+            break
+        m = _TOKEN.match(s, pos)
+        if not m:
+            return None
+        if m.group(1) is not None or m.group(2) is not None:
+            out.append(("str", m.group(1) if m.group(1) is not None else m.group(2)))
+        elif m.group(3) is not None:
+            out.append(("op", m.group(3)))
+        else:
+            out.append(("word", m.group(4)))
+        pos = m.end()
+    return out
+
+def _key_num(key):
+    try:
+        return int(str(key).rsplit("-", 1)[1])
+    except Exception:
+        return 0
+
+def compile_jql(jql, project):
+    # Translate the subset of JQL the mirror can answer into SQL:
+    #   clause (AND clause)* [ORDER BY field [ASC|DESC], ...]
+    #   clause := field (=|!=) value | field [NOT] IN (values) | field (~|!~) text
+    # Returns (where, params, order) or None when the query must go to JIRA.
+    toks = _tokens(jql)
+    if not toks:
+        return None
+    proj = str(project or "").strip().lower()
+    where = []
+    params = []
+    scoped = False
+    clauses = 0
+    i = 0
+    n = len(toks)
+
+    def _value(j):
+        if j < n and toks[j][0] in ("str", "word"):
+            v = toks[j][1]
+            # functions (currentUser(), openSprints() ...) and EMPTY are not mirrored
+            if toks[j][0] == "word" and (v.lower() in ("empty", "null") or (j + 1 < n and toks[j + 1] == ("op", "("))):
+                return None
+            return v
+        return None
+
+    while i < n:
+        kind, tok = toks[i]
+        if kind == "word" and tok.lower() == "order":
+            break
+        if clauses:
+            if kind != "word" or tok.lower() != "and":
+                return None
+            i += 1
+            if i >= n:
+                return None
+            kind, tok = toks[i]
+        if kind not in ("word", "str"):
+            return None
+        field = tok.lower()
+        clauses += 1
+        i += 1
+        if i >= n:
+            return None
+        op = toks[i][1].lower() if toks[i][0] in ("op", "word") else None
+        negate = False
+        if op == "not" and i + 1 < n and toks[i + 1][1].lower() == "in":
+            negate = True
+            op = "in"
+            i += 1
+        i += 1
+        if op in ("~", "!~"):
+            cols = _TEXT_FIELDS.get(field)
+            v = _value(i)
+            if not cols or v is None:
+                return None
+            like = "%" + v.strip().strip("*").lower() + "%"
+            expr = "(" + " OR ".join(f"lower({c}) LIKE ?" for c in cols) + ")"
+            where.append(("NOT " if op == "!~" else "") + expr)
+            params.extend([like] * len(cols))
+            i += 1
+            continue
+        col = _FIELDS.get(field)
+        if not col:
+            return None
+        if op in ("=", "!="):
+            v = _value(i)
+            if v is None:
+                return None
+            vals = [v]
+            i += 1
+        elif op == "in":
+            if i >= n or toks[i] != ("op", "("):
+                return None
+            i += 1
+            vals = []
+            while i < n and toks[i] != ("op", ")"):
+                if toks[i] == ("op", ","):
+                    i += 1
+                    continue
+                v = _value(i)
+                if v is None:
+                    return None
+                vals.append(v)
+                i += 1
+            if i >= n or not vals:
+                return None
+            i += 1
+        else:
+            return None
+        lowered = [str(v).strip().lower() for v in vals]
+        if col == "project":
+            if op != "!=" and not negate and lowered == [proj]:
+                scoped = True
+            else:
+                return None
+            continue
+        if col == "key" and op != "!=" and not negate:
+            if all(v.rsplit("-", 1)[0] == proj for v in lowered):
+                scoped = True
+            else:
+                return None
+        marks = ",".join("?" for _ in lowered)
+        if op == "!=" or negate:
+            where.append(f"lower(coalesce({col}, '')) NOT IN ({marks})")
+        else:
+            where.append(f"lower({col}) IN ({marks})")
+        params.extend(lowered)
+    if not scoped:
+        return None
+    order = []
+    if i < n:
+        if i + 1 >= n or toks[i + 1][1].lower() != "by":
+            return None
+        i += 2
+        while i < n:
+            if toks[i][0] not in ("word", "str"):
+                return None
+            tmpl = _ORDER_FIELDS.get(toks[i][1].lower())
+            if not tmpl:
+                return None
+            d = "ASC"
+            i += 1
+            if i < n and toks[i][0] == "word" and toks[i][1].lower() in ("asc", "desc"):
+                d = toks[i][1].upper()
+                i += 1
+            order.append(tmpl.format(d=d))
+            if i < n:
+                if toks[i] != ("op", ","):
+                    return None
+                i += 1
+    if not order:
+        order = ["created DESC", "key_num DESC"]
+    return " AND ".join(where) or "1=1", params, ", ".join(order)
+
+class Mirror:
+    # SQLite copy of one or more projects' issues, stored as the row dicts that
+    # search() yields. scope is "<base url>|<project>" so switching tenants never
+    # mixes results. One connection per call keeps it safe across threads.
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._ready = False
+
+    def _conn(self):
+        if not self._ready:
+            d = os.path.dirname(self.path)
+            if d:
+                os.makedirs(d, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        if not self._ready:
+            with self._lock:
+                if not self._ready:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS issues ("
+                        "scope TEXT, key TEXT, project TEXT, key_num INTEGER, issue_type TEXT, status TEXT, "
+                        "priority TEXT, assignee TEXT, reporter TEXT, summary TEXT, description TEXT, "
+                        "acceptance TEXT, created TEXT, updated TEXT, row TEXT, PRIMARY KEY (scope, key))"
+                    )
+                    conn.execute("CREATE TABLE IF NOT EXISTS sync_state (scope TEXT PRIMARY KEY, last_sync REAL, last_full REAL)")
+                    conn.execute("CREATE INDEX IF NOT EXISTS idx_issues_status ON issues (scope, status)")
+                    conn.commit()
+                    self._ready = True
+        return conn
+
+    def _record(self, scope, row):
+        key = str(row.get("key") or "")
+        def _s(name):
+            v = row.get(name)
+            return "" if v is None else str(v)
+        return (
+            scope, key, key.rsplit("-", 1)[0].lower(), _key_num(key), _s("issue_type"), _s("status"),
+            _s("priority"), _s("assignee"), _s("reporter"), _s("summary"), _s("description"),
+            _s("acceptance"), _s("created"), _s("updated"), json.dumps(row),
+        )
+
+    def upsert(self, scope, rows, replace=False):
+        recs = [self._record(scope, r) for r in rows if r.get("key")]
+        conn = self._conn()
+        try:
+            with conn:
+                if replace:
+                    conn.execute("DELETE FROM issues WHERE scope = ?", (scope,))
+                conn.executemany("INSERT OR REPLACE INTO issues VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)", recs)
+        finally:
+            conn.close()
+        return len(recs)
+
+    def state(self, scope):
+        conn = self._conn()
+        try:
+            r = conn.execute("SELECT last_sync, last_full FROM sync_state WHERE scope = ?", (scope,)).fetchone()
+        finally:
+            conn.close()
+        return (r[0], r[1]) if r else (None, None)
+
+    def set_state(self, scope, last_sync, last_full=None):
+        conn = self._conn()
+        try:
+            with conn:
+                if last_full is None:
+                    conn.execute("INSERT OR IGNORE INTO sync_state VALUES (?, NULL, NULL)", (scope,))
+                    conn.execute("UPDATE sync_state SET last_sync = ? WHERE scope = ?", (last_sync, scope))
+                else:
+                    conn.execute("INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?)", (scope, last_sync, last_full))
+        finally:
+            conn.close()
+
+    def query(self, scope, where, params, order, limit=None):
+        sql = f"SELECT row FROM issues WHERE scope = ? AND {where} ORDER BY {order}"
+        args = [scope] + list(params)
+        if limit is not None:
+            sql += " LIMIT ?"
+            args.append(int(limit))
+        conn = self._conn()
+        try:
+            return [json.loads(r[0]) for r in conn.execute(sql, args)]
+        finally:
+            conn.close()
@@ -0,0 +1,187 @@
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.error import HTTPError
+
+_THROTTLE_CODES = (429, 503)
+
+def _header(headers, name):
+    try:
+        return headers.get(name) if headers is not None else None
+    except Exception:
+        return None
+
+def _secs_until(value):
+    # Retry-After is either delta-seconds or an HTTP date; X-RateLimit-Reset is ISO 8601
+    if value is None:
+        return None
+    s = str(value).strip()
+    if not s:
+        return None
+    try:
+        return max(0.0, float(s))
+    except Exception:
+        pass
+    when = None
+    try:
+        when = parsedate_to_datetime(s)
+    except Exception:
+        when = None
+    if when is None:
+        try:
+            when = datetime.fromisoformat(s.replace("Z", "+00:00"))
+        except Exception:
+            return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+def throttle_delay(headers):
+    # Server-advised wait in seconds, or None when the response carries no hint.
+    d = _secs_until(_header(headers, "Retry-After"))
+    if d is not None:
+        return d
+    remaining = _header(headers, "X-RateLimit-Remaining")
+    try:
+        exhausted = remaining is not None and int(remaining) <= 0
+    except Exception:
+        exhausted = False
+    if exhausted or _header(headers, "X-RateLimit-Reset") is not None:
+        return _secs_until(_header(headers, "X-RateLimit-Reset"))
+    return None
+
+class TokenBucket:
+    # rate tokens per second, up to burst stored. pause() blocks every caller of
+    # this bucket until a server-advised deadline has passed.
+    def __init__(self, rate=10.0, burst=20):
+        self.rate = max(0.01, float(rate))
+        self.burst = max(1.0, float(burst))
+        self._tokens = self.burst
+        self._last = time.monotonic()
+        self._pause_until = 0.0
+        self._lock = threading.Lock()
+
+    def configure(self, rate=None, burst=None):
+        with self._lock:
+            if rate is not None:
+                self.rate = max(0.01, float(rate))
+            if burst is not None:
+                self.burst = max(1.0, float(burst))
+                self._tokens = min(self._tokens, self.burst)
+
+    def pause(self, secs):
+        with self._lock:
+            self._pause_until = max(self._pause_until, time.monotonic() + max(0.0, float(secs)))
+            self._tokens = 0.0
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._pause_until:
+                    wait = self._pause_until - now
+                else:
+                    self._tokens = min(self.burst, self._tokens + (now - max(self._last, self._pause_until)) * self.rate)
+                    self._last = now
+                    if self._tokens >= 1.0:
+                        self._tokens -= 1.0
+                        return
+                    wait = (1.0 - self._tokens) / self.rate
+            time.sleep(wait)
+
+class AimdGate:
+    # Concurrency limit with additive increase / multiplicative decrease.
+    # Each success adds 1/limit (about +1 per round of requests); a throttle
+    # halves the limit, at most once per cooldown so a burst of 429s from the
+    # same overload only counts once.
+    def __init__(self, initial=8, minimum=1, maximum=32, cooldown=1.0):
+        self.minimum = max(1, int(minimum))
+        self.maximum = max(self.minimum, int(maximum))
+        self.limit = float(min(self.maximum, max(self.minimum, int(initial))))
+        self.cooldown = float(cooldown)
+        self._in_flight = 0
+        self._last_cut = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self._in_flight >= int(self.limit):
+                self._cond.wait()
+            self._in_flight += 1
+
+    def release(self, throttled=False):
+        with self._cond:
+            self._in_flight = max(0, self._in_flight - 1)
+            now = time.monotonic()
+            if throttled:
+                if now - self._last_cut >= self.cooldown:
+                    self.limit = max(float(self.minimum), self.limit / 2.0)
+                    self._last_cut = now
+            else:
+                self.limit = min(float(self.maximum), self.limit + 1.0 / max(1.0, self.limit))
+            self._cond.notify_all()
+
+class RateLimiter:
+    # Process-wide limiter for JIRA calls: a token bucket per endpoint class,
+    # an optional AIMD concurrency gate, and retries on 429/503 that honor
+    # Retry-After / X-RateLimit-* and otherwise back off exponentially with jitter.
+    # Non-idempotent calls are retried on 429 only: JIRA may have applied a
+    # write before answering 503, and sending it again could duplicate it.
+    def __init__(self, limits=None, max_retries=4, backoff_secs=1.0, max_backoff_secs=60.0, max_wait_secs=120.0, aimd=None):
+        self.buckets = {}
+        for cls, spec in (limits or {}).items():
+            self.buckets[cls] = TokenBucket(spec.get("rate", 10), spec.get("burst", 20))
+        self.max_retries = max(0, int(max_retries))
+        self.backoff_secs = max(0.0, float(backoff_secs))
+        self.max_backoff_secs = max(self.backoff_secs, float(max_backoff_secs))
+        self.max_wait_secs = max(0.0, float(max_wait_secs))
+        self.aimd = aimd
+        self._lock = threading.Lock()
+
+    def bucket(self, cls):
+        b = self.buckets.get(cls)
+        if b is None:
+            with self._lock:
+                b = self.buckets.get(cls)
+                if b is None:
+                    b = TokenBucket()
+                    self.buckets[cls] = b
+        return b
+
+    def backoff(self, attempt):
+        cap = min(self.max_backoff_secs, self.backoff_secs * (2 ** attempt))
+        return cap / 2.0 + random.uniform(0, cap / 2.0)
+
+    def call(self, cls, fn, idempotent=True):
+        bucket = self.bucket(cls)
+        waited = 0.0
+        attempt = 0
+        while True:
+            bucket.acquire()
+            if self.aimd is not None:
+                self.aimd.acquire()
+            throttled = False
+            try:
+                resp = fn()
+                # close to the limit: slow the whole class down before JIRA starts rejecting
+                if str(_header(getattr(resp, "headers", None), "X-RateLimit-NearLimit") or "").lower() == "true":
+                    throttled = True
+                return resp
+            except HTTPError as e:
+                if e.code not in _THROTTLE_CODES:
+                    raise
+                throttled = True
+                if e.code != 429 and not idempotent:
+                    raise
+                advised = throttle_delay(e.headers)
+                delay = advised + random.uniform(0, min(1.0, advised * 0.1)) if advised is not None else self.backoff(attempt)
+                if attempt >= self.max_retries or waited + delay > self.max_wait_secs:
+                    raise
+                bucket.pause(delay)
+                waited += delay
+                attempt += 1
+            finally:
+                if self.aimd is not None:
+                    self.aimd.release(throttled)
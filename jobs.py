@@ -0,0 +1,269 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Background jobs for long batch operations. Work runs on a bounded executor
+# inside the process that accepted it; status, per-item results and cancel
+# requests live in a SQLite file (jobs.file, default data/jobs.sqlite3) so any
+# gunicorn worker can answer a poll and a recycled worker's jobs are reported
+# as interrupted instead of disappearing.
+
+_STORE = None
+_EXEC = None
+_LOCK = threading.Lock()
+
+def _cfg():
+    try:
+        from config import load_config
+        return load_config().get("jobs", {}) or {}
+    except Exception:
+        return {}
+
+def _int(cfg, key, default):
+    try:
+        return int(cfg.get(key, default))
+    except Exception:
+        return default
+
+def _alive(pid):
+    try:
+        os.kill(int(pid), 0)
+        return True
+    except PermissionError:
+        return True
+    except Exception:
+        return False
+
+class JobStore:
+    def __init__(self, path):
+        self.path = path
+        self._ready = False
+        self._lock = threading.Lock()
+
+    def _conn(self):
+        if not self._ready:
+            d = os.path.dirname(self.path)
+            if d:
+                os.makedirs(d, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        if not self._ready:
+            with self._lock:
+                if not self._ready:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, kind TEXT, status TEXT, total INTEGER, "
+                        "done INTEGER, cancel INTEGER, pid INTEGER, created REAL, updated REAL, result TEXT, error TEXT)"
+                    )
+                    conn.execute("CREATE TABLE IF NOT EXISTS items (job_id TEXT, idx INTEGER, data TEXT, PRIMARY KEY (job_id, idx))")
+                    conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_updated ON jobs (updated)")
+                    self._recover(conn)
+                    self._ready = True
+        return conn
+
+    def _recover(self, conn):
+        # jobs whose process is gone can't resume: their work function died with it
+        rows = conn.execute("SELECT id, pid FROM jobs WHERE status IN ('queued', 'running')").fetchall()
+        for job_id, pid in rows:
+            if pid != os.getpid() and not _alive(pid):
+                conn.execute(
+                    "UPDATE jobs SET status = 'interrupted', error = 'worker_restarted', updated = ? WHERE id = ?",
+                    (time.time(), job_id),
+                )
+
+    def create(self, kind, total):
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        conn = self._conn()
+        try:
+            conn.execute(
+                "INSERT INTO jobs VALUES (?, ?, 'queued', ?, 0, 0, ?, ?, ?, NULL, NULL)",
+                (job_id, kind, int(total), os.getpid(), now, now),
+            )
+        finally:
+            conn.close()
+        return job_id
+
+    def set_status(self, job_id, status):
+        conn = self._conn()
+        try:
+            conn.execute("UPDATE jobs SET status = ?, updated = ? WHERE id = ?", (status, time.time(), job_id))
+        finally:
+            conn.close()
+
+    def add_results(self, job_id, start, results):
+        conn = self._conn()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for n, r in enumerate(results):
+                    conn.execute("INSERT OR REPLACE INTO items VALUES (?, ?, ?)", (job_id, start + n, json.dumps(r)))
+                conn.execute(
+                    "UPDATE jobs SET done = done + ?, updated = ? WHERE id = ?",
+                    (len(results), time.time(), job_id),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+
+    def cancel_requested(self, job_id):
+        conn = self._conn()
+        try:
+            row = conn.execute("SELECT cancel FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        finally:
+            conn.close()
+        return bool(row and row[0])
+
+    def request_cancel(self, job_id):
+        conn = self._conn()
+        try:
+            conn.execute("UPDATE jobs SET cancel = 1, updated = ? WHERE id = ?", (time.time(), job_id))
+            row = conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        finally:
+            conn.close()
+        return row[0] if row else None
+
+    def finish(self, job_id, status, result=None, error=None):
+        conn = self._conn()
+        try:
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, updated = ? WHERE id = ?",
+                (status, json.dumps(result) if result is not None else None, error, time.time(), job_id),
+            )
+        finally:
+            conn.close()
+
+    def get(self, job_id, since=0):
+        conn = self._conn()
+        try:
+            row = conn.execute(
+                "SELECT id, kind, status, total, done, cancel, created, updated, result, error, pid FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            if row[2] in ("queued", "running") and row[10] != os.getpid() and not _alive(row[10]):
+                # the worker running it was recycled after this process opened the store
+                self._recover(conn)
+                row = row[:2] + ("interrupted",) + row[3:9] + ("worker_restarted",) + row[10:]
+            items = conn.execute(
+                "SELECT idx, data FROM items WHERE job_id = ? AND idx >= ? ORDER BY idx",
+                (job_id, int(since)),
+            ).fetchall()
+        finally:
+            conn.close()
+        return {
+            "id": row[0],
+            "kind": row[1],
+            "status": row[2],
+            "total": row[3],
+            "done": row[4],
+            "cancel_requested": bool(row[5]),
+            "created": row[6],
+            "updated": row[7],
+            "result": json.loads(row[8]) if row[8] else None,
+            "error": row[9],
+            "items": [{"index": i, "result": json.loads(d)} for i, d in items],
+        }
+
+    def prune(self, older_than):
+        conn = self._conn()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                old = [r[0] for r in conn.execute(
+                    "SELECT id FROM jobs WHERE updated < ? AND status IN ('done', 'failed', 'cancelled', 'interrupted')",
+                    (older_than,),
+                ).fetchall()]
+                for job_id in old:
+                    conn.execute("DELETE FROM items WHERE job_id = ?", (job_id,))
+                    conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+
+def _store():
+    global _STORE
+    if _STORE is None:
+        with _LOCK:
+            if _STORE is None:
+                path = _cfg().get("file") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "jobs.sqlite3")
+                _STORE = JobStore(path)
+    return _STORE
+
+def _executor():
+    global _EXEC
+    if _EXEC is None:
+        with _LOCK:
+            if _EXEC is None:
+                _EXEC = ThreadPoolExecutor(max_workers=max(1, _int(_cfg(), "workers", 2)), thread_name_prefix="job")
+    return _EXEC
+
+def _run(job_id, items, work, finish, chunk):
+    store = _store()
+    results = []
+    status = "done"
+    try:
+        if store.cancel_requested(job_id):
+            status = "cancelled"
+        else:
+            store.set_status(job_id, "running")
+            for start in range(0, len(items), chunk):
+                if store.cancel_requested(job_id):
+                    status = "cancelled"
+                    break
+                part = list(work(items[start:start + chunk]))
+                store.add_results(job_id, start, part)
+                results.extend(part)
+        body, code = finish(results) if finish else ({"results": results}, 200)
+        error = body.get("error") if isinstance(body, dict) and code >= 400 else None
+        if error and status == "done":
+            status = "failed"
+        store.finish(job_id, status, body, error)
+    except Exception as e:
+        try:
+            store.finish(job_id, "failed", None, str(e))
+        except Exception:
+            pass
+
+def submit(kind, items, work, finish=None, chunk=1):
+    # Queue work(items[i:i + chunk]) -> one JSON-able result per item for every
+    # chunk, then finish(all results) -> (body, http status) for the final
+    # result. Cancellation is checked between chunks; a cancelled job still
+    # gets finish() over the items done so far. Returns the job id.
+    items = list(items or [])
+    store = _store()
+    try:
+        store.prune(time.time() - _int(_cfg(), "retention_secs", 86400))
+    except Exception:
+        pass
+    job_id = store.create(kind, len(items))
+    _executor().submit(_run, job_id, items, work, finish, max(1, int(chunk or 1)))
+    return job_id
+
+def get(job_id, since=0):
+    return _store().get(job_id, since)
+
+def cancel(job_id):
+    # returns the job's status at the time of the request, None if unknown
+    return _store().request_cancel(job_id)
+
+def run_now(items, work, finish=None, chunk=None):
+    # Synchronous path for callers that don't ask for a job; same contract as submit.
+    items = list(items or [])
+    results = []
+    step = max(1, int(chunk or len(items) or 1))
+    for start in range(0, len(items), step):
+        results.extend(work(items[start:start + step]))
+    if finish:
+        return finish(results)
+    return {"results": results}, 200
@@ -2,5 +2,7 @@ from .feature_creation import generate_features, split_features
 from .story_creation import generate_stories
 from .feature_dor import score as feature_dor_score
 from .story_dor import score as story_dor_score
-from .feature_request import request_features, request_stories
+from .feature_request import request_features, request_stories, stream_features, stream_stories
 from .nlp import nlp_to_jql
+from .models import model_order, invalidate_models
+from .batch import run_batch, batch_workers
@@ -0,0 +1,71 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+def batch_workers(config=None, default=4):
+    # batch fan-out never runs more calls than llm.max_concurrent lets through anyway
+    llm = (config or {}).get("llm", {})
+    try:
+        return max(1, int(llm.get("max_concurrent", default)))
+    except Exception:
+        return default
+
+def run_batch(items, fn, max_workers=4, item_timeout=None, deadline=None):
+    # Run fn(item) for every item on a bounded pool and return one outcome per
+    # item, in input order:
+    #   {"ok": True, "value": ...} or {"ok": False, "error": exc, "timeout": bool}
+    # item_timeout counts from when an item starts running; deadline bounds the
+    # whole batch. Calls that miss either are abandoned (their thread finishes
+    # in the background and the result is dropped) and reported as timeouts.
+    items = list(items or [])
+    n = len(items)
+    out = [None] * n
+    if n == 0:
+        return out
+    started = [None] * n
+
+    def _run(i):
+        started[i] = time.monotonic()
+        return fn(items[i])
+
+    ex = ThreadPoolExecutor(max_workers=max(1, min(int(max_workers or 1), n)))
+    futs = {ex.submit(_run, i): i for i in range(n)}
+    pending = set(futs)
+    end = time.monotonic() + deadline if deadline else None
+    try:
+        while pending:
+            now = time.monotonic()
+            expired = []
+            next_check = None
+            for f in pending:
+                i = futs[f]
+                if end is not None and now >= end:
+                    expired.append((f, "batch deadline exceeded"))
+                    continue
+                if item_timeout and started[i] is not None:
+                    left = started[i] + item_timeout - now
+                    if left <= 0:
+                        expired.append((f, "item deadline exceeded"))
+                        continue
+                    next_check = left if next_check is None else min(next_check, left)
+                elif item_timeout:
+                    # queued items may start at any moment; poll so their clock is seen
+                    next_check = 0.25 if next_check is None else min(next_check, 0.25)
+            for f, why in expired:
+                pending.discard(f)
+                f.cancel()
+                out[futs[f]] = {"ok": False, "error": TimeoutError(why), "timeout": True}
+            if not pending:
+                break
+            if end is not None:
+                left = max(0.0, end - now)
+                next_check = left if next_check is None else min(next_check, left)
+            done, _ = wait(pending, timeout=next_check, return_when=FIRST_COMPLETED)
+            for f in done:
+                pending.discard(f)
+                try:
+                    out[futs[f]] = {"ok": True, "value": f.result()}
+                except Exception as e:
+                    out[futs[f]] = {"ok": False, "error": e, "timeout": False}
+    finally:
+        ex.shutdown(wait=False, cancel_futures=True)
+    return out
@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+def cache_key(models, prompt_text, generation_config):
+    raw = json.dumps([list(models or []), str(prompt_text or ""), generation_config or {}], sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class ResponseCache:
+    # LRU of LLM response texts, bounded by entry count and expired by TTL.
+    # With a path, entries are also written to a SQLite file so that every
+    # gunicorn worker (and the next restart) can reuse them.
+    def __init__(self, maxsize=512, ttl=300, path=None, disk_max=10000):
+        self.maxsize = max(1, int(maxsize))
+        self.ttl = max(0, int(ttl))
+        self.path = path or None
+        self.disk_max = max(self.maxsize, int(disk_max))
+        self._mem = OrderedDict()
+        self._lock = threading.Lock()
+        self._ready = False
+        self._writes = 0
+
+    def _conn(self):
+        if not self._ready:
+            d = os.path.dirname(self.path)
+            if d:
+                os.makedirs(d, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10)
+        if not self._ready:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS responses (k TEXT PRIMARY KEY, t REAL, v TEXT)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_t ON responses (t)")
+            conn.commit()
+            self._ready = True
+        return conn
+
+    def _remember(self, key, t, value):
+        with self._lock:
+            self._mem[key] = (t, value)
+            self._mem.move_to_end(key)
+            while len(self._mem) > self.maxsize:
+                self._mem.popitem(last=False)
+
+    def get(self, key):
+        if self.ttl <= 0:
+            return None
+        now = time.time()
+        with self._lock:
+            ent = self._mem.get(key)
+            if ent is not None:
+                if now - ent[0] < self.ttl:
+                    self._mem.move_to_end(key)
+                    return ent[1]
+                self._mem.pop(key, None)
+        if not self.path:
+            return None
+        try:
+            conn = self._conn()
+            try:
+                row = conn.execute("SELECT t, v FROM responses WHERE k = ?", (key,)).fetchone()
+            finally:
+                conn.close()
+        except Exception:
+            return None
+        if row and now - row[0] < self.ttl:
+            self._remember(key, row[0], row[1])
+            return row[1]
+        return None
+
+    def put(self, key, value):
+        if self.ttl <= 0 or not value:
+            return
+        now = time.time()
+        self._remember(key, now, value)
+        if not self.path:
+            return
+        try:
+            conn = self._conn()
+            try:
+                with conn:
+                    conn.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?)", (key, now, value))
+                    self._writes += 1
+                    if self._writes % 100 == 1:
+                        self._prune(conn, now)
+            finally:
+                conn.close()
+        except Exception:
+            pass
+
+    def _prune(self, conn, now):
+        conn.execute("DELETE FROM responses WHERE t < ?", (now - self.ttl,))
+        conn.execute(
+            "DELETE FROM responses WHERE k IN (SELECT k FROM responses ORDER BY t DESC LIMIT -1 OFFSET ?)",
+            (self.disk_max,),
+        )
+
+    def clear(self):
+        with self._lock:
+            self._mem.clear()
+        if self.path:
+            try:
+                conn = self._conn()
+                try:
+                    with conn:
+                        conn.execute("DELETE FROM responses")
+                finally:
+                    conn.close()
+            except Exception:
+                pass
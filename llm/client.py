@@ -0,0 +1,446 @@
+import json
+import os
+import ssl as _ssl
+import socket
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib import request as _req
+from urllib.error import HTTPError, URLError
+import transport
+from .models import model_order
+from .cache import ResponseCache, cache_key
+from .coord import LocalSlots, SharedSlots
+from .latency import observe, percentile
+
+_API = "https://generativelanguage.googleapis.com/v1beta/models"
+
+# Shared by every LLM call: one keep-alive pool to the generative API per
+# process, plus concurrency slots and per-model cooldowns shared by all workers.
+_POOL = None
+_POOL_LOCK = threading.Lock()
+_SLOTS = None
+_SLOTS_LOCK = threading.Lock()
+_LOCAL_SLOTS = LocalSlots()
+_CACHE = None
+_CACHE_LOCK = threading.Lock()
+
+def _int(llm, key, default):
+    try:
+        return int(llm.get(key, default))
+    except Exception:
+        return default
+
+def _pool(llm=None):
+    global _POOL
+    if _POOL is None:
+        with _POOL_LOCK:
+            if _POOL is None:
+                llm = llm or {}
+                _POOL = transport.ConnectionPool(maxsize=_int(llm, "pool_size", 8), idle_secs=_int(llm, "pool_idle_secs", 60))
+    return _POOL
+
+def _slots(llm):
+    # Concurrency slots and model cooldowns shared across worker processes
+    # through llm.coord_file (default data/llm_coord.sqlite3; "" keeps them
+    # per process).
+    global _SLOTS
+    if _SLOTS is None:
+        with _SLOTS_LOCK:
+            if _SLOTS is None:
+                path = llm.get("coord_file")
+                if path is None:
+                    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "llm_coord.sqlite3")
+                _SLOTS = SharedSlots(path) if path else _LOCAL_SLOTS
+    return _SLOTS
+
+def _acquire(llm):
+    # the limit is read from the config each call, so /config/llm changes apply at once
+    limit = max(1, _int(llm, "max_concurrent", 4))
+    slots = _slots(llm)
+    if slots is not _LOCAL_SLOTS:
+        try:
+            return slots, slots.acquire(limit)
+        except Exception:
+            # coordination file unusable (read-only disk, locked too long): stay in-process
+            slots = _LOCAL_SLOTS
+    return slots, slots.acquire(limit)
+
+def response_cache(llm=None):
+    global _CACHE
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                llm = llm or {}
+                _CACHE = ResponseCache(
+                    maxsize=_int(llm, "cache_size", 512),
+                    ttl=_int(llm, "cache_ttl_secs", 300),
+                    path=(llm.get("cache_file") or None),
+                )
+    return _CACHE
+
+def _cooldown_left(llm, model):
+    try:
+        cd_until = _slots(llm).cooling_until(model)
+    except Exception:
+        cd_until = _LOCAL_SLOTS.cooling_until(model)
+    return max(0.0, cd_until - time.time()) if cd_until else 0.0
+
+def _available_models(llm):
+    # Models not cooling down, in model_order. When every model is cooling
+    # down, the one whose cooldown ends first is tried anyway rather than
+    # failing without a single request.
+    order = model_order(llm)
+    left = [(_cooldown_left(llm, m), m) for m in order]
+    models = [m for t, m in left if t <= 0]
+    if not models and left:
+        models = [min(left, key=lambda x: x[0])[1]]
+    return models
+
+def _cool(llm, model, secs):
+    try:
+        until = int(time.time()) + int(secs)
+    except Exception:
+        return
+    _LOCAL_SLOTS.cool(model, until)
+    try:
+        _slots(llm).cool(model, until)
+    except Exception:
+        pass
+
+def _backoff(i):
+    return min(8, (2 ** i)) + random.uniform(0, 0.5)
+
+def _retry_after(e):
+    try:
+        h = getattr(e, "headers", None)
+        ra = h.get("Retry-After") if h else None
+        return int(ra) if ra else None
+    except Exception:
+        return None
+
+def _post(llm, url, data, timeout):
+    req = _req.Request(url, data=data, headers={"Content-Type": "application/json"}, method="POST")
+    slots, lease = _acquire(llm)
+    try:
+        resp = _pool(llm).urlopen(req, timeout=timeout)
+        try:
+            return json.loads(resp.read().decode("utf-8"))
+        finally:
+            try:
+                resp.close()
+            except Exception:
+                pass
+    finally:
+        try:
+            slots.release(lease)
+        except Exception:
+            pass
+
+def get_json(url, timeout=30):
+    req = _req.Request(url, headers={"Accept": "application/json"}, method="GET")
+    resp = _pool().urlopen(req, timeout=timeout)
+    try:
+        return json.loads(resp.read().decode("utf-8"))
+    finally:
+        try:
+            resp.close()
+        except Exception:
+            pass
+
+def _sleep(secs, cancel=None):
+    if cancel is None:
+        time.sleep(secs)
+    else:
+        cancel.wait(secs)
+
+def _text(obj):
+    candidates = (obj or {}).get("candidates", [])
+    if candidates:
+        content = candidates[0].get("content", {})
+        parts = content.get("parts", [])
+        if parts:
+            return parts[0].get("text", "")
+    return ""
+
+def _call_model(llm, model, data, cancel=None):
+    # One model with llm.max_retries attempts and exponential backoff (or
+    # Retry-After). Returns (response, "", "") on success or (None, kind, error)
+    # once the model is given up on; a model that keeps failing with
+    # 404/429/5xx or network errors cools down for llm.cooldown_secs. Fatal
+    # errors raise. Setting cancel stops further attempts.
+    api_key = llm.get("api_key", "").strip()
+    timeout_secs = _int(llm, "timeout_secs", 60)
+    max_retries = max(1, _int(llm, "max_retries", 5))
+    cooldown_secs = _int(llm, "cooldown_secs", 60)
+    url = f"{_API}/{model}:generateContent?key={api_key}"
+    last_err = ""
+    last_kind = ""
+    for i in range(max_retries):
+        if cancel is not None and cancel.is_set():
+            break
+        last = i >= max_retries - 1
+        eff_timeout = max(5, min(120, int(timeout_secs * (1 + 0.5 * i))))
+        started = time.monotonic()
+        try:
+            obj = _post(llm, url, data, eff_timeout)
+            observe(model, time.monotonic() - started)
+            return obj, "", ""
+        except HTTPError as e:
+            try:
+                msg = e.read().decode("utf-8")
+            except Exception:
+                msg = str(e)
+            last_err = msg
+            last_kind = "http"
+            code = getattr(e, "code", None)
+            ra = _retry_after(e)
+            if ra is not None and not last:
+                _sleep(max(0, ra), cancel)
+                continue
+            if code in (429, 500, 503) and not last:
+                _sleep(_backoff(i), cancel)
+                continue
+            if code in (404,):
+                _cool(llm, model, cooldown_secs)
+                break
+            if code in (429, 500, 503):
+                _cool(llm, model, ra or cooldown_secs)
+                break
+            raise RuntimeError(f"llm_http_error:{msg}")
+        except URLError as e:
+            if isinstance(getattr(e, "reason", None), _ssl.SSLError):
+                raise RuntimeError("llm_cert_missing:TLS certificate bundle not found. Install 'certifi' or system CA certificates.")
+            if isinstance(getattr(e, "reason", None), (TimeoutError, socket.timeout)):
+                observe(model, time.monotonic() - started)
+                last_err = "timeout"
+            else:
+                last_err = str(e.reason)
+            last_kind = "network"
+            if not last:
+                _sleep(_backoff(i), cancel)
+                continue
+            _cool(llm, model, cooldown_secs)
+            break
+        except _ssl.SSLError:
+            raise RuntimeError("llm_cert_missing:TLS certificate bundle not found. Install 'certifi' or system CA certificates.")
+        except (TimeoutError, socket.timeout):
+            # a timeout still tells the histogram the model is at least this slow
+            observe(model, time.monotonic() - started)
+            last_err = "timeout"
+            last_kind = "network"
+            if not last:
+                _sleep(_backoff(i), cancel)
+                continue
+            _cool(llm, model, cooldown_secs)
+            break
+    return None, last_kind, last_err
+
+def _hedge_delay(llm, model):
+    # llm.hedge_percentile (default 95) of the model's observed latency,
+    # llm.hedge_default_secs until llm.hedge_min_samples calls were seen,
+    # never below llm.hedge_min_secs.
+    delay = percentile(model, _int(llm, "hedge_percentile", 95), _int(llm, "hedge_min_samples", 20))
+    if delay is None:
+        delay = _int(llm, "hedge_default_secs", 10)
+    return max(_int(llm, "hedge_min_secs", 1), delay)
+
+def _hedged(llm, models, data):
+    # Start the first model; whenever the newest call has run past its hedge
+    # delay (or a call gives up) start the next model, with at most
+    # llm.hedge_max calls in flight. The first non-empty answer wins and the
+    # other calls are told to stop retrying; a request already on the wire
+    # finishes in the background and its answer is dropped.
+    cancel = threading.Event()
+    width = max(1, min(len(models), _int(llm, "hedge_max", 2)))
+    ex = ThreadPoolExecutor(max_workers=width)
+    pending = set()
+    nxt = 0
+    newest = None
+    launched = 0.0
+    empty = None
+    fatal = None
+    last_kind = ""
+    last_err = ""
+    try:
+        while True:
+            if nxt < len(models) and fatal is None and (not pending or len(pending) < width and time.monotonic() - launched >= _hedge_delay(llm, newest)):
+                newest = models[nxt]
+                nxt += 1
+                launched = time.monotonic()
+                pending.add(ex.submit(_call_model, llm, newest, data, cancel))
+                continue
+            if not pending:
+                break
+            timeout = None
+            if nxt < len(models) and fatal is None and len(pending) < width:
+                timeout = max(0.0, launched + _hedge_delay(llm, newest) - time.monotonic())
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for f in done:
+                pending.discard(f)
+                try:
+                    obj, kind, err = f.result()
+                except RuntimeError as e:
+                    fatal = fatal or e
+                    continue
+                if obj is not None and _text(obj):
+                    return obj, "", ""
+                if obj is not None:
+                    empty = empty or obj
+                else:
+                    last_kind, last_err = kind or last_kind, err or last_err
+    finally:
+        cancel.set()
+        ex.shutdown(wait=False)
+    if empty is not None:
+        return empty, "", ""
+    if fatal is not None:
+        raise fatal
+    return None, last_kind, last_err
+
+def generate_content(prompt_text, config=None, mime="text/plain", cache=True):
+    # Try the configured model and alternates in order (see _call_model), or
+    # with llm.hedge race a slow model against the next healthy alternate.
+    # Returns the text of the first candidate, possibly empty. Non-empty
+    # answers are cached by (model list, prompt, generation config) unless
+    # cache=False.
+    cfg = config or {}
+    llm = cfg.get("llm", {})
+    api_key = llm.get("api_key", "").strip()
+    primary_model = llm.get("model", "").strip()
+    if not api_key or not primary_model:
+        raise ValueError("llm_not_configured")
+    payload = {
+        "contents": [
+            {"role": "user", "parts": [{"text": str(prompt_text or "")}]}
+        ],
+        "generationConfig": {"responseMimeType": mime}
+    }
+    ck = None
+    if cache:
+        ck = cache_key([primary_model] + list(llm.get("alternates") or []), prompt_text, payload["generationConfig"])
+        hit = response_cache(llm).get(ck)
+        if hit is not None:
+            return hit
+    data = json.dumps(payload).encode("utf-8")
+    obj = None
+    last_err = ""
+    last_kind = ""
+    models = _available_models(llm)
+    if llm.get("hedge") and len(models) > 1:
+        obj, last_kind, last_err = _hedged(llm, models, data)
+    else:
+        for model in models:
+            obj, kind, err = _call_model(llm, model, data)
+            if obj is not None:
+                break
+            last_kind, last_err = kind or last_kind, err or last_err
+    if obj is None:
+        if last_kind == "network":
+            raise RuntimeError("llm_network_error:" + (last_err or "timeout"))
+        raise RuntimeError("llm_http_error:" + (last_err or "empty response"))
+    text = _text(obj)
+    if ck and text:
+        response_cache(llm).put(ck, text)
+    return text or ""
+
+def _stream_text(resp):
+    # alt=sse: one "data: {GenerateContentResponse}" line per chunk
+    for line in resp:
+        line = line.decode("utf-8", "replace").strip()
+        if not line.startswith("data:"):
+            continue
+        try:
+            obj = json.loads(line[5:].strip())
+        except Exception:
+            continue
+        for cand in (obj.get("candidates") or [])[:1]:
+            for part in (cand.get("content") or {}).get("parts") or []:
+                t = part.get("text")
+                if t:
+                    yield t
+
+def stream_content(prompt_text, config=None, mime="text/plain", cache=True):
+    # Streaming counterpart of generate_content using streamGenerateContent.
+    # Yields text pieces as they arrive. Model fallback and cooldowns work as
+    # in generate_content, but only until the first piece has been yielded;
+    # after that an error ends the stream. The joined text goes to the same
+    # response cache, and a cached answer is yielded as a single piece.
+    cfg = config or {}
+    llm = cfg.get("llm", {})
+    api_key = llm.get("api_key", "").strip()
+    primary_model = llm.get("model", "").strip()
+    if not api_key or not primary_model:
+        raise ValueError("llm_not_configured")
+    timeout_secs = _int(llm, "timeout_secs", 60)
+    cooldown_secs = _int(llm, "cooldown_secs", 60)
+    payload = {
+        "contents": [
+            {"role": "user", "parts": [{"text": str(prompt_text or "")}]}
+        ],
+        "generationConfig": {"responseMimeType": mime}
+    }
+    ck = None
+    if cache:
+        ck = cache_key([primary_model] + list(llm.get("alternates") or []), prompt_text, payload["generationConfig"])
+        hit = response_cache(llm).get(ck)
+        if hit is not None:
+            yield hit
+            return
+    data = json.dumps(payload).encode("utf-8")
+    last_err = ""
+    last_kind = ""
+    for model in _available_models(llm):
+        url = f"{_API}/{model}:streamGenerateContent?alt=sse&key={api_key}"
+        req = _req.Request(url, data=data, headers={"Content-Type": "application/json", "Accept": "text/event-stream"}, method="POST")
+        slots, lease = _acquire(llm)
+        try:
+            try:
+                resp = _pool(llm).urlopen(req, timeout=max(5, min(120, timeout_secs)))
+            except HTTPError as e:
+                try:
+                    last_err = e.read().decode("utf-8")
+                except Exception:
+                    last_err = str(e)
+                last_kind = "http"
+                code = getattr(e, "code", None)
+                if code in (404, 429, 500, 503):
+                    _cool(llm, model, _retry_after(e) or cooldown_secs)
+                    continue
+                raise RuntimeError(f"llm_http_error:{last_err}")
+            except URLError as e:
+                if isinstance(getattr(e, "reason", None), _ssl.SSLError):
+                    raise RuntimeError("llm_cert_missing:TLS certificate bundle not found. Install 'certifi' or system CA certificates.")
+                last_err = "timeout" if isinstance(getattr(e, "reason", None), (TimeoutError, socket.timeout)) else str(e.reason)
+                last_kind = "network"
+                _cool(llm, model, cooldown_secs)
+                continue
+            except (TimeoutError, socket.timeout):
+                last_err = "timeout"
+                last_kind = "network"
+                _cool(llm, model, cooldown_secs)
+                continue
+            pieces = []
+            try:
+                for t in _stream_text(resp):
+                    pieces.append(t)
+                    yield t
+            except (TimeoutError, socket.timeout, OSError) as e:
+                raise RuntimeError(f"llm_network_error:{e}")
+            finally:
+                try:
+                    resp.close()
+                except Exception:
+                    pass
+            if ck and pieces:
+                response_cache(llm).put(ck, "".join(pieces))
+            return
+        finally:
+            try:
+                slots.release(lease)
+            except Exception:
+                pass
+    if last_kind == "network":
+        raise RuntimeError("llm_network_error:" + (last_err or "timeout"))
+    raise RuntimeError("llm_http_error:" + (last_err or "empty response"))
@@ -0,0 +1,138 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+def _alive(pid):
+    try:
+        os.kill(int(pid), 0)
+        return True
+    except PermissionError:
+        return True
+    except Exception:
+        return False
+
+class LocalSlots:
+    # In-process counterpart of SharedSlots, used when no coordination file is
+    # configured or the file can't be opened. The limit is re-read on every
+    # acquire, so a config change applies to the next call.
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._used = 0
+        self._cooldown = {}
+
+    def acquire(self, limit, timeout=None):
+        end = time.monotonic() + timeout if timeout else None
+        with self._cond:
+            while self._used >= max(1, int(limit)):
+                left = None if end is None else end - time.monotonic()
+                if left is not None and left <= 0:
+                    raise TimeoutError("llm_slot_timeout")
+                self._cond.wait(left if left is not None else 1.0)
+            self._used += 1
+        return None
+
+    def release(self, lease):
+        with self._cond:
+            self._used = max(0, self._used - 1)
+            self._cond.notify()
+
+    def cool(self, model, until):
+        self._cooldown[model] = max(self._cooldown.get(model, 0), until)
+
+    def cooling_until(self, model):
+        return self._cooldown.get(model, 0)
+
+class SharedSlots:
+    # Concurrency slots and model cooldowns shared by every process using the
+    # same SQLite file (gunicorn workers, the desktop app). A slot is a lease
+    # row; leases of dead processes or older than lease_secs are reclaimed, so
+    # a crashed worker can't leak capacity.
+    def __init__(self, path, lease_secs=600):
+        self.path = path
+        self.lease_secs = max(30, int(lease_secs))
+        self._ready = False
+        self._lock = threading.Lock()
+        self._cooldown = {}
+
+    def _conn(self):
+        if not self._ready:
+            d = os.path.dirname(self.path)
+            if d:
+                os.makedirs(d, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        if not self._ready:
+            with self._lock:
+                if not self._ready:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute("CREATE TABLE IF NOT EXISTS slots (id TEXT PRIMARY KEY, pid INTEGER, t REAL)")
+                    conn.execute("CREATE TABLE IF NOT EXISTS cooldown (model TEXT PRIMARY KEY, until REAL)")
+                    self._ready = True
+        return conn
+
+    def _try(self, conn, limit):
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute("SELECT id, pid, t FROM slots").fetchall()
+            stale = [r[0] for r in rows if now - r[2] > self.lease_secs or not _alive(r[1])]
+            for sid in stale:
+                conn.execute("DELETE FROM slots WHERE id = ?", (sid,))
+            if len(rows) - len(stale) >= max(1, int(limit)):
+                conn.execute("COMMIT")
+                return None
+            lease = uuid.uuid4().hex
+            conn.execute("INSERT INTO slots VALUES (?, ?, ?)", (lease, os.getpid(), now))
+            conn.execute("COMMIT")
+            return lease
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def acquire(self, limit, timeout=None):
+        end = time.monotonic() + timeout if timeout else None
+        delay = 0.02
+        conn = self._conn()
+        try:
+            while True:
+                lease = self._try(conn, limit)
+                if lease:
+                    return lease
+                if end is not None and time.monotonic() >= end:
+                    raise TimeoutError("llm_slot_timeout")
+                time.sleep(delay)
+                delay = min(0.5, delay * 2)
+        finally:
+            conn.close()
+
+    def release(self, lease):
+        if not lease:
+            return
+        conn = self._conn()
+        try:
+            conn.execute("DELETE FROM slots WHERE id = ?", (lease,))
+        finally:
+            conn.close()
+
+    def cool(self, model, until):
+        self._cooldown[model] = max(self._cooldown.get(model, 0), until)
+        conn = self._conn()
+        try:
+            conn.execute(
+                "INSERT INTO cooldown VALUES (?, ?) ON CONFLICT(model) DO UPDATE SET until = max(until, excluded.until)",
+                (model, until),
+            )
+        finally:
+            conn.close()
+
+    def cooling_until(self, model):
+        local = self._cooldown.get(model, 0)
+        if local > time.time():
+            return local
+        conn = self._conn()
+        try:
+            row = conn.execute("SELECT until FROM cooldown WHERE model = ?", (model,)).fetchone()
+        finally:
+            conn.close()
+        return row[0] if row else 0
@@ -0,0 +1,150 @@
+import json
+import re
+from .client import generate_content
+from .batch import run_batch, batch_workers
+
+def _int(llm, key, default):
+    try:
+        return int(llm.get(key, default))
+    except Exception:
+        return default
+
+def _tokens(text):
+    # rough estimate, ~4 characters per token
+    return len(str(text or "")) // 4 + 8
+
+def _chunks(summaries, budget, size):
+    # Greedy packing of item indexes so every prompt stays under the token
+    # budget and item count. An oversized item still gets a chunk of its own.
+    out = []
+    cur = []
+    used = 0
+    for i, s in enumerate(summaries):
+        t = _tokens(s)
+        if cur and (used + t > budget or len(cur) >= size):
+            out.append(cur)
+            cur = []
+            used = 0
+        cur.append(i)
+        used += t
+    if cur:
+        out.append(cur)
+    return out
+
+def _prompt(prompt, label, items):
+    parts = [
+        prompt.strip(),
+        "",
+        f"Evaluate each {label} below independently against the criteria above.",
+        'Return ONLY a JSON array with exactly one object per item: {"key": "<item key>", "score": <integer 1-100>, "reason": "<brief explanation>"}.',
+        "",
+    ]
+    for key, text in items:
+        parts.append(f"Item key: {key}")
+        parts.append(f"{label} Summary:")
+        parts.append(str(text or ""))
+        parts.append("---")
+    return "\n".join(parts)
+
+def _parse(text, keys):
+    s = str(text or "").strip()
+    s = re.sub(r"^```(?:json)?", "", s)
+    s = re.sub(r"```$", "", s).strip()
+    try:
+        arr = json.loads(s)
+    except Exception:
+        return {}
+    if isinstance(arr, dict):
+        arr = arr.get("items") or arr.get("results") or arr.get("scores") or []
+    found = {}
+    for it in arr if isinstance(arr, list) else []:
+        if not isinstance(it, dict):
+            continue
+        k = str(it.get("key") or "").strip()
+        if k not in keys or k in found:
+            continue
+        try:
+            n = int(it.get("score"))
+        except Exception:
+            continue
+        if n < 1 or n > 100:
+            continue
+        r = str(it.get("reason") or "").strip() or "DOR evaluated"
+        found[k] = (n, "Pass" if n >= 85 else "Fail", r)
+    return found
+
+def ai_failed(err):
+    # the errors single-item scoring answers with the offline heuristic
+    if isinstance(err, TimeoutError):
+        return True
+    msg = str(err)
+    return msg.startswith("llm_http_error:") or msg.startswith("llm_network_error:") or msg.startswith("llm_empty_output")
+
+def score_batched(summaries, prompt, cfg, label, single, heuristic, max_workers=None):
+    # Pack summaries into multi-item prompts sized by llm.dor_batch_tokens and
+    # llm.dor_batch_size. Items an answered chunk skipped or scored invalidly
+    # are scored one by one with single(summary, prompt, cfg). A chunk whose
+    # call failed (already retried by the client) or whose answer can't be
+    # parsed gets heuristic(summary) for every item, as single() would after
+    # the same error, without calling the LLM again.
+    # Returns one outcome per summary in input order, shaped like run_batch's.
+    summaries = list(summaries or [])
+    llm = cfg.get("llm", {})
+    budget = max(200, _int(llm, "dor_batch_tokens", 6000) - _tokens(prompt) - 200)
+    size = max(1, _int(llm, "dor_batch_size", 10))
+    workers = max_workers or batch_workers(cfg)
+    chunks = _chunks(summaries, budget, size)
+
+    def _run(idx):
+        keys = [f"I{n + 1}" for n in range(len(idx))]
+        text = generate_content(_prompt(prompt, label, list(zip(keys, [summaries[i] for i in idx]))), cfg, "application/json")
+        found = _parse(text, set(keys))
+        if not found:
+            raise RuntimeError("llm_empty_output:no parseable scores in batch answer")
+        return {i: found.get(k) for i, k in zip(idx, keys)}
+
+    out = [None] * len(summaries)
+    for idx, res in zip(chunks, run_batch(chunks, _run, max_workers=workers)):
+        if res["ok"]:
+            for i, v in res["value"].items():
+                if v is not None:
+                    out[i] = {"ok": True, "value": v}
+        elif ai_failed(res["error"]):
+            for i in idx:
+                out[i] = {"ok": True, "value": heuristic(summaries[i])}
+        else:
+            for i in idx:
+                out[i] = {"ok": False, "error": res["error"], "timeout": res.get("timeout", False)}
+    missing = [i for i, o in enumerate(out) if o is None]
+    if missing:
+        for i, res in zip(missing, run_batch([summaries[i] for i in missing], lambda s: single(s, prompt, cfg), max_workers=workers)):
+            out[i] = res
+    return out
+
+def configured(prompt, cfg):
+    # False when a prompt needs the LLM but no key/model is set
+    llm = (cfg or {}).get("llm", {})
+    return not (prompt or "").strip() or bool(str(llm.get("api_key", "")).strip() and str(llm.get("model", "")).strip())
+
+def score_many(summaries, prompt, cfg, label, single, heuristic, max_workers=None):
+    # Score every summary with one config, several per LLM call when
+    # llm.dor_batch_size > 1, else one single(summary, prompt, cfg) call each;
+    # rows come back in input order as {"score", "status", "reason"} plus
+    # "error" when a row failed. label names the item kind in the prompt.
+    llm = cfg.get("llm", {})
+    if not configured(prompt, cfg):
+        raise ValueError("llm_not_configured")
+    summaries = list(summaries or [])
+    batch_size = _int(llm, "dor_batch_size", 10)
+    if (prompt or "").strip() and batch_size > 1 and len(summaries) > 1:
+        outcomes = score_batched(summaries, prompt, cfg, label, single, heuristic, max_workers=max_workers)
+    else:
+        outcomes = run_batch(summaries, lambda s: single(s, prompt, cfg), max_workers=max_workers or batch_workers(cfg))
+    rows = []
+    for res in outcomes:
+        if res["ok"]:
+            sc, st, rs = res["value"]
+            rows.append({"score": sc, "status": st, "reason": rs})
+        else:
+            rows.append({"score": 0, "status": "Fail", "reason": "DOR check failed", "error": str(res["error"])})
+    return rows
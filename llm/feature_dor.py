@@ -21,17 +21,35 @@ def _parse_text(text):
     st = "Pass" if n >= 85 else "Fail"
     return n, st, r or "DOR evaluated"
 
-def score(summary, prompt):
+def _load_cfg():
+    try:
+        from config import load_config
+        return load_config()
+    except Exception:
+        return {}
+
+def _heuristic(summary):
+    # offline score used when the AI call fails
+    s = str(summary or "")
+    score = 50
+    if "Acceptance Criteria:" in s: score += 20
+    if "Benefit Hypothesis:" in s: score += 10
+    if "Business Value:" in s: score += 10
+    wc = len(re.findall(r"\w+", s))
+    if wc > 200: score += 5
+    if wc < 50: score -= 10
+    score = max(1, min(100, score))
+    st = "Pass" if score >= 85 else "Fail"
+    rs = "Heuristic DOR due to AI error"
+    return score, st, rs
+
+def score(summary, prompt, config=None):
     txt = (prompt or "").strip()
     if not txt:
         sc = min(100, max(1, len(re.findall(r"\w+", summary)) // 3))
         st = "Pass" if sc >= 85 else "Fail"
         return sc, st, "Content length and structure assessed"
-    try:
-        from config import load_config
-        cfg = load_config()
-    except Exception:
-        cfg = {}
+    cfg = config if config is not None else _load_cfg()
     full = f"{txt}\n\nFeature Summary:\n{summary}\n\nReturn ONLY the two lines in this exact format:\nScore: <integer 1-100>\nReason: <brief explanation>"
     try:
         text = generate_plain_text(full, cfg)
@@ -51,17 +69,12 @@ def score(summary, prompt):
             except Exception:
                 overloaded = False
         if any_http or msg.startswith("llm_network_error:") or empty:
-            s = str(summary or "")
-            score = 50
-            if "Acceptance Criteria:" in s: score += 20
-            if "Benefit Hypothesis:" in s: score += 10
-            if "Business Value:" in s: score += 10
-            wc = len(re.findall(r"\w+", s))
-            if wc > 200: score += 5
-            if wc < 50: score -= 10
-            score = max(1, min(100, score))
-            st = "Pass" if score >= 85 else "Fail"
-            rs = "Heuristic DOR due to AI error"
-            return score, st, rs
+            return _heuristic(summary)
         raise
+
+def score_many(summaries, prompt, config=None, max_workers=None):
+    # see dor_batch.score_many
+    cfg = config if config is not None else _load_cfg()
+    return dor_batch.score_many(summaries, prompt, cfg, "Feature", score, _heuristic, max_workers=max_workers)
 from .nlp import generate_plain_text
+from . import dor_batch
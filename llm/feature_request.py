@@ -1,9 +1,7 @@
 import json
 import re
-import ssl as _ssl
-import socket
-from urllib import request as _req
-from urllib.error import HTTPError, URLError
+from .client import generate_content, stream_content
+from .stream import JsonArrayStream
 
 def _normalize(items):
     res = []
@@ -27,181 +25,36 @@ def _strip_code_fences(text):
     s = re.sub(r"```$", "", s)
     return s.strip()
 
-def request_features(requirement_text, prompt_text, config=None):
+def _check(prompt_text, cfg):
     if not (prompt_text or "").strip():
         raise ValueError("no_prompt")
-    cfg = config or {}
     llm = cfg.get("llm", {})
     api_key = llm.get("api_key", "").strip()
     primary_model = llm.get("model", "").strip()
-    alternates = llm.get("alternates") or []
     if not api_key or not primary_model:
         raise ValueError("llm_not_configured")
-    models = [m.strip() for m in ([primary_model] + list(alternates)) if str(m or "").strip()]
-    avail = set()
-    gen_ok = set()
-    try:
-        urlm = f"https://generativelanguage.googleapis.com/v1beta/models?key={api_key}"
-        reqm = _req.Request(urlm, headers={"Accept": "application/json"}, method="GET")
-        ctxm = None
-        try:
-            import certifi
-            ctxm = _ssl.create_default_context(cafile=certifi.where())
-        except Exception:
-            ctxm = None
-        if ctxm is not None:
-            respm = _req.urlopen(reqm, timeout=30, context=ctxm)
-        else:
-            respm = _req.urlopen(reqm, timeout=30)
-        try:
-            rawm = respm.read().decode("utf-8")
-            objm = json.loads(rawm)
-        finally:
-            try:
-                respm.close()
-            except Exception:
-                pass
-        arr = objm.get("models") or objm.get("data") or []
-        for it in arr or []:
-            nm = (it.get("name") or "").strip()
-            if nm.startswith("models/"):
-                nm = nm.split("/",1)[1]
-            if nm:
-                avail.add(nm)
-                methods = it.get("supportedGenerationMethods") or []
-                if "generateContent" in methods:
-                    gen_ok.add(nm)
-    except Exception:
-        pass
-    def _base_name(x):
-        x = str(x or "").strip()
-        if x.startswith("models/"):
-            x = x.split("/",1)[1]
-        if x.endswith("-latest"):
-            x = x[:-7]
-        return x
-    filtered = []
-    seen = set()
-    for m in models:
-        mm = str(m or "").strip()
-        if not gen_ok:
-            if mm not in seen:
-                filtered.append(mm); seen.add(mm)
-            continue
-        base = _base_name(mm)
-        choice = None
-        if mm in gen_ok:
-            choice = mm
-        elif base in gen_ok:
-            choice = base
-        elif f"{base}-latest" in gen_ok:
-            choice = f"{base}-latest"
-        if choice and choice not in seen:
-            filtered.append(choice); seen.add(choice)
-    if filtered:
-        models = filtered
-    payload = {
-        "contents": [
-            {
-                "role": "user",
-                "parts": [
-                    {
-                        "text": f"{prompt_text}\n\nRequirement:\n{requirement_text}\n\nReturn ONLY a JSON array of Feature objects using the schema from the prompt. Do not include any prose or markdown; respond with pure JSON."
-                    }
-                ]
-            }
-        ],
-        "generationConfig": {
-            "responseMimeType": "application/json"
-        }
-    }
-    obj = None
-    last_err = ""
-    last_kind = ""
-    for model in models:
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent?key={api_key}"
-        data = json.dumps(payload).encode("utf-8")
-        req = _req.Request(url, data=data, headers={"Content-Type": "application/json"}, method="POST")
-        for i in range(3):
-            try:
-                ctx = None
-                try:
-                    import certifi
-                    ctx = _ssl.create_default_context(cafile=certifi.where())
-                except Exception:
-                    ctx = None
-                if ctx is not None:
-                    resp = _req.urlopen(req, timeout=60, context=ctx)
-                else:
-                    resp = _req.urlopen(req, timeout=60)
-                try:
-                    raw = resp.read().decode("utf-8")
-                    obj = json.loads(raw)
-                finally:
-                    try:
-                        resp.close()
-                    except Exception:
-                        pass
-                break
-            except HTTPError as e:
-                try:
-                    msg = e.read().decode("utf-8")
-                except Exception:
-                    msg = str(e)
-                last_err = msg
-                code = getattr(e, "code", None)
-                if code in (429, 500, 503) and i < 2:
-                    import time, random
-                    time.sleep((2 ** i) + random.uniform(0, 0.5))
-                    continue
-                if code in (404,):
-                    obj = None
-                    break
-                raise RuntimeError(f"llm_http_error:{msg}")
-            except URLError as e:
-                try:
-                    if isinstance(e.reason, _ssl.SSLError):
-                        raise RuntimeError("llm_cert_missing:TLS certificate bundle not found. Install 'certifi' or system CA certificates.")
-                except Exception:
-                    pass
-                last_err = str(e.reason)
-                last_kind = "network"
-                if i < 2:
-                    import time, random
-                    time.sleep((2 ** i) + random.uniform(0, 0.5))
-                    continue
-                break
-            except _ssl.SSLError as e:
-                raise RuntimeError("llm_cert_missing:TLS certificate bundle not found. Install 'certifi' or system CA certificates.")
-            except TimeoutError:
-                last_err = "timeout"
-                last_kind = "network"
-                if i < 2:
-                    import time, random
-                    time.sleep((2 ** i) + random.uniform(0, 0.5))
-                    continue
-                break
-            except socket.timeout:
-                last_err = "timeout"
-                last_kind = "network"
-                if i < 2:
-                    import time, random
-                    time.sleep((2 ** i) + random.uniform(0, 0.5))
-                    continue
-                break
-        if obj is not None:
-            break
-    if obj is None:
-        if last_kind == "network":
-            raise RuntimeError("llm_network_error:" + (last_err or "timeout"))
-        raise RuntimeError("llm_http_error:" + (last_err or "empty response"))
-    candidates = obj.get("candidates", [])
-    text = ""
-    if candidates:
-        content = candidates[0].get("content", {})
-        parts = content.get("parts", [])
-        if parts:
-            text = parts[0].get("text", "")
+
+def _feature_prompt(requirement_text, prompt_text):
+    return f"{prompt_text}\n\nRequirement:\n{requirement_text}\n\nReturn ONLY a JSON array of Feature objects using the schema from the prompt. Do not include any prose or markdown; respond with pure JSON."
+
+def _infer_due(requirement):
+    import datetime as _dt
+    m = re.search(r"(20\d{2})-(0[1-9]|1[0-2])-(0[1-9]|[12]\d|3[01])", requirement)
+    if m:
+        return m.group(0)
+    return (_dt.date.today() + _dt.timedelta(days=14)).isoformat()
+
+def _with_due(items, requirement_text):
+    # ensure due date exists on each item
+    for it in items:
+        if not it.get("due_date") and not it.get("duedate"):
+            it["due_date"] = _infer_due(requirement_text)
+    return items
+
+def request_features(requirement_text, prompt_text, config=None):
+    cfg = config or {}
+    _check(prompt_text, cfg)
+    text = generate_content(_feature_prompt(requirement_text, prompt_text), cfg, "application/json")
     if not text:
         raise RuntimeError("llm_empty_output")
     cleaned = _strip_code_fences(text)
@@ -213,17 +66,21 @@ def request_features(requirement_text, prompt_text, config=None):
         arr = arr.get("features", [])
     if not isinstance(arr, list):
         raise RuntimeError("llm_json_not_array")
-    # ensure due date exists on each item
-    import datetime as _dt
-    def _infer_due(requirement):
-        m = re.search(r"(20\d{2})-(0[1-9]|1[0-2])-(0[1-9]|[12]\d|3[01])", requirement)
-        if m:
-            return m.group(0)
-        return (_dt.date.today() + _dt.timedelta(days=14)).isoformat()
-    for it in arr:
-        if not it.get("due_date") and not it.get("duedate"):
-            it["due_date"] = _infer_due(requirement_text)
-    return _normalize(arr)
+    return _normalize(_with_due(arr, requirement_text))
+
+def stream_features(requirement_text, prompt_text, config=None):
+    # Yields normalized Feature dicts one by one while the model is still writing.
+    cfg = config or {}
+    _check(prompt_text, cfg)
+    parser = JsonArrayStream()
+    count = 0
+    for piece in stream_content(_feature_prompt(requirement_text, prompt_text), cfg, "application/json"):
+        for it in parser.feed(piece):
+            if isinstance(it, dict):
+                count += 1
+                yield _normalize(_with_due([it], requirement_text))[0]
+    if count == 0:
+        raise RuntimeError("llm_empty_output")
 
 def _normalize_stories(items):
     res = []
@@ -324,189 +181,22 @@ def _normalize_stories(items):
         })
     return res
 
+_STORY_SCHEMA = (
+    "You MUST return Story objects with these fields: "
+    "Title (string), Summary (string), Acceptance Criteria (array of strings), "
+    "Story Point (integer), Priority (Critical/High/Medium/Low), Issue_type=story, "
+    "Tasks (array of objects). Each Task must be an actionable developer instruction with fields: "
+    "name (short imperative like 'Implement login endpoint') and hours (integer 1-16). "
+    "Include 4-8 tasks that together accomplish the story."
+)
+
+def _story_prompt(feature_text, prompt_text):
+    return f"{prompt_text}\n\n{_STORY_SCHEMA}\n\nFeature:\n{feature_text}\n\nReturn ONLY a JSON array of Story objects using the schema above. Do not include any prose or markdown; respond with pure JSON."
+
 def request_stories(feature_text, prompt_text, config=None):
-    if not (prompt_text or "").strip():
-        raise ValueError("no_prompt")
     cfg = config or {}
-    llm = cfg.get("llm", {})
-    api_key = llm.get("api_key", "").strip()
-    primary_model = llm.get("model", "").strip()
-    alternates = llm.get("alternates") or []
-    if not api_key or not primary_model:
-        raise ValueError("llm_not_configured")
-    models = [m.strip() for m in ([primary_model] + list(alternates)) if str(m or "").strip()]
-    avail = set()
-    gen_ok = set()
-    try:
-        urlm = f"https://generativelanguage.googleapis.com/v1beta/models?key={api_key}"
-        reqm = _req.Request(urlm, headers={"Accept": "application/json"}, method="GET")
-        ctxm = None
-        try:
-            import certifi
-            ctxm = _ssl.create_default_context(cafile=certifi.where())
-        except Exception:
-            ctxm = None
-        if ctxm is not None:
-            respm = _req.urlopen(reqm, timeout=30, context=ctxm)
-        else:
-            respm = _req.urlopen(reqm, timeout=30)
-        try:
-            rawm = respm.read().decode("utf-8")
-            objm = json.loads(rawm)
-        finally:
-            try:
-                respm.close()
-            except Exception:
-                pass
-        arr = objm.get("models") or objm.get("data") or []
-        for it in arr or []:
-            nm = (it.get("name") or "").strip()
-            if nm.startswith("models/"):
-                nm = nm.split("/",1)[1]
-            if nm:
-                avail.add(nm)
-                methods = it.get("supportedGenerationMethods") or []
-                if "generateContent" in methods:
-                    gen_ok.add(nm)
-    except Exception:
-        pass
-    def _base_name(x):
-        x = str(x or "").strip()
-        if x.startswith("models/"):
-            x = x.split("/",1)[1]
-        if x.endswith("-latest"):
-            x = x[:-7]
-        return x
-    filtered = []
-    seen = set()
-    for m in models:
-        mm = str(m or "").strip()
-        if not gen_ok:
-            if mm not in seen:
-                filtered.append(mm); seen.add(mm)
-            continue
-        base = _base_name(mm)
-        choice = None
-        if mm in gen_ok:
-            choice = mm
-        elif base in gen_ok:
-            choice = base
-        elif f"{base}-latest" in gen_ok:
-            choice = f"{base}-latest"
-        if choice and choice not in seen:
-            filtered.append(choice); seen.add(choice)
-    if filtered:
-        models = filtered
-    schema = (
-        "You MUST return Story objects with these fields: "
-        "Title (string), Summary (string), Acceptance Criteria (array of strings), "
-        "Story Point (integer), Priority (Critical/High/Medium/Low), Issue_type=story, "
-        "Tasks (array of objects). Each Task must be an actionable developer instruction with fields: "
-        "name (short imperative like 'Implement login endpoint') and hours (integer 1-16). "
-        "Include 4-8 tasks that together accomplish the story."
-    )
-    payload = {
-        "contents": [
-            {
-                "role": "user",
-                "parts": [
-                    {
-                        "text": f"{prompt_text}\n\n{schema}\n\nFeature:\n{feature_text}\n\nReturn ONLY a JSON array of Story objects using the schema above. Do not include any prose or markdown; respond with pure JSON."
-                    }
-                ]
-            }
-        ],
-        "generationConfig": {
-            "responseMimeType": "application/json"
-        }
-    }
-    obj = None
-    last_err = ""
-    last_kind = ""
-    for model in models:
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent?key={api_key}"
-        data = json.dumps(payload).encode("utf-8")
-        req = _req.Request(url, data=data, headers={"Content-Type": "application/json"}, method="POST")
-        for i in range(3):
-            try:
-                ctx = None
-                try:
-                    import certifi
-                    ctx = _ssl.create_default_context(cafile=certifi.where())
-                except Exception:
-                    ctx = None
-                if ctx is not None:
-                    resp = _req.urlopen(req, timeout=60, context=ctx)
-                else:
-                    resp = _req.urlopen(req, timeout=60)
-                try:
-                    raw = resp.read().decode("utf-8")
-                    obj = json.loads(raw)
-                finally:
-                    try:
-                        resp.close()
-                    except Exception:
-                        pass
-                break
-            except HTTPError as e:
-                try:
-                    msg = e.read().decode("utf-8")
-                except Exception:
-                    msg = str(e)
-                last_err = msg
-                code = getattr(e, "code", None)
-                if code in (429, 500, 503) and i < 2:
-                    import time, random
-                    time.sleep((2 ** i) + random.uniform(0, 0.5))
-                    continue
-                if code in (404,):
-                    obj = None
-                    break
-                raise RuntimeError(f"llm_http_error:{msg}")
-            except URLError as e:
-                try:
-                    if isinstance(e.reason, _ssl.SSLError):
-                        raise RuntimeError("llm_cert_missing:TLS certificate bundle not found. Install 'certifi' or system CA certificates.")
-                except Exception:
-                    pass
-                last_err = str(e.reason)
-                last_kind = "network"
-                if i < 2:
-                    import time, random
-                    time.sleep((2 ** i) + random.uniform(0, 0.5))
-                    continue
-                break
-            except _ssl.SSLError as e:
-                raise RuntimeError("llm_cert_missing:TLS certificate bundle not found. Install 'certifi' or system CA certificates.")
-            except TimeoutError:
-                last_err = "timeout"
-                last_kind = "network"
-                if i < 2:
-                    import time, random
-                    time.sleep((2 ** i) + random.uniform(0, 0.5))
-                    continue
-                break
-            except socket.timeout:
-                last_err = "timeout"
-                last_kind = "network"
-                if i < 2:
-                    import time, random
-                    time.sleep((2 ** i) + random.uniform(0, 0.5))
-                    continue
-                break
-        if obj is not None:
-            break
-    if obj is None:
-        if last_kind == "network":
-            raise RuntimeError("llm_network_error:" + (last_err or "timeout"))
-        raise RuntimeError("llm_http_error:" + (last_err or "empty response"))
-    candidates = obj.get("candidates", [])
-    text = ""
-    if candidates:
-        content = candidates[0].get("content", {})
-        parts = content.get("parts", [])
-        if parts:
-            text = parts[0].get("text", "")
+    _check(prompt_text, cfg)
+    text = generate_content(_story_prompt(feature_text, prompt_text), cfg, "application/json")
     if not text:
         raise RuntimeError("llm_empty_output")
     cleaned = _strip_code_fences(text)
@@ -519,3 +209,17 @@ def request_stories(feature_text, prompt_text, config=None):
     if not isinstance(arr, list):
         raise RuntimeError("llm_json_not_array")
     return _normalize_stories(arr)
+
+def stream_stories(feature_text, prompt_text, config=None):
+    # Yields normalized Story dicts one by one while the model is still writing.
+    cfg = config or {}
+    _check(prompt_text, cfg)
+    parser = JsonArrayStream()
+    count = 0
+    for piece in stream_content(_story_prompt(feature_text, prompt_text), cfg, "application/json"):
+        for it in parser.feed(piece):
+            if isinstance(it, dict):
+                count += 1
+                yield _normalize_stories([it])[0]
+    if count == 0:
+        raise RuntimeError("llm_empty_output")
@@ -0,0 +1,59 @@
+import bisect
+import threading
+
+# Bucket upper bounds in seconds, log-spaced from 50 ms to about 5 minutes.
+_BOUNDS = []
+_b = 0.05
+while _b < 300:
+    _BOUNDS.append(round(_b, 3))
+    _b *= 1.25
+_BOUNDS.append(float("inf"))
+
+class LatencyHistogram:
+    # Fixed-bucket latency histogram. Once total reaches max_count all counts
+    # are halved, so old samples fade out and the percentiles follow the
+    # model's current behaviour.
+    def __init__(self, max_count=1000):
+        self.max_count = max(10, int(max_count))
+        self.counts = [0] * len(_BOUNDS)
+        self.total = 0
+        self._lock = threading.Lock()
+
+    def add(self, secs):
+        i = bisect.bisect_left(_BOUNDS, max(0.0, float(secs)))
+        with self._lock:
+            self.counts[i] += 1
+            self.total += 1
+            if self.total >= self.max_count:
+                self.counts = [c // 2 for c in self.counts]
+                self.total = sum(self.counts)
+
+    def quantile(self, q):
+        # upper bound of the bucket holding the q-th fraction; None when empty
+        with self._lock:
+            if self.total == 0:
+                return None
+            want = max(1, int(round(self.total * min(1.0, max(0.0, q)))))
+            seen = 0
+            for i, c in enumerate(self.counts):
+                seen += c
+                if seen >= want:
+                    return _BOUNDS[i] if i < len(_BOUNDS) - 1 else _BOUNDS[-2]
+        return None
+
+_HIST = {}
+_LOCK = threading.Lock()
+
+def observe(model, secs):
+    h = _HIST.get(model)
+    if h is None:
+        with _LOCK:
+            h = _HIST.setdefault(model, LatencyHistogram())
+    h.add(secs)
+
+def percentile(model, pct, min_samples=20):
+    # pct-th percentile latency of model, or None until min_samples were seen
+    h = _HIST.get(model)
+    if h is None or h.total < max(1, int(min_samples)):
+        return None
+    return h.quantile(float(pct) / 100.0)
@@ -0,0 +1,122 @@
+import threading
+import time
+
+# Model catalog per API key: {"t": fetched at, "gen_ok": set of models that
+# support generateContent}. Stale entries are served while a background thread
+# refreshes them, so only the very first request pays for GET /v1beta/models.
+_CATALOG = {}
+_ORDER = {}
+_REFRESHING = set()
+_LOCK = threading.Lock()
+_FETCH_LOCK = threading.Lock()
+_FAILED_TTL = 60
+
+def _ttl(llm):
+    try:
+        return max(0, int(llm.get("models_cache_secs", 3600)))
+    except Exception:
+        return 3600
+
+def _fetch(api_key):
+    gen_ok = set()
+    # imported here: client imports this module for model_order
+    from .client import get_json
+    objm = get_json(f"https://generativelanguage.googleapis.com/v1beta/models?key={api_key}", timeout=30)
+    arr = objm.get("models") or objm.get("data") or []
+    for it in arr or []:
+        nm = (it.get("name") or "").strip()
+        if nm.startswith("models/"):
+            nm = nm.split("/", 1)[1]
+        if nm:
+            methods = it.get("supportedGenerationMethods") or []
+            if "generateContent" in methods:
+                gen_ok.add(nm)
+    return gen_ok
+
+def _load(api_key):
+    try:
+        gen_ok = _fetch(api_key)
+    except Exception:
+        gen_ok = set()
+    ent = {"t": time.time(), "gen_ok": frozenset(gen_ok)}
+    with _LOCK:
+        _CATALOG[api_key] = ent
+        _REFRESHING.discard(api_key)
+    return ent
+
+def _refresh_async(api_key):
+    with _LOCK:
+        if api_key in _REFRESHING:
+            return
+        _REFRESHING.add(api_key)
+    t = threading.Thread(target=_load, args=(api_key,), daemon=True)
+    t.start()
+
+def catalog(api_key, ttl=3600):
+    ent = _CATALOG.get(api_key)
+    if ent is None:
+        # one cold fetch per process; concurrent callers wait for it
+        with _FETCH_LOCK:
+            ent = _CATALOG.get(api_key)
+            if ent is None:
+                return _load(api_key)["gen_ok"]
+    # an empty catalog usually means the listing failed; retry it sooner
+    limit = ttl if ent["gen_ok"] else min(ttl, _FAILED_TTL)
+    if time.time() - ent["t"] >= limit:
+        _refresh_async(api_key)
+    return ent["gen_ok"]
+
+def _base_name(x):
+    x = str(x or "").strip()
+    if x.startswith("models/"):
+        x = x.split("/", 1)[1]
+    if x.endswith("-latest"):
+        x = x[:-7]
+    return x
+
+def _filter(models, gen_ok):
+    filtered = []
+    seen = set()
+    for m in models:
+        mm = str(m or "").strip()
+        if not gen_ok:
+            if mm not in seen:
+                filtered.append(mm); seen.add(mm)
+            continue
+        base = _base_name(mm)
+        choice = None
+        if mm in gen_ok:
+            choice = mm
+        elif base in gen_ok:
+            choice = base
+        elif f"{base}-latest" in gen_ok:
+            choice = f"{base}-latest"
+        if choice and choice not in seen:
+            filtered.append(choice); seen.add(choice)
+    return filtered or list(models)
+
+def model_order(llm):
+    # configured model + alternates, mapped onto models that can generateContent
+    api_key = str(llm.get("api_key", "")).strip()
+    primary_model = str(llm.get("model", "")).strip()
+    alternates = llm.get("alternates") or []
+    models = tuple(m.strip() for m in ([primary_model] + list(alternates)) if str(m or "").strip())
+    gen_ok = catalog(api_key, _ttl(llm))
+    ck = (api_key, models)
+    hit = _ORDER.get(ck)
+    if hit is not None and hit[0] is gen_ok:
+        return list(hit[1])
+    order = _filter(models, gen_ok)
+    with _LOCK:
+        _ORDER[ck] = (gen_ok, tuple(order))
+    return order
+
+def invalidate_models(api_key=None):
+    with _LOCK:
+        if api_key is None:
+            _CATALOG.clear()
+            _ORDER.clear()
+        else:
+            _CATALOG.pop(api_key, None)
+            for ck in [k for k in _ORDER if k[0] == api_key]:
+                _ORDER.pop(ck, None)
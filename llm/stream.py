@@ -0,0 +1,71 @@
+import json
+
+class JsonArrayStream:
+    # Incremental parser for a JSON array arriving in arbitrary text pieces.
+    # feed() returns the elements completed by that piece, in order. Anything
+    # before the first "[" (code fences, a wrapping {"features": ...}) is
+    # skipped; elements that fail to decode are dropped.
+    def __init__(self):
+        self._buf = []
+        self._started = False
+        self._ended = False
+        self._depth = 0
+        self._in_str = False
+        self._esc = False
+        self._elem = False
+
+    def _emit(self, out):
+        raw = "".join(self._buf).strip()
+        self._buf = []
+        self._elem = False
+        if not raw:
+            return
+        try:
+            out.append(json.loads(raw))
+        except Exception:
+            pass
+
+    def feed(self, text):
+        out = []
+        for ch in str(text or ""):
+            if self._ended:
+                break
+            if not self._started:
+                if ch == "[":
+                    self._started = True
+                continue
+            if self._in_str:
+                self._buf.append(ch)
+                if self._esc:
+                    self._esc = False
+                elif ch == "\\":
+                    self._esc = True
+                elif ch == '"':
+                    self._in_str = False
+                continue
+            if self._depth == 0:
+                # between elements of the top-level array
+                if ch == "]":
+                    self._emit(out)
+                    self._ended = True
+                    continue
+                if ch == ",":
+                    self._emit(out)
+                    continue
+                if not self._elem and ch.isspace():
+                    continue
+                self._elem = True
+            self._buf.append(ch)
+            if ch == '"':
+                self._in_str = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._emit(out)
+        return out
+
+    @property
+    def done(self):
+        return self._ended
@@ -0,0 +1,297 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import capacity_query
+
+# SQLite backend for firestore: sprint capacity, QBR capacity and sprint
+# allocations in indexed tables. Each record is also kept whole as JSON so
+# reads return exactly what was saved; the sprint/resource/QBR columns are
+# there for lookups and cross-record queries. Connections are per thread and
+# long-lived so sqlite's statement cache keeps every query below prepared.
+
+_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS meta (k TEXT PRIMARY KEY, v TEXT)",
+    "CREATE TABLE IF NOT EXISTS sprints (name TEXT PRIMARY KEY, sprint_days REAL, haircut_percent REAL, "
+    "team_members INTEGER, record TEXT, updated REAL)",
+    "CREATE INDEX IF NOT EXISTS idx_sprints_updated ON sprints (name, updated)",
+    "CREATE TABLE IF NOT EXISTS sprint_resources (sprint_name TEXT, idx INTEGER, name TEXT, role TEXT, tech TEXT, "
+    "leave REAL, available_capacity REAL, available_hours REAL, PRIMARY KEY (sprint_name, idx))",
+    "CREATE INDEX IF NOT EXISTS idx_sprint_resources_name ON sprint_resources (name)",
+    "CREATE INDEX IF NOT EXISTS idx_sprint_resources_role ON sprint_resources (role, tech)",
+    "CREATE TABLE IF NOT EXISTS qbrs (name TEXT PRIMARY KEY, haircut REAL, record TEXT, updated REAL)",
+    "CREATE INDEX IF NOT EXISTS idx_qbrs_updated ON qbrs (name, updated)",
+    "CREATE TABLE IF NOT EXISTS qbr_sprints (qbr_name TEXT, idx INTEGER, name TEXT, start TEXT, end TEXT, "
+    "holidays REAL, days REAL, PRIMARY KEY (qbr_name, idx))",
+    "CREATE INDEX IF NOT EXISTS idx_qbr_sprints_name ON qbr_sprints (name)",
+    "CREATE TABLE IF NOT EXISTS qbr_resources (qbr_name TEXT, idx INTEGER, name TEXT, role TEXT, tech TEXT, "
+    "PRIMARY KEY (qbr_name, idx))",
+    "CREATE INDEX IF NOT EXISTS idx_qbr_resources_name ON qbr_resources (name)",
+    "CREATE INDEX IF NOT EXISTS idx_qbr_sprints_start ON qbr_sprints (start)",
+    "CREATE TABLE IF NOT EXISTS sprint_dates (name TEXT PRIMARY KEY, start TEXT, end TEXT)",
+    "CREATE INDEX IF NOT EXISTS idx_sprint_dates_start ON sprint_dates (start)",
+    "CREATE TABLE IF NOT EXISTS qbr_resource_sprints (qbr_name TEXT, sprint_idx INTEGER, name TEXT, role TEXT, tech TEXT, "
+    "leave REAL, capacity REAL, hours REAL)",
+    "CREATE INDEX IF NOT EXISTS idx_qbr_resource_sprints_qbr ON qbr_resource_sprints (qbr_name, sprint_idx)",
+    "CREATE INDEX IF NOT EXISTS idx_qbr_resource_sprints_name ON qbr_resource_sprints (name)",
+    "CREATE INDEX IF NOT EXISTS idx_qbr_resource_sprints_role ON qbr_resource_sprints (role, tech)",
+    "CREATE TABLE IF NOT EXISTS allocations (sprint_name TEXT, story_key TEXT, PRIMARY KEY (sprint_name, story_key))",
+    "CREATE INDEX IF NOT EXISTS idx_allocations_key ON allocations (story_key)",
+]
+
+_UPSERT_SPRINT = (
+    "INSERT INTO sprints (name, sprint_days, haircut_percent, team_members, record, updated) VALUES (?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT(name) DO UPDATE SET sprint_days = excluded.sprint_days, haircut_percent = excluded.haircut_percent, "
+    "team_members = excluded.team_members, record = excluded.record, updated = excluded.updated"
+)
+_DELETE_SPRINT_RESOURCES = "DELETE FROM sprint_resources WHERE sprint_name = ?"
+_INSERT_SPRINT_RESOURCE = "INSERT INTO sprint_resources VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+_SPRINT_NAMES = "SELECT name FROM sprints ORDER BY name"
+_SPRINT_RECORD = "SELECT record FROM sprints WHERE name = ?"
+_UPSERT_QBR = (
+    "INSERT INTO qbrs (name, haircut, record, updated) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT(name) DO UPDATE SET haircut = excluded.haircut, record = excluded.record, updated = excluded.updated"
+)
+_DELETE_QBR_SPRINTS = "DELETE FROM qbr_sprints WHERE qbr_name = ?"
+_INSERT_QBR_SPRINT = "INSERT INTO qbr_sprints VALUES (?, ?, ?, ?, ?, ?, ?)"
+_DELETE_QBR_RESOURCES = "DELETE FROM qbr_resources WHERE qbr_name = ?"
+_INSERT_QBR_RESOURCE = "INSERT INTO qbr_resources VALUES (?, ?, ?, ?, ?)"
+_DELETE_QBR_RESOURCE_SPRINTS = "DELETE FROM qbr_resource_sprints WHERE qbr_name = ?"
+_INSERT_QBR_RESOURCE_SPRINT = "INSERT INTO qbr_resource_sprints VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+_QBR_SPRINT_NAMES = "SELECT DISTINCT name FROM qbr_sprints WHERE qbr_name = ?"
+_DELETE_SPRINT_DATES = "DELETE FROM sprint_dates WHERE name = ?"
+_REFRESH_SPRINT_DATES = (
+    "INSERT INTO sprint_dates SELECT name, MIN(NULLIF(start, '')), MAX(NULLIF(end, '')) "
+    "FROM qbr_sprints WHERE name = ? GROUP BY name"
+)
+_QBR_NAMES = "SELECT name FROM qbrs ORDER BY name"
+_QBR_RECORD = "SELECT record FROM qbrs WHERE name = ?"
+_INSERT_ALLOCATION = "INSERT OR IGNORE INTO allocations VALUES (?, ?)"
+_SCHEMA_VERSION = 2
+
+# Utilization facts per source, shaped like capacity_query.FIELDS. Filters are
+# applied inside each branch so the name/role/start indexes are used.
+_FACTS = {
+    "sprint": (
+        "SELECT 'sprint' AS source, r.sprint_name AS record, r.sprint_name AS sprint, d.start AS start, d.end AS end, "
+        "r.name AS name, r.role AS role, r.tech AS tech, r.leave AS leave, r.available_capacity AS capacity, "
+        "r.available_hours AS hours, s.updated AS saved FROM sprint_resources r JOIN sprints s ON s.name = r.sprint_name "
+        "LEFT JOIN sprint_dates d ON d.name = r.sprint_name",
+        {"record": "r.sprint_name", "sprint": "r.sprint_name", "start": "d.start", "name": "r.name", "role": "r.role", "tech": "r.tech"},
+    ),
+    "qbr": (
+        "SELECT 'qbr' AS source, x.qbr_name AS record, q.name AS sprint, NULLIF(q.start, '') AS start, NULLIF(q.end, '') AS end, "
+        "x.name AS name, x.role AS role, x.tech AS tech, x.leave AS leave, x.capacity AS capacity, x.hours AS hours, "
+        "b.updated AS saved FROM qbr_resource_sprints x JOIN qbr_sprints q ON q.qbr_name = x.qbr_name AND q.idx = x.sprint_idx "
+        "JOIN qbrs b ON b.name = x.qbr_name",
+        {"record": "x.qbr_name", "sprint": "q.name", "start": "NULLIF(q.start, '')", "name": "x.name", "role": "x.role", "tech": "x.tech"},
+    ),
+}
+_ALLOCATION_KEYS = "SELECT story_key FROM allocations WHERE sprint_name = ? ORDER BY story_key"
+
+def _num(v):
+    try:
+        return float(v)
+    except Exception:
+        return None
+
+class SqliteBackend:
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._ready = False
+        self._lock = threading.Lock()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+        d = os.path.dirname(self.path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, cached_statements=64)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if not self._ready:
+            with self._lock:
+                if not self._ready:
+                    for stmt in _SCHEMA:
+                        conn.execute(stmt)
+                    self._upgrade(conn)
+                    self._ready = True
+        self._local.conn = conn
+        return conn
+
+    def _upgrade(self, conn):
+        row = conn.execute("SELECT v FROM meta WHERE k = 'schema'").fetchone()
+        if row and int(row[0]) >= _SCHEMA_VERSION:
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # version 2 added qbr_resource_sprints and sprint_dates: fill them from the stored QBR records
+            for (raw,) in conn.execute("SELECT record FROM qbrs").fetchall():
+                try:
+                    self._put_qbr(conn, json.loads(raw), touch=False)
+                except Exception:
+                    continue
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('schema', ?)", (str(_SCHEMA_VERSION),))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _write(self, fn):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            out = fn(conn)
+            conn.execute("COMMIT")
+            return out
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _record(self, sql, name):
+        row = self._conn().execute(sql, (name,)).fetchone()
+        if not row:
+            return {}
+        try:
+            return json.loads(row[0])
+        except Exception:
+            return {}
+
+    def _put_sprint(self, conn, record):
+        name = record["sprint_name"]
+        conn.execute(_UPSERT_SPRINT, (
+            name, _num(record.get("sprint_days")), _num(record.get("haircut_percent")),
+            _num(record.get("team_members")), json.dumps(record), time.time(),
+        ))
+        conn.execute(_DELETE_SPRINT_RESOURCES, (name,))
+        # resource_summary carries the computed capacity; fall back to the raw inputs
+        rows = record.get("resource_summary") or record.get("resources") or []
+        conn.executemany(_INSERT_SPRINT_RESOURCE, [
+            (name, i, str(r.get("name") or ""), str(r.get("role") or ""), str(r.get("tech") or ""),
+             _num(r.get("leave")), _num(r.get("available_capacity")), _num(r.get("available_hours")))
+            for i, r in enumerate(rows) if isinstance(r, dict)
+        ])
+
+    def _put_qbr(self, conn, record, touch=True):
+        name = record["qbr_name"]
+        if touch:
+            conn.execute(_UPSERT_QBR, (name, _num(record.get("haircut")), json.dumps(record), time.time()))
+        # sprint capacity records take their dates from the QBRs that plan them
+        touched = set(r[0] for r in conn.execute(_QBR_SPRINT_NAMES, (name,)).fetchall())
+        conn.execute(_DELETE_QBR_SPRINTS, (name,))
+        conn.executemany(_INSERT_QBR_SPRINT, [
+            (name, i, str(s.get("name") or ""), str(s.get("start") or ""), str(s.get("end") or ""),
+             _num(s.get("holidays")), _num(s.get("days")))
+            for i, s in enumerate(record.get("sprints") or []) if isinstance(s, dict)
+        ])
+        touched.update(str(sp.get("name") or "") for sp in record.get("sprints") or [] if isinstance(sp, dict))
+        for sprint in touched:
+            conn.execute(_DELETE_SPRINT_DATES, (sprint,))
+            conn.execute(_REFRESH_SPRINT_DATES, (sprint,))
+        conn.execute(_DELETE_QBR_RESOURCES, (name,))
+        conn.executemany(_INSERT_QBR_RESOURCE, [
+            (name, i, str(r.get("name") or ""), str(r.get("role") or ""), str(r.get("tech") or ""))
+            for i, r in enumerate(record.get("resources") or []) if isinstance(r, dict)
+        ])
+        conn.execute(_DELETE_QBR_RESOURCE_SPRINTS, (name,))
+        conn.executemany(_INSERT_QBR_RESOURCE_SPRINT, [(name,) + r for r in capacity_query.qbr_rows(record)])
+
+    def _put_allocation(self, conn, sprint_name, keys):
+        conn.executemany(_INSERT_ALLOCATION, [(sprint_name, str(k)) for k in (keys or []) if k])
+
+    def save_sprint_capacity(self, record):
+        self._write(lambda conn: self._put_sprint(conn, record))
+
+    def get_sprint_names(self):
+        return [r[0] for r in self._conn().execute(_SPRINT_NAMES).fetchall()]
+
+    def get_sprint_capacity(self, name):
+        return self._record(_SPRINT_RECORD, name)
+
+    def save_qbr_capacity(self, record):
+        self._write(lambda conn: self._put_qbr(conn, record))
+
+    def get_qbr_names(self):
+        return [r[0] for r in self._conn().execute(_QBR_NAMES).fetchall()]
+
+    def get_qbr_capacity(self, name):
+        return self._record(_QBR_RECORD, name)
+
+    def save_sprint_allocation(self, sprint_name, keys):
+        # merging is an insert of the new keys only
+        self._write(lambda conn: self._put_allocation(conn, sprint_name, keys))
+
+    def get_sprint_allocation(self, sprint_name):
+        keys = [r[0] for r in self._conn().execute(_ALLOCATION_KEYS, (sprint_name,)).fetchall()]
+        return {"story_keys": keys} if keys else {}
+
+    def query_capacity(self, q):
+        # SQL version of capacity_query.run_query; same rows, same order
+        branches = []
+        params = []
+        for source in (("sprint", "qbr") if q["source"] == "all" else (q["source"],)):
+            sql, cols = _FACTS[source]
+            where = []
+            for key, col in (("names", "name"), ("roles", "role"), ("techs", "tech"), ("sprints", "sprint"), ("records", "record")):
+                if q[key]:
+                    where.append(f"{cols[col]} IN ({', '.join('?' * len(q[key]))})")
+                    params.extend(q[key])
+            if q["from"]:
+                where.append(f"{cols['start']} >= ?")
+                params.append(q["from"])
+            if q["to"]:
+                where.append(f"{cols['start']} <= ?")
+                params.append(q["to"])
+            branches.append(sql + (" WHERE " + " AND ".join(where) if where else ""))
+        sql = "WITH f AS (" + " UNION ALL ".join(branches) + ")"
+        cond = ""
+        if q["last"]:
+            cond = (" WHERE sprint IN (SELECT sprint FROM f GROUP BY sprint "
+                    "ORDER BY MAX(COALESCE(start, '')) DESC, MAX(COALESCE(saved, 0)) DESC, sprint DESC LIMIT ?)")
+            params.append(q["last"])
+        if q["detail"]:
+            sql += (" SELECT source, record, sprint, start, end, name, role, tech, leave, capacity, hours FROM f" + cond +
+                    " ORDER BY COALESCE(start, '') DESC, COALESCE(saved, 0) DESC, sprint DESC, name DESC LIMIT ?")
+            params.append(q["limit"])
+            cur = self._conn().execute(sql, params)
+            names = [d[0] for d in cur.description]
+            return [capacity_query.finish_row(dict(zip(names, r))) for r in cur.fetchall()]
+        cols = list(q["group_by"]) + ['COUNT(*) AS "rows"', 'COUNT(DISTINCT sprint) AS "sprints"']
+        for m in q["metrics"]:
+            for a in q["aggs"]:
+                cols.append(f"{a.upper()}({m}) AS {m}_{a}")
+        sql += " SELECT " + ", ".join(cols) + " FROM f" + cond
+        if q["group_by"]:
+            sql += " GROUP BY " + ", ".join(q["group_by"]) + " ORDER BY " + ", ".join(q["group_by"])
+        sql += " LIMIT ?"
+        params.append(q["limit"])
+        cur = self._conn().execute(sql, params)
+        names = [d[0] for d in cur.description]
+        # an ungrouped aggregate over nothing still yields one all-NULL row
+        return [capacity_query.finish_row(dict(zip(names, r))) for r in cur.fetchall() if r[names.index("rows")]]
+
+    def migrated(self):
+        row = self._conn().execute("SELECT v FROM meta WHERE k = 'migrated_json'").fetchone()
+        return bool(row)
+
+    def import_json(self, sprints, qbrs, allocations, force=False):
+        # One transaction: either everything from the JSON files lands or
+        # nothing. Returns None if another process migrated first.
+        def run(conn):
+            if not force and conn.execute("SELECT 1 FROM meta WHERE k = 'migrated_json'").fetchone():
+                return None
+            for rec in sprints.values():
+                if isinstance(rec, dict) and rec.get("sprint_name"):
+                    self._put_sprint(conn, rec)
+            for rec in qbrs.values():
+                if isinstance(rec, dict) and rec.get("qbr_name"):
+                    self._put_qbr(conn, rec)
+            for name, rec in allocations.items():
+                self._put_allocation(conn, name, (rec or {}).get("story_keys") or [])
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('migrated_json', ?)", (str(time.time()),))
+            return {"sprints": len(sprints), "qbrs": len(qbrs), "allocations": len(allocations)}
+        return self._write(run)
@@ -0,0 +1,76 @@
+import pytest
+
+import capacity_engine
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+@pytest.fixture(params=["numpy", "python"])
+def engine(request, monkeypatch):
+    if request.param == "numpy":
+        if numpy is None:
+            pytest.skip("numpy not installed")
+        monkeypatch.setattr(capacity_engine, "np", numpy)
+    else:
+        monkeypatch.setattr(capacity_engine, "np", None)
+    return capacity_engine
+
+RESOURCES = [
+    {"name": "Ana", "role": "Dev", "tech": "Py", "leave": 2},
+    {"name": "Bo", "role": "QA", "tech": "", "leave": "0.5"},
+    {"name": "Cy", "leave": 9},
+]
+
+def test_one_sprint(engine):
+    out = engine.compute_one({"sprint_days": 10, "haircut_percent": 10, "team_members": 3, "resources": RESOURCES})
+    assert out["summary"] == {
+        "total_sprint_days": 30.0,
+        "available_sprint_days": 18.5,
+        "available_capacity": 15.5,
+        "available_hours": 124.0,
+        "leave_days": 11.5,
+    }
+    assert [(r["name"], r["leave"], r["available_capacity"], r["available_hours"]) for r in out["resources"]] == [
+        ("Ana", 2.0, 7.0, 56.0),
+        ("Bo", 0.5, 8.5, 68.0),
+        ("Cy", 9.0, 0.0, 0.0),
+    ]
+    assert out["resources"][2]["role"] == ""
+
+def test_team_members_default_and_explicit_zero(engine):
+    base = {"sprint_days": 10, "haircut_percent": 0, "resources": RESOURCES}
+    assert engine.compute_one(base)["summary"]["total_sprint_days"] == 30.0
+    assert engine.compute_one(dict(base, team_members=""))["summary"]["total_sprint_days"] == 30.0
+    zero = engine.compute_one(dict(base, team_members=0))["summary"]
+    assert (zero["total_sprint_days"], zero["available_capacity"]) == (0.0, 0.0)
+    assert engine.compute_one(dict(base, team_members="5"))["summary"]["total_sprint_days"] == 50.0
+
+def test_legacy_keys_and_bad_numbers(engine):
+    out = engine.compute_one({"total_days": "5", "haircut": None, "resources": [{"name": "a", "leave": "n/a"}, {"leave": float("nan")}, "junk"]})
+    assert out["summary"]["total_sprint_days"] == 10.0
+    assert [r["available_capacity"] for r in out["resources"]] == [5.0, 5.0]
+
+def test_batch_matches_one_by_one(engine):
+    sprints = [
+        {"sprint_days": d, "haircut_percent": h, "team_members": t, "resources": RESOURCES[:n]}
+        for d, h, t, n in [(10, 10, 3, 3), (5, 0, None, 2), (0, 50, 2, 1), (8, 20, 4, 0)]
+    ]
+    for s in sprints:
+        if s["team_members"] is None:
+            del s["team_members"]
+    assert engine.compute(sprints) == [engine.compute_one(s) for s in sprints]
+
+def test_empty_input(engine):
+    assert engine.compute([]) == []
+    assert engine.compute(None) == []
+    assert engine.compute_one({})["resources"] == []
+
+@pytest.mark.skipif(numpy is None, reason="numpy not installed")
+def test_numpy_and_python_agree(monkeypatch):
+    sprints = [{"sprint_days": 7 + i, "haircut_percent": i * 3, "team_members": i % 4, "resources": RESOURCES[: i % 4]} for i in range(20)]
+    monkeypatch.setattr(capacity_engine, "np", numpy)
+    fast = capacity_engine.compute(sprints)
+    monkeypatch.setattr(capacity_engine, "np", None)
+    assert capacity_engine.compute(sprints) == fast
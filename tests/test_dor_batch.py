@@ -0,0 +1,88 @@
+import json
+import re
+
+import pytest
+
+from llm import dor_batch
+
+CFG = {"llm": {"api_key": "k", "model": "m", "dor_batch_size": 2}}
+
+def _items(prompt):
+    # (key, summary) pairs as _prompt laid them out
+    return re.findall(r"Item key: (\S+)\nStory Summary:\n(.*?)\n---", prompt)
+
+class _Llm:
+    # Stand-in for generate_content: summaries look like "s<score>", "bad" is
+    # scored out of range, and "skip" is left out of the answer.
+    def __init__(self, fail=None):
+        self.calls = []
+        self.fail = fail
+
+    def __call__(self, prompt, cfg, mime):
+        items = _items(prompt)
+        self.calls.append([s for _, s in items])
+        if self.fail is not None:
+            raise self.fail
+        out = []
+        for key, summary in items:
+            if summary == "skip":
+                continue
+            out.append({"key": key, "score": 500 if summary == "bad" else int(summary[1:]), "reason": "r " + summary})
+        return "```json\n" + json.dumps(out) + "\n```"
+
+def _single(summary, prompt, cfg):
+    return (1, "Fail", "single " + summary)
+
+def _heuristic(summary):
+    return (50, "Fail", "heuristic " + summary)
+
+def _score(summaries, llm, monkeypatch, **kw):
+    monkeypatch.setattr(dor_batch, "generate_content", llm)
+    return dor_batch.score_many(summaries, "Check it.", kw.pop("cfg", CFG), "Story", _single, _heuristic, max_workers=1, **kw)
+
+def test_chunks_respect_size_and_token_budget():
+    assert dor_batch._chunks(["a", "b", "c"], 1000, 2) == [[0, 1], [2]]
+    big = "x" * 400
+    assert dor_batch._chunks(["a", big, "b"], 50, 10) == [[0], [1], [2]]
+
+def test_answered_chunks_need_no_single_calls(monkeypatch):
+    llm = _Llm()
+    rows = _score(["s90", "s40", "s85"], llm, monkeypatch)
+    assert llm.calls == [["s90", "s40"], ["s85"]]
+    assert [(r["score"], r["status"]) for r in rows] == [(90, "Pass"), (40, "Fail"), (85, "Pass")]
+    assert rows[0]["reason"] == "r s90"
+
+def test_skipped_and_invalid_items_are_scored_singly(monkeypatch):
+    llm = _Llm()
+    rows = _score(["s90", "skip", "bad", "s70"], llm, monkeypatch)
+    assert [r["reason"] for r in rows] == ["r s90", "single skip", "single bad", "r s70"]
+    assert len(llm.calls) == 2
+
+def test_failed_chunk_gets_heuristic_without_more_calls(monkeypatch):
+    llm = _Llm(fail=RuntimeError("llm_network_error:timeout"))
+    rows = _score(["s90", "s40", "s85"], llm, monkeypatch)
+    assert len(llm.calls) == 2
+    assert [r["reason"] for r in rows] == ["heuristic s90", "heuristic s40", "heuristic s85"]
+    assert all("error" not in r for r in rows)
+
+def test_unparseable_answer_gets_heuristic(monkeypatch):
+    monkeypatch.setattr(dor_batch, "generate_content", lambda p, c, m: "I think they're fine")
+    rows = dor_batch.score_many(["s90", "s40"], "Check it.", CFG, "Story", _single, _heuristic, max_workers=1)
+    assert [r["score"] for r in rows] == [50, 50]
+
+def test_other_errors_are_reported_per_row(monkeypatch):
+    llm = _Llm(fail=RuntimeError("llm_cert_missing:no CA bundle"))
+    rows = _score(["s90", "s40"], llm, monkeypatch)
+    assert [r["status"] for r in rows] == ["Fail", "Fail"]
+    assert all(r["error"].startswith("llm_cert_missing") for r in rows)
+
+def test_batch_size_one_scores_singly(monkeypatch):
+    llm = _Llm()
+    rows = _score(["s90", "s40"], llm, monkeypatch, cfg={"llm": {"api_key": "k", "model": "m", "dor_batch_size": 1}})
+    assert llm.calls == []
+    assert [r["reason"] for r in rows] == ["single s90", "single s40"]
+
+def test_missing_llm_config_raises(monkeypatch):
+    with pytest.raises(ValueError):
+        _score(["s90"], _Llm(), monkeypatch, cfg={"llm": {}})
+    assert dor_batch.configured("", {})
@@ -0,0 +1,90 @@
+import json
+import os
+import time
+
+import pytest
+
+import firestore as fs
+
+NAME = "sprint_capacity.json"
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(fs, "_dir", lambda: str(tmp_path))
+    monkeypatch.setattr(fs, "_CACHE", {})
+    monkeypatch.setattr(fs, "_NAME_LOCKS", {})
+    monkeypatch.setattr(fs, "_COMPACTING", set())
+    monkeypatch.setattr(fs, "_BACKEND", fs.JsonBackend())
+    return tmp_path
+
+def _log_lines(store):
+    with open(store / (NAME + ".log")) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def test_saves_append_to_the_log(store):
+    fs.save_sprint_capacity({"sprint_name": "S2", "v": 1})
+    fs.save_sprint_capacity({"sprint_name": "S1", "v": 1})
+    fs.save_sprint_capacity({"sprint_name": "S2", "v": 2})
+    assert not (store / NAME).exists()
+    assert [op["k"] for op in _log_lines(store)] == ["S2", "S1", "S2"]
+    assert fs.get_sprint_names() == ["S1", "S2"]
+    assert fs.get_sprint_capacity("S2")["v"] == 2
+    assert fs.get_sprint_capacity("missing") == {}
+
+def test_reads_are_copies(store):
+    rec = {"sprint_name": "S1", "resources": [1]}
+    fs.save_sprint_capacity(rec)
+    rec["resources"].append(2)
+    got = fs.get_sprint_capacity("S1")
+    got["resources"].append(3)
+    assert fs.get_sprint_capacity("S1")["resources"] == [1]
+
+def test_log_replays_over_the_snapshot(store):
+    (store / NAME).write_text(json.dumps({"S1": {"v": "old"}, "S2": {"v": "kept"}}))
+    (store / (NAME + ".log")).write_text(json.dumps({"k": "S1", "v": {"v": "new"}}) + "\n")
+    assert fs.get_sprint_capacity("S1") == {"v": "new"}
+    assert fs.get_sprint_capacity("S2") == {"v": "kept"}
+
+def test_torn_line_does_not_swallow_the_next_record(store):
+    fs.save_sprint_capacity({"sprint_name": "S1"})
+    with open(store / (NAME + ".log"), "a") as f:
+        f.write('{"k": "S9", "v": {"sprint_na')
+    fs._CACHE.clear()
+    fs.save_sprint_capacity({"sprint_name": "S2"})
+    fs._CACHE.clear()
+    assert fs.get_sprint_names() == ["S1", "S2"]
+
+def test_other_process_writes_are_picked_up(store, monkeypatch):
+    monkeypatch.setattr(fs, "_CHECK_SECS", 0)
+    fs.save_sprint_capacity({"sprint_name": "S1"})
+    assert fs.get_sprint_names() == ["S1"]
+    with open(store / (NAME + ".log"), "a") as f:
+        f.write(json.dumps({"k": "S2", "v": {"sprint_name": "S2"}}) + "\n")
+    assert fs.get_sprint_names() == ["S1", "S2"]
+
+def test_compaction_folds_the_log_into_the_snapshot(store):
+    for i in range(3):
+        fs.save_sprint_capacity({"sprint_name": f"S{i}", "v": i})
+    fs._compact(NAME)
+    assert os.path.getsize(store / (NAME + ".log")) == 0
+    assert sorted(json.loads((store / NAME).read_text())) == ["S0", "S1", "S2"]
+    fs.save_sprint_capacity({"sprint_name": "S3"})
+    fs._CACHE.clear()
+    assert fs.get_sprint_names() == ["S0", "S1", "S2", "S3"]
+    assert fs.get_sprint_capacity("S1")["v"] == 1
+
+def test_large_log_is_compacted_in_the_background(store, monkeypatch):
+    monkeypatch.setattr(fs, "_COMPACT_BYTES", 200)
+    for i in range(10):
+        fs.save_sprint_capacity({"sprint_name": f"S{i}", "pad": "x" * 50})
+    deadline = time.monotonic() + 5
+    while (fs._COMPACTING or not (store / NAME).exists()) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(json.loads((store / NAME).read_text())) >= 3
+    fs._CACHE.clear()
+    assert len(fs.get_sprint_names()) == 10
+
+def test_sprint_allocations_merge(store):
+    fs.save_sprint_allocation("S1", ["B-2", "A-1"])
+    fs.save_sprint_allocation("S1", ["A-1", "C-3", None])
+    assert fs.get_sprint_allocation("S1") == {"story_keys": ["A-1", "B-2", "C-3"]}
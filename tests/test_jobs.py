@@ -0,0 +1,105 @@
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import jobs
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    st = jobs.JobStore(str(tmp_path / "jobs.sqlite3"))
+    ex = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(jobs, "_STORE", st)
+    monkeypatch.setattr(jobs, "_EXEC", ex)
+    monkeypatch.setattr(jobs, "_cfg", lambda: {})
+    yield st
+    ex.shutdown(wait=True)
+
+def _wait(job_id, statuses=("done", "failed", "cancelled", "interrupted")):
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        job = jobs.get(job_id)
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job stuck in {job['status']}")
+
+def _dead_pid():
+    p = subprocess.Popen([sys.executable, "-c", "pass"])
+    p.wait()
+    return p.pid
+
+def test_job_runs_in_chunks_and_reports_items(store):
+    seen = []
+
+    def work(part):
+        seen.append(list(part))
+        return [x * 2 for x in part]
+
+    job_id = jobs.submit("double", [1, 2, 3, 4, 5], work, lambda rs: ({"sum": sum(rs)}, 200), chunk=2)
+    job = _wait(job_id)
+    assert seen == [[1, 2], [3, 4], [5]]
+    assert job["status"] == "done"
+    assert (job["total"], job["done"]) == (5, 5)
+    assert job["result"] == {"sum": 30}
+    assert [it["result"] for it in job["items"]] == [2, 4, 6, 8, 10]
+    assert [it["index"] for it in jobs.get(job_id, since=3)["items"]] == [3, 4]
+
+def test_cancel_stops_between_chunks_and_still_finishes(store):
+    started = threading.Event()
+    release = threading.Event()
+
+    def work(part):
+        started.set()
+        release.wait(5)
+        return list(part)
+
+    job_id = jobs.submit("slow", [1, 2, 3], work, lambda rs: ({"results": rs}, 200))
+    assert started.wait(5)
+    assert jobs.cancel(job_id) == "running"
+    release.set()
+    job = _wait(job_id)
+    assert job["status"] == "cancelled"
+    assert job["cancel_requested"]
+    assert job["result"] == {"results": [1]}
+    assert jobs.cancel("no-such-job") is None
+
+def test_error_bodies_and_exceptions_fail_the_job(store):
+    job_id = jobs.submit("x", [1], lambda part: list(part), lambda rs: ({"error": "jira_http_error:500"}, 502))
+    job = _wait(job_id)
+    assert (job["status"], job["error"]) == ("failed", "jira_http_error:500")
+
+    def boom(part):
+        raise RuntimeError("llm_network_error:timeout")
+
+    job = _wait(jobs.submit("x", [1], boom))
+    assert (job["status"], job["error"]) == ("failed", "llm_network_error:timeout")
+
+def test_job_of_a_dead_worker_is_interrupted(store):
+    job_id = store.create("x", 3)
+    conn = store._conn()
+    try:
+        conn.execute("UPDATE jobs SET pid = ?, status = 'running' WHERE id = ?", (_dead_pid(), job_id))
+    finally:
+        conn.close()
+    job = store.get(job_id)
+    assert (job["status"], job["error"]) == ("interrupted", "worker_restarted")
+    # the row itself was updated, so a fresh store agrees
+    again = jobs.JobStore(store.path).get(job_id)
+    assert again["status"] == "interrupted"
+
+def test_prune_keeps_running_jobs(store):
+    old = store.create("x", 0)
+    store.finish(old, "done", {"ok": True})
+    live = store.create("x", 0)
+    store.prune(time.time() + 1)
+    assert store.get(old) is None
+    assert store.get(live)["status"] == "queued"
+
+def test_run_now_uses_the_same_contract():
+    body, code = jobs.run_now([1, 2, 3], lambda part: [x + 1 for x in part], lambda rs: ({"r": rs}, 201), chunk=2)
+    assert (body, code) == ({"r": [2, 3, 4]}, 201)
+    assert jobs.run_now([], lambda part: part) == ({"results": []}, 200)
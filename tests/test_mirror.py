@@ -0,0 +1,72 @@
+import pytest
+
+from jira.mirror import Mirror, compile_jql
+
+def _rows():
+    return [
+        {"key": "ABC-2", "issue_type": "Story", "status": "Done", "summary": "Login page", "description": "", "created": "2024-01-02"},
+        {"key": "ABC-10", "issue_type": "Story", "status": "To Do", "summary": "Logout", "description": "session end", "created": "2024-01-03"},
+        {"key": "ABC-3", "issue_type": "Bug", "status": "In Progress", "summary": "Crash", "assignee": "kim", "created": "2024-01-01"},
+    ]
+
+@pytest.fixture
+def mirror(tmp_path):
+    m = Mirror(str(tmp_path / "mirror.sqlite3"))
+    m.upsert("u|ABC", _rows())
+    m.upsert("u|XYZ", [{"key": "XYZ-1", "issue_type": "Story", "status": "Done"}])
+    return m
+
+def _keys(mirror, jql, project="ABC"):
+    where, params, order = compile_jql(jql, project)
+    return [r["key"] for r in mirror.query("u|" + project, where, params, order)]
+
+def test_project_clause_scopes_and_adds_no_filter():
+    assert compile_jql("project = ABC", "ABC") == ("1=1", [], "created DESC, key_num DESC")
+    assert compile_jql('project = "abc"', "ABC")[0] == "1=1"
+
+@pytest.mark.parametrize("jql", [
+    "",
+    "status = Done",
+    "project = XYZ",
+    "project != ABC",
+    "project in (ABC, XYZ)",
+    "project = ABC OR status = Done",
+    "project = ABC AND sprint in openSprints()",
+    "project = ABC AND assignee = currentUser()",
+    "project = ABC AND assignee = EMPTY",
+    "project = ABC AND labels = x",
+    "project = ABC AND summary ~ ",
+    "project = ABC AND status in ()",
+    "project = ABC ORDER BY rank",
+    "project = ABC ORDER status",
+    "project = ABC AND (status = Done)",
+])
+def test_unsupported_queries_go_to_jira(jql):
+    assert compile_jql(jql, "ABC") is None
+
+def test_key_clause_scopes_only_within_the_project():
+    assert compile_jql("key = ABC-1", "ABC") is not None
+    assert compile_jql("key in (ABC-1, XYZ-2)", "ABC") is None
+
+def test_equality_and_in(mirror):
+    assert _keys(mirror, "project = ABC AND status = done ORDER BY key") == ["ABC-2"]
+    assert _keys(mirror, 'project = ABC AND status in ("To Do", "In Progress") ORDER BY key') == ["ABC-3", "ABC-10"]
+
+def test_negations_keep_rows_with_empty_fields(mirror):
+    assert _keys(mirror, "project = ABC AND status != Done ORDER BY key") == ["ABC-3", "ABC-10"]
+    assert _keys(mirror, "project = ABC AND type not in (Bug) ORDER BY key") == ["ABC-2", "ABC-10"]
+    assert _keys(mirror, "project = ABC AND assignee != kim ORDER BY key") == ["ABC-2", "ABC-10"]
+
+def test_text_search(mirror):
+    assert _keys(mirror, 'project = ABC AND summary ~ "log*" ORDER BY key') == ["ABC-2", "ABC-10"]
+    assert _keys(mirror, 'project = ABC AND text ~ session') == ["ABC-10"]
+    assert _keys(mirror, 'project = ABC AND summary !~ log ORDER BY key') == ["ABC-3"]
+
+def test_order_by(mirror):
+    # keys sort numerically, not as text
+    assert _keys(mirror, "project = ABC ORDER BY key DESC") == ["ABC-10", "ABC-3", "ABC-2"]
+    assert _keys(mirror, "project = ABC ORDER BY issuetype, created DESC") == ["ABC-3", "ABC-10", "ABC-2"]
+    assert _keys(mirror, "project = ABC") == ["ABC-10", "ABC-2", "ABC-3"]
+
+def test_scopes_do_not_mix(mirror):
+    assert _keys(mirror, "project = XYZ AND status = Done", project="XYZ") == ["XYZ-1"]
@@ -0,0 +1,117 @@
+import io
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from urllib.error import HTTPError
+
+import pytest
+
+from jira.ratelimit import AimdGate, RateLimiter, TokenBucket, throttle_delay
+
+def _throttle(code, headers=None):
+    return HTTPError("http://jira/rest", code, "throttled", headers or {}, io.BytesIO(b""))
+
+def _failing(errors):
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+    return fn, calls
+
+def test_throttle_delay_reads_retry_after_seconds():
+    assert throttle_delay({"Retry-After": "7"}) == 7.0
+
+def test_throttle_delay_reads_retry_after_http_date():
+    when = datetime.now(timezone.utc) + timedelta(seconds=30)
+    assert 25 <= throttle_delay({"Retry-After": format_datetime(when, usegmt=True)}) <= 30
+
+def test_throttle_delay_reads_iso_reset_when_exhausted():
+    when = (datetime.now(timezone.utc) + timedelta(seconds=20)).isoformat().replace("+00:00", "Z")
+    assert 15 <= throttle_delay({"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": when}) <= 20
+
+def test_throttle_delay_past_reset_is_zero():
+    assert throttle_delay({"X-RateLimit-Reset": "2000-01-01T00:00:00Z"}) == 0.0
+
+def test_throttle_delay_without_hints_is_none():
+    assert throttle_delay({}) is None
+    assert throttle_delay(None) is None
+    assert throttle_delay({"Retry-After": "soon"}) is None
+    assert throttle_delay({"X-RateLimit-Remaining": "5"}) is None
+
+def test_token_bucket_allows_burst_then_waits_for_rate():
+    b = TokenBucket(rate=50, burst=3)
+    start = time.monotonic()
+    for _ in range(3):
+        b.acquire()
+    assert time.monotonic() - start < 0.05
+    b.acquire()
+    assert time.monotonic() - start >= 0.015
+
+def test_token_bucket_pause_blocks_until_deadline():
+    b = TokenBucket(rate=1000, burst=10)
+    b.pause(0.1)
+    start = time.monotonic()
+    b.acquire()
+    assert time.monotonic() - start >= 0.09
+
+def test_aimd_gate_halves_once_per_cooldown_and_grows_back():
+    g = AimdGate(initial=8, minimum=1, maximum=8, cooldown=60)
+    g.acquire()
+    g.release(throttled=True)
+    assert g.limit == 4
+    g.acquire()
+    g.release(throttled=True)
+    assert g.limit == 4
+    for _ in range(4):
+        g.acquire()
+        g.release()
+    assert 4.9 < g.limit < 5.1
+
+def test_limiter_retries_throttled_calls():
+    rl = RateLimiter(backoff_secs=0.01, max_backoff_secs=0.02)
+    fn, calls = _failing([_throttle(429), _throttle(503, {"Retry-After": "0"})])
+    assert rl.call("search", fn) == "ok"
+    assert len(calls) == 3
+
+def test_limiter_does_not_retry_other_errors():
+    rl = RateLimiter(backoff_secs=0.01)
+    fn, calls = _failing([_throttle(400)])
+    with pytest.raises(HTTPError):
+        rl.call("search", fn)
+    assert len(calls) == 1
+
+def test_limiter_retries_writes_on_429_only():
+    rl = RateLimiter(backoff_secs=0.01, max_backoff_secs=0.02)
+    fn, calls = _failing([_throttle(429)])
+    assert rl.call("write", fn, idempotent=False) == "ok"
+    assert len(calls) == 2
+    fn, calls = _failing([_throttle(503)])
+    with pytest.raises(HTTPError) as info:
+        rl.call("write", fn, idempotent=False)
+    assert info.value.code == 503
+    assert len(calls) == 1
+
+def test_limiter_gives_up_after_max_retries():
+    rl = RateLimiter(max_retries=2, backoff_secs=0.01, max_backoff_secs=0.02)
+    fn, calls = _failing([_throttle(429) for _ in range(5)])
+    with pytest.raises(HTTPError):
+        rl.call("search", fn)
+    assert len(calls) == 3
+
+def test_limiter_gives_up_when_advised_wait_is_too_long():
+    rl = RateLimiter(max_wait_secs=5)
+    fn, calls = _failing([_throttle(429, {"Retry-After": "600"})])
+    with pytest.raises(HTTPError):
+        rl.call("search", fn)
+    assert len(calls) == 1
+
+def test_limiter_shrinks_concurrency_on_throttle():
+    gate = AimdGate(initial=8, maximum=8, cooldown=0)
+    rl = RateLimiter(backoff_secs=0.01, max_backoff_secs=0.02, aimd=gate)
+    fn, _ = _failing([_throttle(429)])
+    rl.call("search", fn)
+    assert gate.limit < 8
+    assert gate._in_flight == 0
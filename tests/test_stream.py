@@ -0,0 +1,53 @@
+import pytest
+
+from llm.stream import JsonArrayStream
+
+def _feed_all(pieces):
+    s = JsonArrayStream()
+    out = []
+    for p in pieces:
+        out.extend(s.feed(p))
+    return out, s
+
+TEXT = '```json\n[{"title": "A [draft], \\"quoted\\"", "tags": ["x", "y"]},\n {"title": "B", "n": {"deep": [1, 2]}}, 3, "s,]"]\n```'
+EXPECTED = [{"title": 'A [draft], "quoted"', "tags": ["x", "y"]}, {"title": "B", "n": {"deep": [1, 2]}}, 3, "s,]"]
+
+def test_whole_text():
+    out, s = _feed_all([TEXT])
+    assert out == EXPECTED
+    assert s.done
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7])
+def test_any_split_gives_the_same_elements(size):
+    out, s = _feed_all([TEXT[i:i + size] for i in range(0, len(TEXT), size)])
+    assert out == EXPECTED
+    assert s.done
+
+def test_elements_are_returned_as_soon_as_they_close():
+    s = JsonArrayStream()
+    assert s.feed('[{"a": 1') == []
+    assert s.feed('}, {"b"') == [{"a": 1}]
+    assert s.feed(': 2}') == [{"b": 2}]
+    assert not s.done
+    assert s.feed(']') == []
+    assert s.done
+
+def test_wrapping_object_is_skipped():
+    out, _ = _feed_all(['{"features": [{"t": 1}, {"t": 2}]}'])
+    assert out == [{"t": 1}, {"t": 2}]
+
+def test_undecodable_elements_are_dropped():
+    out, _ = _feed_all(['[{"a": 1}, {oops}, , {"b": 2}]'])
+    assert out == [{"a": 1}, {"b": 2}]
+
+def test_text_after_the_array_is_ignored():
+    s = JsonArrayStream()
+    assert s.feed('[1] trailing [2]') == [1]
+    assert s.feed('[3]') == []
+
+def test_empty_and_unterminated_input():
+    assert _feed_all(["[]"])[0] == []
+    out, s = _feed_all(["no array here", None])
+    assert out == [] and not s.done
+    out, s = _feed_all(['[{"a": 1}, {"b": '])
+    assert out == [{"a": 1}] and not s.done
@@ -0,0 +1,120 @@
+import threading
+import urllib.request as _req
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.error import HTTPError, URLError
+
+import pytest
+
+import transport
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, code, body=b"", headers=None):
+        self.send_response(code)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.server.seen.append((self.command, self.path, self.client_address[1]))
+        if self.path == "/drop":
+            # looks reusable to the client, but the server hangs up right after
+            self._reply(200, b"dropped")
+            self.close_connection = True
+        elif self.path == "/missing":
+            self._reply(404, b"nope")
+        elif self.path == "/slow":
+            self.server.release.wait(5)
+            self._reply(200, b"late")
+        else:
+            self._reply(200, b"ok")
+
+    def do_POST(self):
+        n = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(n)
+        self.server.seen.append((self.command, self.path, self.client_address[1]))
+        self._reply(303, b"", {"Location": "/done"})
+
+@pytest.fixture
+def server():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    srv.daemon_threads = True
+    srv.seen = []
+    srv.release = threading.Event()
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield srv
+    srv.release.set()
+    srv.shutdown()
+    srv.server_close()
+
+def _url(srv, path):
+    return f"http://127.0.0.1:{srv.server_address[1]}{path}"
+
+def _get(pool, url, timeout=5):
+    resp = pool.urlopen(_req.Request(url), timeout=timeout)
+    with resp:
+        return resp.read()
+
+def test_connection_is_reused(server):
+    pool = transport.ConnectionPool()
+    assert _get(pool, _url(server, "/a")) == b"ok"
+    assert _get(pool, _url(server, "/b")) == b"ok"
+    assert server.seen[0][2] == server.seen[1][2]
+
+def test_stale_socket_is_retried_on_a_fresh_connection(server):
+    pool = transport.ConnectionPool()
+    assert _get(pool, _url(server, "/drop")) == b"dropped"
+    assert _get(pool, _url(server, "/after")) == b"ok"
+    assert [p for _, p, _ in server.seen] == ["/drop", "/after"]
+
+def test_see_other_turns_post_into_get(server):
+    pool = transport.ConnectionPool()
+    req = _req.Request(_url(server, "/create"), data=b"x=1", method="POST")
+    with pool.urlopen(req, timeout=5) as resp:
+        assert resp.read() == b"ok"
+        assert resp.geturl().endswith("/done")
+    assert [(m, p) for m, p, _ in server.seen] == [("POST", "/create"), ("GET", "/done")]
+
+def test_error_status_raises_http_error_with_body(server):
+    pool = transport.ConnectionPool()
+    with pytest.raises(HTTPError) as info:
+        _get(pool, _url(server, "/missing"))
+    assert info.value.code == 404
+    assert info.value.read() == b"nope"
+    # the error body was drained, so the connection went back to the pool
+    assert _get(pool, _url(server, "/a")) == b"ok"
+    assert server.seen[0][2] == server.seen[1][2]
+
+def test_timeout_is_wrapped_in_url_error(server):
+    pool = transport.ConnectionPool()
+    with pytest.raises(URLError) as info:
+        _get(pool, _url(server, "/slow"), timeout=0.3)
+    assert isinstance(info.value.reason, TimeoutError)
+
+def test_idle_connections_are_dropped_after_fork(server):
+    pool = transport.ConnectionPool()
+    _get(pool, _url(server, "/a"))
+    assert pool._idle
+    pool._pid = -1
+    assert pool._get(("http", "127.0.0.1", server.server_address[1])) is None
+    assert pool._idle == {}
+
+def test_configure_trims_idle_connections():
+    pool = transport.ConnectionPool(maxsize=3)
+    closed = []
+
+    class _Conn:
+        def close(self):
+            closed.append(self)
+
+    for _ in range(3):
+        pool._put(("http", "h", 80), _Conn())
+    pool.configure(maxsize=1)
+    assert len(pool._idle[("http", "h", 80)]) == 1
+    assert len(closed) == 2
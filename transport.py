@@ -0,0 +1,282 @@
+import io
+import os
+import ssl as _ssl
+import socket
+import threading
+import time
+import http.client
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlsplit, urljoin
+
+_CTX = None
+_CTX_LOCK = threading.Lock()
+
+def ssl_context():
+    global _CTX
+    if _CTX is not None:
+        return _CTX
+    with _CTX_LOCK:
+        if _CTX is None:
+            try:
+                import certifi
+                _CTX = _ssl.create_default_context(cafile=certifi.where())
+            except Exception:
+                try:
+                    _CTX = _ssl.create_default_context()
+                except Exception:
+                    _CTX = None
+    return _CTX
+
+class PooledResponse:
+    def __init__(self, pool, key, conn, resp, url):
+        self._pool = pool
+        self._key = key
+        self._conn = conn
+        self._resp = resp
+        self._done = False
+        self.url = url
+        self.status = resp.status
+        self.code = resp.status
+        self.reason = resp.reason
+        self.headers = resp.headers
+        self.msg = resp.headers
+
+    def read(self, amt=None):
+        if self._done:
+            return b""
+        try:
+            data = self._resp.read() if amt is None else self._resp.read(amt)
+        except Exception:
+            self._discard()
+            raise
+        if amt is None or self._resp.isclosed():
+            self._release()
+        return data
+
+    def readline(self, limit=-1):
+        if self._done:
+            return b""
+        try:
+            line = self._resp.readline(limit)
+        except Exception:
+            self._discard()
+            raise
+        if not line or self._resp.isclosed():
+            self._release()
+        return line
+
+    def __iter__(self):
+        while True:
+            line = self.readline()
+            if not line:
+                return
+            yield line
+
+    def getcode(self):
+        return self.status
+
+    def geturl(self):
+        return self.url
+
+    def info(self):
+        return self.headers
+
+    def getheader(self, name, default=None):
+        return self._resp.getheader(name, default)
+
+    def close(self):
+        if self._done:
+            return
+        if self._resp.isclosed():
+            self._release()
+        else:
+            self._discard()
+
+    def _release(self):
+        if self._done:
+            return
+        self._done = True
+        if self._resp.will_close:
+            self._pool._close(self._conn)
+        else:
+            self._pool._put(self._key, self._conn)
+
+    def _discard(self):
+        if self._done:
+            return
+        self._done = True
+        self._pool._close(self._conn)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+class ConnectionPool:
+    # Keep-alive connections per (scheme, host, port). Connections are checked
+    # out exclusively, so one pool can be shared by all gthread workers.
+    def __init__(self, maxsize=10, idle_secs=30, context=None):
+        self.maxsize = max(1, int(maxsize))
+        self.idle_secs = max(1, int(idle_secs))
+        self._context = context
+        self._idle = {}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def configure(self, maxsize=None, idle_secs=None):
+        with self._lock:
+            if maxsize is not None:
+                self.maxsize = max(1, int(maxsize))
+            if idle_secs is not None:
+                self.idle_secs = max(1, int(idle_secs))
+            for key in list(self._idle.keys()):
+                stack = self._idle[key]
+                while len(stack) > self.maxsize:
+                    conn, _ = stack.pop(0)
+                    self._close(conn)
+
+    def _ctx(self):
+        return self._context if self._context is not None else ssl_context()
+
+    def _new(self, key, timeout):
+        scheme, host, port = key
+        if scheme == "https":
+            ctx = self._ctx()
+            if ctx is not None:
+                return http.client.HTTPSConnection(host, port, timeout=timeout, context=ctx)
+            return http.client.HTTPSConnection(host, port, timeout=timeout)
+        return http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def _check_fork(self):
+        # gunicorn forks workers; never share sockets across processes
+        pid = os.getpid()
+        if pid != self._pid:
+            self._idle = {}
+            self._lock = threading.Lock()
+            self._pid = pid
+
+    def _get(self, key):
+        self._check_fork()
+        now = time.monotonic()
+        with self._lock:
+            self._reap_locked(now)
+            stack = self._idle.get(key) or []
+            if stack:
+                conn, _ = stack.pop()
+                return conn
+        return None
+
+    def _put(self, key, conn):
+        self._check_fork()
+        now = time.monotonic()
+        with self._lock:
+            stack = self._idle.setdefault(key, [])
+            if len(stack) >= self.maxsize:
+                self._close(conn)
+                return
+            stack.append((conn, now))
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _reap_locked(self, now):
+        for key in list(self._idle.keys()):
+            keep = []
+            for conn, last in self._idle[key]:
+                if now - last > self.idle_secs:
+                    self._close(conn)
+                else:
+                    keep.append((conn, last))
+            if keep:
+                self._idle[key] = keep
+            else:
+                del self._idle[key]
+
+    def reap(self):
+        with self._lock:
+            self._reap_locked(time.monotonic())
+
+    def clear(self):
+        with self._lock:
+            for stack in self._idle.values():
+                for conn, _ in stack:
+                    self._close(conn)
+            self._idle = {}
+
+    def urlopen(self, req, timeout=30):
+        url = req.full_url
+        method = req.get_method()
+        body = req.data
+        headers = dict(req.header_items())
+        for _ in range(6):
+            resp = self._send(url, method, body, headers, timeout)
+            if resp.status in (301, 302, 303, 307, 308) and resp.getheader("Location"):
+                loc = urljoin(url, resp.getheader("Location"))
+                resp.read()
+                resp.close()
+                if resp.status == 303 or (resp.status in (301, 302) and method == "POST"):
+                    method = "GET"
+                    body = None
+                    headers = {k: v for k, v in headers.items() if k.lower() not in ("content-type", "content-length")}
+                url = loc
+                continue
+            if resp.status >= 400:
+                try:
+                    data = resp.read()
+                finally:
+                    resp.close()
+                raise HTTPError(url, resp.status, resp.reason, resp.headers, io.BytesIO(data))
+            return resp
+        raise HTTPError(url, resp.status, "redirect loop", resp.headers, io.BytesIO(b""))
+
+    def _send(self, url, method, body, headers, timeout):
+        parts = urlsplit(url)
+        scheme = (parts.scheme or "http").lower()
+        port = parts.port or (443 if scheme == "https" else 80)
+        key = (scheme, parts.hostname or "", port)
+        selector = parts.path or "/"
+        if parts.query:
+            selector += "?" + parts.query
+        hdrs = {"User-Agent": "agile-tool", "Connection": "keep-alive"}
+        hdrs.update(headers or {})
+        if body is not None and not any(k.lower() == "content-type" for k in hdrs):
+            hdrs["Content-Type"] = "application/x-www-form-urlencoded"
+        conn = self._get(key)
+        reused = conn is not None
+        while True:
+            if conn is None:
+                conn = self._new(key, timeout)
+            else:
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    try:
+                        conn.sock.settimeout(timeout)
+                    except Exception:
+                        pass
+            try:
+                conn.request(method, selector, body=body, headers=hdrs)
+                resp = conn.getresponse()
+                return PooledResponse(self, key, conn, resp, url)
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError, http.client.CannotSendRequest, http.client.BadStatusLine):
+                # stale keep-alive socket closed by the server; retry once on a fresh one
+                self._close(conn)
+                conn = None
+                if reused:
+                    reused = False
+                    continue
+                raise URLError("connection closed by remote host")
+            except (socket.timeout, TimeoutError) as e:
+                # surface like urllib does, so callers' URLError handlers see it
+                self._close(conn)
+                raise URLError(e)
+            except _ssl.SSLError as e:
+                self._close(conn)
+                raise URLError(e)
+            except OSError as e:
+                self._close(conn)
+                raise URLError(e)
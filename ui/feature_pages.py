@@ -54,8 +54,8 @@ class FeatureCreatePage(ttk.Frame):
         if not self.generated:
             messagebox.showinfo("Info", "Generate features first")
             return
-        created = [jira.create_issue(f) for f in self.generated]
-        keys = ", ".join(x["key"] for x in created)
+        created = jira.create_issues_bulk(self.generated)
+        keys = ", ".join(x["key"] for x in created if x.get("key"))
         messagebox.showinfo("JIRA", f"Created: {keys}")
 
 class FeatureUploadPage(ttk.Frame):
@@ -133,8 +133,8 @@ class FeatureUploadPage(ttk.Frame):
         if not self.generated:
             messagebox.showinfo("Info", "Generate features first")
             return
-        created = [jira.create_issue(f) for f in self.generated]
-        keys = ", ".join(x["key"] for x in created)
+        created = jira.create_issues_bulk(self.generated)
+        keys = ", ".join(x["key"] for x in created if x.get("key"))
         messagebox.showinfo("JIRA", f"Created: {keys}")
 
 class FeatureFromJiraPage(ttk.Frame):
@@ -188,8 +188,8 @@ class FeatureFromJiraPage(ttk.Frame):
     def create_jira(self):
         if not self.generated:
             return
-        created = [jira.create_issue(f) for f in self.generated]
-        keys = ", ".join(x["key"] for x in created)
+        created = jira.create_issues_bulk(self.generated)
+        keys = ", ".join(x["key"] for x in created if x.get("key"))
         messagebox.showinfo("JIRA", f"Created: {keys}")
 
 class FeatureDorPage(ttk.Frame):
@@ -223,11 +223,16 @@ class FeatureDorPage(ttk.Frame):
             self.gridv.insert("", "end", values=(r.get("key",""), r.get("summary",""), "", "", ""))
 
     def check_dor(self):
-        for iid in self.gridv.get_children():
+        iids = list(self.gridv.get_children())
+        summaries = [self.gridv.item(iid, "values")[1] for iid in iids]
+        try:
+            scored = feature_dor.score_many(summaries, self.prompts.get("feature_dor_prompt", ""))
+        except Exception as e:
+            messagebox.showerror("Error", str(e))
+            return
+        for iid, r in zip(iids, scored):
             vals = list(self.gridv.item(iid, "values"))
-            summary = vals[1]
-            score, status, reason = feature_dor.score(summary, self.prompts.get("feature_dor_prompt", ""))
-            vals[2] = score
-            vals[3] = status
-            vals[4] = reason
+            vals[2] = r["score"]
+            vals[3] = r["status"]
+            vals[4] = r.get("error") or r["reason"]
             self.gridv.item(iid, values=tuple(vals))
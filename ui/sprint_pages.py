@@ -2,6 +2,7 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from ui.widgets import EditableTree
 import firestore
+import capacity_engine
 
 class SprintCapacityPage(ttk.Frame):
     def __init__(self, master):
@@ -53,36 +54,18 @@ class SprintCapacityPage(ttk.Frame):
             self.res.insert("", "end", values=("", "DEV", "", "0"))
 
     def _calc(self):
-        try:
-            total = float(self.total_days.get())
-        except Exception:
-            total = 0.0
-        try:
-            hc = float(self.haircut.get())
-        except Exception:
-            hc = 0.0
-        hcd = (hc / 100.0) * total
-        leaves_total = 0.0
-        for iid in self.res.get_children():
-            vals = self.res.item(iid, "values")
-            try:
-                leaves_total += float(vals[3])
-            except Exception:
-                pass
-        avail_days = max(0.0, total - (hcd + leaves_total))
-        avail_hours = avail_days * 8.0
+        rows = [self.res.item(iid, "values") for iid in self.res.get_children()]
+        out = capacity_engine.compute_one({
+            "sprint_days": self.total_days.get(),
+            "haircut_percent": self.haircut.get(),
+            "resources": [{"name": v[0], "role": v[1], "tech": v[2], "leave": v[3]} for v in rows],
+        })
         for i in self.out.get_children():
             self.out.delete(i)
-        for iid in self.res.get_children():
-            name, role, tech, leave = self.res.item(iid, "values")
-            try:
-                ld = float(leave)
-            except Exception:
-                ld = 0.0
-            r_days = max(0.0, total - (hcd + ld))
-            r_hours = r_days * 8.0
-            self.out.insert("", "end", values=(name, role, tech, f"{r_days:.2f}", f"{r_hours:.2f}", f"{ld:.2f}"))
-        self.sum_var.set(f"Capacity Days: {avail_days:.2f} | Hours: {avail_hours:.2f} | Leaves: {leaves_total:.2f}")
+        for r in out["resources"]:
+            self.out.insert("", "end", values=(r["name"], r["role"], r["tech"], f"{r['available_capacity']:.2f}", f"{r['available_hours']:.2f}", f"{r['leave']:.2f}"))
+        s = out["summary"]
+        self.sum_var.set(f"Capacity Days: {s['available_capacity']:.2f} | Hours: {s['available_hours']:.2f} | Leaves: {s['leave_days']:.2f}")
 
     def _save(self):
         record = {
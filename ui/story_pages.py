@@ -55,8 +55,8 @@ class StoryCreatePage(ttk.Frame):
     def create_jira(self):
         if not self.generated:
             return
-        created = [jira.create_issue(s) for s in self.generated]
-        keys = ", ".join(x["key"] for x in created)
+        created = jira.create_issues_bulk(self.generated)
+        keys = ", ".join(x["key"] for x in created if x.get("key"))
         messagebox.showinfo("JIRA", f"Created: {keys}")
 
 class StoryDorPage(ttk.Frame):
@@ -87,11 +87,16 @@ class StoryDorPage(ttk.Frame):
             self.gridv.insert("", "end", values=(r.get("key",""), r.get("summary",""), "", "", ""))
 
     def check_dor(self):
-        for iid in self.gridv.get_children():
+        iids = list(self.gridv.get_children())
+        summaries = [self.gridv.item(iid, "values")[1] for iid in iids]
+        try:
+            scored = story_dor.score_many(summaries, load_prompts().get("story_dor_prompt", ""))
+        except Exception as e:
+            messagebox.showerror("Error", str(e))
+            return
+        for iid, r in zip(iids, scored):
             vals = list(self.gridv.item(iid, "values"))
-            summary = vals[1]
-            score, status, reason = story_dor.score(summary, load_prompts().get("story_dor_prompt", ""))
-            vals[2] = score
-            vals[3] = status
-            vals[4] = reason
+            vals[2] = r["score"]
+            vals[3] = r["status"]
+            vals[4] = r.get("error") or r["reason"]
             self.gridv.item(iid, values=tuple(vals))
@@ -1,11 +1,13 @@
-from flask import Flask, render_template, request, redirect, url_for, flash
+from flask import Flask, render_template, request, redirect, url_for, flash, Response, stream_with_context
 import os, sys, logging
 import json as _json
+from concurrent.futures import ThreadPoolExecutor
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from prompt import load_prompts
 from config import load_config
-from llm import feature_creation, feature_dor, story_creation, story_dor, request_features, request_stories, nlp_to_jql
+from llm import feature_creation, feature_dor, story_creation, story_dor, dor_batch, request_features, request_stories, stream_features, stream_stories, nlp_to_jql, invalidate_models, run_batch, batch_workers
 import jira
+import jobs
 from flask import jsonify
 
 app = Flask(__name__)
@@ -41,6 +43,83 @@ def features_create():
             generated = feats
     return render_template("features_create.html", text=text, features=generated)
 
+def _feature_row(f):
+    return {
+        "title": f.get("Title", ""),
+        "description": f.get("Summary", ""),
+        "acceptance": "\n".join(f.get("Acceptance Criteria", [])) if isinstance(f.get("Acceptance Criteria"), list) else f.get("Acceptance Criteria", ""),
+        "benefit": f.get("Benefit Hypothesis", ""),
+        "size": f.get("T-Shirt Size", ""),
+        "priority": f.get("Priority", ""),
+        "businessValue": f.get("Business Value", 0),
+        "dueDate": f.get("duedate", ""),
+        "issue_type": "Feature",
+    }
+
+def _story_row(st, feature_key, engine):
+    return {
+        "Feature Key": feature_key,
+        "Title": st.get("Title", "Story"),
+        "Description": st.get("Summary", st.get("Description", "")),
+        "Acceptance Criteria": "\n".join(st.get("Acceptance Criteria", [])) if isinstance(st.get("Acceptance Criteria"), list) else st.get("Acceptance Criteria", ""),
+        "Story Point": st.get("Story Point", 3),
+        "Issue_type": st.get("Issue_type", "story"),
+        "Subtasks": st.get("Tasks", []),
+        "Summary": st.get("Summary", ""),
+        "Priority": st.get("Priority", "Medium"),
+        "Tasks": st.get("Tasks", []),
+        "Engine": engine,
+    }
+
+def _story_error(err):
+    # (fall back to the heuristic?, message for the user) for a failed story call
+    msg = str(err)
+    if isinstance(err, ValueError):
+        return msg == "llm_not_configured", "Invalid request"
+    if msg.startswith("llm_http_error:"):
+        raw = msg.replace("llm_http_error:", "").strip()
+        code = None; status = None; message = raw
+        obj = None
+        try:
+            obj = _json.loads(raw)
+        except Exception:
+            obj = None
+        try:
+            e = (obj or {}).get("error") or obj or {}
+            code = e.get("code")
+            status = (e.get("status") or "").upper()
+            message = e.get("message") or raw
+        except Exception:
+            pass
+        fallback = code == 429 or status == "RESOURCE_EXHAUSTED" or ("quota" in str(message).lower())
+        return fallback, "LLM request failed: " + str(message)
+    if msg.startswith("llm_network_error:"):
+        return True, msg
+    if msg.startswith("llm_cert_missing:"):
+        return False, msg.replace("llm_cert_missing:", "LLM TLS error: ")
+    return False, "LLM request failed"
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {_json.dumps(data)}\n\n"
+
+def _sse_response(gen):
+    return Response(stream_with_context(gen), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def _wants_job():
+    data = request.get_json(force=True, silent=True) or {}
+    v = request.args.get("async", data.get("async"))
+    return str(v).strip().lower() in ("1", "true", "yes")
+
+def _run_batch_request(kind, items, work, finish, chunk):
+    # Run a batch inline, or as a background job when the request asks for
+    # "async": true; the job answers 202 with its id, poll /api/jobs/<id>.
+    if _wants_job():
+        job_id = jobs.submit(kind, items, work, finish, chunk)
+        return jsonify({"job_id": job_id, "status_url": url_for("api_job_status", job_id=job_id)}), 202
+    body, code = jobs.run_now(items, work, finish)
+    return jsonify(body), code
+
 @app.route("/api/features/generate", methods=["POST"])
 def api_features_generate():
     data = request.get_json(force=True, silent=True) or {}
@@ -72,21 +151,51 @@ def api_features_generate():
         if msg.startswith("llm_cert_missing:"):
             return jsonify({"error": msg.replace("llm_cert_missing:", "LLM TLS error: ")}), 502
         return jsonify({"error": "LLM request failed"}), 502
-    rows = []
-    for f in feats:
-        rows.append({
-            "title": f.get("Title", ""),
-            "description": f.get("Summary", ""),
-            "acceptance": "\n".join(f.get("Acceptance Criteria", [])) if isinstance(f.get("Acceptance Criteria"), list) else f.get("Acceptance Criteria", ""),
-            "benefit": f.get("Benefit Hypothesis", ""),
-            "size": f.get("T-Shirt Size", ""),
-            "priority": f.get("Priority", ""),
-            "businessValue": f.get("Business Value", 0),
-            "dueDate": f.get("duedate", ""),
-            "issue_type": "Feature",
-        })
+    rows = [_feature_row(f) for f in feats]
     return jsonify({"rows": rows})
 
+@app.route("/api/features/generate_stream", methods=["POST"])
+def api_features_generate_stream():
+    # Same request as /api/features/generate, answered as server-sent events:
+    # one "row" event per Feature as soon as the model has written it, then
+    # "done" (or "error" if nothing could be generated).
+    data = request.get_json(force=True, silent=True) or {}
+    text = (data.get("requirement") or "").strip()
+    if len(text) == 0:
+        return jsonify({"error": "Enter requirement"}), 400
+    if len(text) > 500:
+        return jsonify({"error": "Enter details in no more than 500 characters"}), 400
+    prompts = load_prompts()
+    prompt_text = (prompts.get("feature_prompt", "") or "").strip()
+    if len(prompt_text) == 0:
+        return jsonify({"error": "No prompt defined"}), 400
+    cfg = load_config()
+    llm_cfg = cfg.get("llm", {})
+    if not str(llm_cfg.get("api_key", "")).strip() or not str(llm_cfg.get("model", "")).strip():
+        return jsonify({"error": "LLM not configured"}), 400
+    logger.info("FeatureCreateStream: prompt=%r requirement=%r", prompt_text, text)
+
+    def gen():
+        count = 0
+        try:
+            for f in stream_features(text, prompt_text, cfg):
+                count += 1
+                yield _sse("row", _feature_row(f))
+        except ValueError:
+            yield _sse("error", {"error": "Invalid request", "count": count})
+            return
+        except Exception as e:
+            msg = str(e)
+            if msg == "llm_empty_output":
+                msg = "The AI returned no features. Please retry."
+            else:
+                msg = _llm_error_message(msg)
+            yield _sse("error", {"error": msg, "count": count})
+            return
+        yield _sse("done", {"count": count})
+
+    return _sse_response(gen())
+
 @app.route("/features/upload")
 def features_upload():
     return render_template("features_upload.html")
@@ -148,6 +257,30 @@ def api_features_upload():
         return jsonify({"error": "Failed to parse file"}), 400
     return jsonify({"columns": cols, "rows": rows})
 
+def _llm_error_message(msg):
+    if msg.startswith("llm_http_error:"):
+        raw = msg.replace("llm_http_error:", "").strip()
+        user_msg = "The AI provider returned an error. Please try again later."
+        try:
+            obj = _json.loads(raw)
+            e = obj.get("error") or obj
+            code = e.get("code")
+            status = (e.get("status") or "").upper()
+            if code == 429:
+                user_msg = "Too many requests to the AI service. Please retry in a moment."
+            elif code == 503 or status == "UNAVAILABLE":
+                user_msg = "The AI model is currently overloaded. Please try again shortly."
+            elif code == 404 or status == "NOT_FOUND":
+                user_msg = "The AI model is not found or unsupported. Please verify the model and API version."
+        except Exception:
+            pass
+        return user_msg
+    if msg.startswith("llm_network_error:"):
+        return "A network error occurred contacting the AI service. Please retry in a moment."
+    if msg.startswith("llm_cert_missing:"):
+        return "A secure connection issue occurred with the AI provider. Please try again later."
+    return "The AI request failed. Please retry in a moment."
+
 @app.route("/api/features/generate_batch", methods=["POST"])
 def api_features_generate_batch():
     data = request.get_json(force=True, silent=True) or {}
@@ -160,52 +293,47 @@ def api_features_generate_batch():
         return jsonify({"error": "No prompt defined"}), 400
     logger.info("FeatureUploadBatch: prompt=%r count=%d", prompt_text, len(reqs))
     cfg = load_config()
-    rows = []
-    for text in reqs:
-        t = (text or "").strip()
-        if not t: continue
-        try:
-            feats = request_features(t, prompt_text, cfg)
-        except RuntimeError as re_err:
-            msg = str(re_err)
-            if msg.startswith("llm_http_error:"):
-                raw = msg.replace("llm_http_error:", "").strip()
-                user_msg = "The AI provider returned an error. Please try again later."
-                try:
-                    obj = _json.loads(raw)
-                    e = obj.get("error") or obj
-                    code = e.get("code")
-                    status = (e.get("status") or "").upper()
-                    message = e.get("message") or str(e)
-                    if code == 429:
-                        user_msg = "Too many requests to the AI service. Please retry in a moment."
-                    elif code == 503 or status == "UNAVAILABLE":
-                        user_msg = "The AI model is currently overloaded. Please try again shortly."
-                    elif code == 404 or status == "NOT_FOUND":
-                        user_msg = "The AI model is not found or unsupported. Please verify the model and API version."
-                except Exception:
-                    pass
-                return jsonify({"error": user_msg}), 502
-            if msg.startswith("llm_network_error:"):
-                return jsonify({"error": "A network error occurred contacting the AI service. Please retry in a moment."}), 502
-            if msg.startswith("llm_cert_missing:"):
-                return jsonify({"error": "A secure connection issue occurred with the AI provider. Please try again later."}), 502
-            return jsonify({"error": "The AI request failed. Please retry in a moment."}), 502
-        except ValueError as ve:
-            return jsonify({"error": "Invalid request"}), 400
-        for f in feats:
-            rows.append({
-                "title": f.get("Title", ""),
-                "description": f.get("Summary", ""),
-                "acceptance": "\n".join(f.get("Acceptance Criteria", [])) if isinstance(f.get("Acceptance Criteria"), list) else f.get("Acceptance Criteria", ""),
-                "benefit": f.get("Benefit Hypothesis", ""),
-                "size": f.get("T-Shirt Size", ""),
-                "priority": f.get("Priority", ""),
-                "businessValue": f.get("Business Value", 0),
-                "dueDate": f.get("duedate", ""),
-                "issue_type": "Feature",
-            })
-    return jsonify({"rows": rows})
+    texts = [(text or "").strip() for text in reqs]
+
+    def work(chunk):
+        todo = [t for t in chunk if t]
+        outcomes = iter(run_batch(todo, lambda t: request_features(t, prompt_text, cfg), max_workers=batch_workers(cfg)))
+        out = []
+        for t in chunk:
+            if not t:
+                out.append({"status": "skipped", "count": 0})
+                continue
+            res = next(outcomes)
+            if not res["ok"]:
+                err = res["error"]
+                if isinstance(err, ValueError):
+                    user_msg, code = "Invalid request", 400
+                else:
+                    user_msg, code = _llm_error_message(str(err)), 502
+                out.append({"status": "error", "count": 0, "error": user_msg, "code": code})
+                continue
+            feats = res["value"]
+            out.append({"status": "ok", "count": len(feats), "rows": [_feature_row(f) for f in feats]})
+        return out
+
+    def finish(items):
+        rows = []
+        results = []
+        first_error = None
+        for i, r in enumerate(items):
+            rows.extend(r.get("rows") or [])
+            entry = {"index": i, "status": r["status"], "count": r["count"]}
+            if r["status"] == "error":
+                entry["error"] = r["error"]
+                if first_error is None:
+                    first_error = (r["error"], r["code"])
+            results.append(entry)
+        # nothing usable: keep the old single-error response so the pages show why
+        if first_error is not None and not any(r["status"] == "ok" for r in results):
+            return {"error": first_error[0], "results": results}, first_error[1]
+        return {"rows": rows, "results": results}, 200
+
+    return _run_batch_request("features_generate", texts, work, finish, batch_workers(cfg))
 
 @app.route("/features/create_jira", methods=["POST"])
 def features_create_jira():
@@ -219,12 +347,16 @@ def features_create_jira():
         items = []
     created = []
     errors = []
-    for f in items:
-        try:
-            resp = jira.create_issue(f)
+    try:
+        results = jira.create_issues_bulk(items) if items else []
+    except Exception as e:
+        results = []
+        errors.append(str(e))
+    for resp in results:
+        if resp.get("key"):
             created.append(resp.get("key", ""))
-        except Exception as e:
-            errors.append(str(e))
+        if resp.get("error"):
+            errors.append(resp.get("error"))
     msg = ""
     if created:
         msg += f"{', '.join([k for k in created if k])} Created"
@@ -248,6 +380,62 @@ def features_dor_check():
             results.append({"summary": s, "score": sc, "status": st, "reason": rs})
     return render_template("features_dor.html", entries=entries, results=results)
 
+def _dor_error_message(msg):
+    if msg.startswith("llm_http_error:"):
+        raw = msg.replace("llm_http_error:", "").strip()
+        message = raw
+        try:
+            obj = _json.loads(raw)
+            e = obj.get("error") or obj
+            code = e.get("code")
+            status = (e.get("status") or "").upper()
+            message = e.get("message") or str(e)
+            if code == 429:
+                user_msg = "Too many requests to the AI service. Please retry in a moment."
+            elif code == 503 or status == "UNAVAILABLE":
+                user_msg = "The AI model is currently overloaded. Please try again shortly."
+            elif code == 404 or status == "NOT_FOUND":
+                user_msg = "The AI model is not found or unsupported for this method. Please verify the model and API version."
+            else:
+                user_msg = "The AI request failed. Please retry in a moment."
+        except Exception:
+            user_msg = "The AI request failed. Please retry in a moment."
+        return f"{user_msg} Details: {message}"
+    if msg.startswith("llm_network_error:"):
+        return "A network error occurred contacting the AI service. Please retry in a moment."
+    if msg.startswith("llm_cert_missing:"):
+        return "A secure connection issue occurred with the AI provider. Please try again later."
+    return "DOR check failed"
+
+def _dor_batch_request(kind, items, module, prompt_text):
+    # items are (key, summary, text) tuples scored with module.score_many,
+    # inline or as a background job (see _run_batch_request)
+    cfg = load_config()
+    if not dor_batch.configured(prompt_text, cfg):
+        return jsonify({"error": "LLM not configured"}), 400
+    try:
+        size = max(1, int(cfg.get("llm", {}).get("dor_batch_size", 10)))
+    except Exception:
+        size = 10
+
+    def work(chunk):
+        scored = module.score_many([b[2] for b in chunk], prompt_text, cfg)
+        out = []
+        for (key, summary, _), r in zip(chunk, scored):
+            row = {"key": key, "summary": summary, "score": r["score"], "status": r["status"], "reason": r["reason"]}
+            if r.get("error"):
+                row["error"] = _dor_error_message(r["error"])
+            out.append(row)
+        return out
+
+    def finish(out):
+        # every row failed on the AI side: report it like a single failed request
+        if out and all(r.get("error") for r in out) and any(r.get("error") != "DOR check failed" for r in out):
+            return {"error": out[0]["error"], "rows": out}, 502
+        return {"rows": out}, 200
+
+    return _run_batch_request(kind, items, work, finish, size * batch_workers(cfg))
+
 @app.route("/api/features/dor_check", methods=["POST"])
 def api_features_dor_check():
     data = request.get_json(force=True, silent=True) or {}
@@ -268,7 +456,7 @@ def api_features_dor_check():
             jir_rows = []
     # Fall back to client items if search failed
     source_rows = jir_rows if jir_rows else items
-    out = []
+    batch = []
     for it in source_rows:
         key = (it.get("key") or "").strip()
         summary = (it.get("summary") or "").strip()
@@ -293,42 +481,8 @@ def api_features_dor_check():
         _add("Reporter", it.get("reporter"))
         _add("Due Date", it.get("dueDate"))
         text = "\n".join(parts) if parts else summary
-        try:
-            sc, st, rs = feature_dor.score(text, prompt_text)
-        except ValueError as ve:
-            if str(ve) == "llm_not_configured":
-                return jsonify({"error": "LLM not configured"}), 400
-            sc, st, rs = 0, "Fail", "DOR check failed"
-        except RuntimeError as re_err:
-            msg = str(re_err)
-            if msg.startswith("llm_http_error:"):
-                raw = msg.replace("llm_http_error:", "").strip()
-                user_msg = "The AI provider returned an error. Please try again later."
-                code = None; status = None; message = raw
-                try:
-                    obj = _json.loads(raw)
-                    e = obj.get("error") or obj
-                    code = e.get("code")
-                    status = (e.get("status") or "").upper()
-                    message = e.get("message") or str(e)
-                    if code == 429:
-                        user_msg = "Too many requests to the AI service. Please retry in a moment."
-                    elif code == 503 or status == "UNAVAILABLE":
-                        user_msg = "The AI model is currently overloaded. Please try again shortly."
-                    elif code == 404 or status == "NOT_FOUND":
-                        user_msg = "The AI model is not found or unsupported for this method. Please verify the model and API version."
-                    else:
-                        user_msg = "The AI request failed. Please retry in a moment."
-                except Exception:
-                    user_msg = "The AI request failed. Please retry in a moment."
-                return jsonify({"error": f"{user_msg} Details: {message}"}), 502
-            if msg.startswith("llm_network_error:"):
-                return jsonify({"error": "A network error occurred contacting the AI service. Please retry in a moment."}), 502
-            if msg.startswith("llm_cert_missing:"):
-                return jsonify({"error": "A secure connection issue occurred with the AI provider. Please try again later."}), 502
-            sc, st, rs = 0, "Fail", "DOR check failed"
-        out.append({"key": key, "summary": summary, "score": sc, "status": st, "reason": rs})
-    return jsonify({"rows": out})
+        batch.append((key, summary, text))
+    return _dor_batch_request("features_dor", batch, feature_dor, prompt_text)
 
 @app.route("/api/features/jira_update_dor_flag", methods=["POST"])
 def api_features_jira_update_dor_flag():
@@ -347,46 +501,20 @@ def api_features_jira_update_dor_flag():
                 fail_keys = fallback_keys
         else:
             return jsonify({"error": "No issue keys to update"}), 400
-    updated = []
-    errors = []
-    results = []
-    for k in pass_keys:
-        try:
-            jira.update_dor_flag(str(k), "YES")
-            try:
-                jira.update_status(str(k), "READY")
-                results.append({"key": str(k), "dor": "YES", "status": "READY", "success": True})
-            except Exception as e:
-                errors.append(f"{k}:{str(e)}")
-                results.append({"key": str(k), "dor": "YES", "status": "READY", "success": False, "error": str(e)})
-            updated.append(str(k))
-        except RuntimeError as re_err:
-            msg = str(re_err)
-            errors.append(f"{k}:{msg}")
-            results.append({"key": str(k), "dor": "YES", "status": "READY", "success": False, "error": msg})
-        except Exception as e:
-            msg = str(e)
-            errors.append(f"{k}:{msg}")
-            results.append({"key": str(k), "dor": "YES", "status": "READY", "success": False, "error": msg})
-    for k in fail_keys:
-        try:
-            jira.update_dor_flag(str(k), "No")
-            results.append({"key": str(k), "dor": "No", "status": "", "success": True})
-            updated.append(str(k))
-        except RuntimeError as re_err:
-            msg = str(re_err)
-            errors.append(f"{k}:{msg}")
-            results.append({"key": str(k), "dor": "No", "status": "", "success": False, "error": msg})
-        except Exception as e:
-            msg = str(e)
-            errors.append(f"{k}:{msg}")
-            results.append({"key": str(k), "dor": "No", "status": "", "success": False, "error": msg})
-    return jsonify({"updated": updated, "errors": errors, "results": results})
+    return jsonify(jira.update_dor_batch(pass_keys, fail_keys))
 
 @app.route("/features/jira")
 def features_from_jira():
     return render_template("features_jira.html")
 
+def _search_max_rows():
+    # row cap when the page sends none (jira.search_max_rows, default 100; 0 = no cap)
+    try:
+        n = int(load_config().get("jira", {}).get("search_max_rows", 100))
+    except Exception:
+        n = 100
+    return n if n > 0 else None
+
 @app.route("/api/features/jira_search", methods=["POST"])
 def api_features_jira_search():
     data = request.get_json(force=True, silent=True) or {}
@@ -394,7 +522,11 @@ def api_features_jira_search():
     if not jql:
         return jsonify({"error": "Enter JQL"}), 400
     try:
-        rows = jira.search(jql)
+        max_rows = int(data.get("max_rows")) if data.get("max_rows") not in (None, "") else _search_max_rows()
+    except Exception:
+        return jsonify({"error": "Invalid max_rows"}), 400
+    try:
+        rows = list(jira.iter_search(jql, max_rows=max_rows, prefetch=True))
     except RuntimeError as re_err:
         msg = str(re_err)
         if msg.startswith("jira_http_error:"):
@@ -480,11 +612,11 @@ def stories_from_jira():
 @app.route("/stories/create_jira", methods=["POST"])
 def stories_create_jira():
     items = request.form.getlist("story_summary")
-    created = []
+    prompts = load_prompts()
+    stories = []
     for s in items:
-        stories = story_creation.generate_stories(s, load_prompts())
-        for st in stories:
-            created.append(jira.create_issue(st)["key"])
+        stories.extend(story_creation.generate_stories(s, prompts))
+    created = [r["key"] for r in jira.create_issues_bulk(stories) if r.get("key")]
     flash(f"Created: {', '.join(created)}")
     return redirect(url_for("stories_create"))
 
@@ -499,64 +631,196 @@ def api_stories_generate_batch():
     if len(prompt_text) == 0:
         return jsonify({"error": "No prompt defined"}), 400
     cfg = load_config()
-    rows = []
+    llm_cfg = cfg.get("llm", {})
+    try:
+        item_timeout = float(llm_cfg.get("story_item_timeout_secs", 45))
+    except Exception:
+        item_timeout = 45.0
+    try:
+        batch_deadline = float(llm_cfg.get("story_batch_deadline_secs", 120))
+    except Exception:
+        batch_deadline = 120.0
+    items = []
     for it in feats:
         text = it if isinstance(it, str) else ((it or {}).get("summary") or (it or {}).get("description") or "")
         feature_key = (it if isinstance(it, dict) else {}).get("key", "")
-        t = (text or "").strip()
+        items.append(((text or "").strip(), feature_key))
+    todo = [i for i, (t, _) in enumerate(items) if t]
+    configured = bool(str(llm_cfg.get("api_key", "")).strip() and str(llm_cfg.get("model", "")).strip())
+    outcomes = []
+    if configured:
+        outcomes = run_batch([items[i][0] for i in todo], lambda t: request_stories(t, prompt_text, cfg), max_workers=batch_workers(cfg), item_timeout=item_timeout, deadline=batch_deadline)
+    by_index = dict(zip(todo, outcomes))
+    rows = []
+    results = []
+    first_error = None
+    for i, (t, feature_key) in enumerate(items):
         if not t:
+            results.append({"index": i, "key": feature_key, "status": "skipped", "engine": "", "count": 0})
             continue
+        res = by_index.get(i)
         stories = None
-        try:
-            stories = request_stories(t, prompt_text, cfg)
-        except ValueError as ve:
-            if str(ve) == "llm_not_configured":
-                stories = story_creation.generate_stories(t, prompts)
-            elif str(ve) == "no_prompt":
-                return jsonify({"error": "No prompt defined"}), 400
+        engine = "llm"
+        reason = ""
+        if res is None:
+            engine, reason = "heuristic", "llm_not_configured"
+        elif res["ok"]:
+            stories = res["value"]
+        elif res.get("timeout"):
+            engine, reason = "heuristic", "timeout"
+        else:
+            err = res["error"]
+            msg = str(err)
+            fallback, user_msg = _story_error(err)
+            if fallback:
+                engine, reason = "heuristic", msg
             else:
-                return jsonify({"error": "Invalid request"}), 400
-        except RuntimeError as re_err:
-            msg = str(re_err)
-            if msg.startswith("llm_http_error:"):
-                raw = msg.replace("llm_http_error:", "").strip()
-                code = None; status = None; message = raw
-                obj = None
-                try:
-                    obj = _json.loads(raw)
-                except Exception:
-                    obj = None
-                try:
-                    e = (obj or {}).get("error") or obj or {}
-                    code = e.get("code")
-                    status = (e.get("status") or "").upper()
-                    message = e.get("message") or raw
-                except Exception:
-                    pass
-                if code == 429 or status == "RESOURCE_EXHAUSTED" or ("quota" in str(message).lower()):
-                    stories = story_creation.generate_stories(t, prompts)
-                else:
-                    return jsonify({"error": "LLM request failed: " + str(message)}), 502
-            elif msg.startswith("llm_network_error:"):
+                if first_error is None:
+                    first_error = (user_msg, 400 if isinstance(err, ValueError) else 502)
+                results.append({"index": i, "key": feature_key, "status": "error", "engine": "", "count": 0, "error": user_msg})
+                continue
+        if engine == "heuristic":
+            stories = story_creation.generate_stories(t, prompts)
+        rows.extend(_story_row(st, feature_key, engine) for st in stories or [])
+        entry = {"index": i, "key": feature_key, "status": "ok", "engine": engine, "count": len(stories or [])}
+        if reason:
+            entry["fallback_reason"] = reason
+        results.append(entry)
+    if first_error is not None and not any(r["status"] == "ok" for r in results):
+        return jsonify({"error": first_error[0], "results": results}), first_error[1]
+    return jsonify({"rows": rows, "results": results})
+
+@app.route("/api/stories/generate_batch_stream", methods=["POST"])
+def api_stories_generate_batch_stream():
+    # Streaming variant of /api/stories/generate_batch. Features are generated
+    # concurrently and every Story is sent as a "row" event the moment its JSON
+    # object is complete; each feature ends with a "result" event and the
+    # batch with "done". Deadlines and the heuristic fallback match the
+    # buffered endpoint, except that a feature which already streamed stories
+    # keeps them instead of being replaced by the heuristic.
+    import queue, threading, time
+    data = request.get_json(force=True, silent=True) or {}
+    feats = data.get("features") or data.get("summaries") or []
+    if not isinstance(feats, list) or len(feats) == 0:
+        return jsonify({"error": "No features selected"}), 400
+    prompts = load_prompts()
+    prompt_text = (prompts.get("story_prompt", "") or "").strip()
+    if len(prompt_text) == 0:
+        return jsonify({"error": "No prompt defined"}), 400
+    cfg = load_config()
+    llm_cfg = cfg.get("llm", {})
+    try:
+        item_timeout = float(llm_cfg.get("story_item_timeout_secs", 45))
+    except Exception:
+        item_timeout = 45.0
+    try:
+        batch_deadline = float(llm_cfg.get("story_batch_deadline_secs", 120))
+    except Exception:
+        batch_deadline = 120.0
+    items = []
+    for it in feats:
+        text = it if isinstance(it, str) else ((it or {}).get("summary") or (it or {}).get("description") or "")
+        feature_key = (it if isinstance(it, dict) else {}).get("key", "")
+        items.append(((text or "").strip(), feature_key))
+    configured = bool(str(llm_cfg.get("api_key", "")).strip() and str(llm_cfg.get("model", "")).strip())
+    workers = batch_workers(cfg)
+
+    def gen():
+        events = queue.Queue()
+        stop = threading.Event()
+        dropped = set()
+        started = {}
+        counts = {}
+        pending = set()
+        todo = []
+
+        def work(i):
+            if stop.is_set() or i in dropped:
+                return
+            started[i] = time.monotonic()
+            try:
+                for story in stream_stories(items[i][0], prompt_text, cfg):
+                    if stop.is_set() or i in dropped:
+                        return
+                    events.put(("row", i, story))
+                events.put(("end", i, None))
+            except Exception as e:
+                events.put(("fail", i, e))
+
+        def finish(i, engine, reason="", error=""):
+            t, feature_key = items[i]
+            out = []
+            n = counts.get(i, 0)
+            if engine == "heuristic" and n == 0:
                 stories = story_creation.generate_stories(t, prompts)
-            elif msg.startswith("llm_cert_missing:"):
-                return jsonify({"error": msg.replace("llm_cert_missing:", "LLM TLS error: ")}), 502
+                n = len(stories)
+                out.extend(_sse("row", _story_row(st, feature_key, engine)) for st in stories)
+            elif engine == "heuristic":
+                engine = "llm"
+            entry = {"index": i, "key": feature_key, "status": "error" if error else "ok", "engine": "" if error else engine, "count": n}
+            if reason:
+                entry["fallback_reason"] = reason
+            if error:
+                entry["error"] = error
+            out.append(_sse("result", entry))
+            return out
+
+        for i, (t, feature_key) in enumerate(items):
+            if not t:
+                yield _sse("result", {"index": i, "key": feature_key, "status": "skipped", "engine": "", "count": 0})
+            elif not configured:
+                for ev in finish(i, "heuristic", "llm_not_configured"):
+                    yield ev
             else:
-                return jsonify({"error": "LLM request failed"}), 502
-        for st in stories or []:
-            rows.append({
-                "Feature Key": feature_key,
-                "Title": st.get("Title", "Story"),
-                "Description": st.get("Summary", st.get("Description", "")),
-                "Acceptance Criteria": "\n".join(st.get("Acceptance Criteria", [])) if isinstance(st.get("Acceptance Criteria"), list) else st.get("Acceptance Criteria", ""),
-                "Story Point": st.get("Story Point", 3),
-                "Issue_type": st.get("Issue_type", "story"),
-                "Subtasks": st.get("Tasks", []),
-                "Summary": st.get("Summary", ""),
-                "Priority": st.get("Priority", "Medium"),
-                "Tasks": st.get("Tasks", []),
-            })
-    return jsonify({"rows": rows})
+                todo.append(i)
+        if not todo:
+            yield _sse("done", {})
+            return
+        pending.update(todo)
+        end = time.monotonic() + batch_deadline if batch_deadline else None
+        ex = ThreadPoolExecutor(max_workers=max(1, min(workers, len(todo))))
+        try:
+            for i in todo:
+                ex.submit(work, i)
+            while pending:
+                try:
+                    kind, i, val = events.get(timeout=0.25)
+                except queue.Empty:
+                    kind = None
+                if kind and i in pending:
+                    if kind == "row":
+                        counts[i] = counts.get(i, 0) + 1
+                        yield _sse("row", _story_row(val, items[i][1], "llm"))
+                    elif kind == "end":
+                        pending.discard(i)
+                        for ev in finish(i, "llm"):
+                            yield ev
+                    else:
+                        pending.discard(i)
+                        fallback, user_msg = _story_error(val)
+                        if fallback or counts.get(i):
+                            evs = finish(i, "heuristic", str(val))
+                        else:
+                            evs = finish(i, "", error=user_msg)
+                        for ev in evs:
+                            yield ev
+                now = time.monotonic()
+                for i in sorted(pending):
+                    late = end is not None and now >= end
+                    if not late and item_timeout and i in started:
+                        late = now - started[i] >= item_timeout
+                    if late:
+                        pending.discard(i)
+                        dropped.add(i)
+                        for ev in finish(i, "heuristic", "timeout"):
+                            yield ev
+            yield _sse("done", {})
+        finally:
+            # client went away or the batch is over: let the workers wind down
+            stop.set()
+            ex.shutdown(wait=False, cancel_futures=True)
+
+    return _sse_response(gen())
 
 @app.route("/api/stories/create_batch", methods=["POST"])
 def api_stories_create_batch():
@@ -564,16 +828,25 @@ def api_stories_create_batch():
     items = data.get("stories") or []
     if not isinstance(items, list) or len(items) == 0:
         return jsonify({"error": "No stories to create"}), 400
-    created = []
-    errors = []
-    for st in items:
+
+    def work(chunk):
         try:
-            res = jira.create_issue(st)
+            return [dict(r or {}) for r in jira.create_issues_bulk(chunk)]
+        except Exception as e:
+            # the whole call failed: report it once, not once per story
+            return [{"key": "", "error": str(e), "repeat": n > 0} for n in range(len(chunk))]
+
+    def finish(results):
+        created = []
+        errors = []
+        for res in results:
             k = res.get("key") or ""
             if k: created.append(k)
-        except Exception as e:
-            errors.append(str(e))
-    return jsonify({"created": created, "errors": errors})
+            if res.get("error") and not res.get("repeat"):
+                errors.append(res.get("error"))
+        return {"created": created, "errors": errors}, 200
+
+    return _run_batch_request("stories_create", items, work, finish, 50)
 
 
 @app.route("/stories/dor", methods=["GET", "POST"])
@@ -588,7 +861,11 @@ def api_stories_jira_search():
     if not jql:
         return jsonify({"error": "Enter JQL"}), 400
     try:
-        rows = jira.search(jql)
+        max_rows = int(data.get("max_rows")) if data.get("max_rows") not in (None, "") else _search_max_rows()
+    except Exception:
+        return jsonify({"error": "Invalid max_rows"}), 400
+    try:
+        rows = list(jira.iter_search(jql, max_rows=max_rows, prefetch=True))
     except RuntimeError as re_err:
         msg = str(re_err)
         if msg.startswith("jira_http_error:"):
@@ -620,7 +897,7 @@ def api_stories_dor_check():
         except Exception:
             jir_rows = []
     source_rows = jir_rows if jir_rows else items
-    out = []
+    batch = []
     for it in source_rows:
         key = (it.get("key") or "").strip()
         summary = (it.get("summary") or "").strip()
@@ -640,42 +917,8 @@ def api_stories_dor_check():
         _add("Status", it.get("status"))
         _add("Due Date", it.get("dueDate") or it.get("duedate"))
         text = "\n".join(parts) if parts else summary
-        try:
-            sc, st, rs = story_dor.score(text, prompt_text)
-        except ValueError as ve:
-            if str(ve) == "llm_not_configured":
-                return jsonify({"error": "LLM not configured"}), 400
-            sc, st, rs = 0, "Fail", "DOR check failed"
-        except RuntimeError as re_err:
-            msg = str(re_err)
-            if msg.startswith("llm_http_error:"):
-                raw = msg.replace("llm_http_error:", "").strip()
-                user_msg = "The AI provider returned an error. Please try again later."
-                code = None; status = None; message = raw
-                try:
-                    obj = _json.loads(raw)
-                    e = obj.get("error") or obj
-                    code = e.get("code")
-                    status = (e.get("status") or "").upper()
-                    message = e.get("message") or str(e)
-                    if code == 429:
-                        user_msg = "Too many requests to the AI service. Please retry in a moment."
-                    elif code == 503 or status == "UNAVAILABLE":
-                        user_msg = "The AI model is currently overloaded. Please try again shortly."
-                    elif code == 404 or status == "NOT_FOUND":
-                        user_msg = "The AI model is not found or unsupported for this method. Please verify the model and API version."
-                    else:
-                        user_msg = "The AI request failed. Please retry in a moment."
-                except Exception:
-                    user_msg = "The AI request failed. Please retry in a moment."
-                return jsonify({"error": f"{user_msg} Details: {message}"}), 502
-            if msg.startswith("llm_network_error:"):
-                return jsonify({"error": "A network error occurred contacting the AI service. Please retry in a moment."}), 502
-            if msg.startswith("llm_cert_missing:"):
-                return jsonify({"error": "A secure connection issue occurred with the AI provider. Please try again later."}), 502
-            sc, st, rs = 0, "Fail", "DOR check failed"
-        out.append({"key": key, "summary": summary, "score": sc, "status": st, "reason": rs})
-    return jsonify({"rows": out})
+        batch.append((key, summary, text))
+    return _dor_batch_request("stories_dor", batch, story_dor, prompt_text)
 
 @app.route("/api/stories/jira_update_dor_flag", methods=["POST"])
 def api_stories_jira_update_dor_flag():
@@ -695,41 +938,7 @@ def api_stories_jira_update_dor_flag():
                 fail_keys = fallback_keys
         else:
             return jsonify({"error": "No issue keys to update"}), 400
-    updated = []
-    errors = []
-    results = []
-    for k in pass_keys:
-        try:
-            jira.update_dor_flag(str(k), "YES")
-            try:
-                jira.update_status(str(k), "READY")
-                results.append({"key": str(k), "dor": "YES", "status": "READY", "success": True})
-            except Exception as e:
-                errors.append(f"{k}:{str(e)}")
-                results.append({"key": str(k), "dor": "YES", "status": "READY", "success": False, "error": str(e)})
-            updated.append(str(k))
-        except RuntimeError as re_err:
-            msg = str(re_err)
-            errors.append(f"{k}:{msg}")
-            results.append({"key": str(k), "dor": "YES", "status": "READY", "success": False, "error": msg})
-        except Exception as e:
-            msg = str(e)
-            errors.append(f"{k}:{msg}")
-            results.append({"key": str(k), "dor": "YES", "status": "READY", "success": False, "error": msg})
-    for k in fail_keys:
-        try:
-            jira.update_dor_flag(str(k), "No")
-            results.append({"key": str(k), "dor": "No", "status": "", "success": True})
-            updated.append(str(k))
-        except RuntimeError as re_err:
-            msg = str(re_err)
-            errors.append(f"{k}:{msg}")
-            results.append({"key": str(k), "dor": "No", "status": "", "success": False, "error": msg})
-        except Exception as e:
-            msg = str(e)
-            errors.append(f"{k}:{msg}")
-            results.append({"key": str(k), "dor": "No", "status": "", "success": False, "error": msg})
-    return jsonify({"updated": updated, "errors": errors, "results": results})
+    return jsonify(jira.update_dor_batch(pass_keys, fail_keys))
 
 @app.route("/sprint/capacity")
 def sprint_capacity():
@@ -834,6 +1043,39 @@ def api_sprint_capacity_save():
         return jsonify({"error": f"Save failed: {e}"}), 500
     return jsonify({"ok": True})
 
+@app.route("/api/sprint/capacity/compute", methods=["POST"])
+def api_sprint_capacity_compute():
+    # one sprint ({sprint_days, haircut_percent, team_members, resources}) or
+    # {"sprints": [...]} for what-if batches
+    import capacity_engine
+    data = request.get_json(force=True, silent=True) or {}
+    batch = data.get("sprints")
+    if batch is not None and not isinstance(batch, list):
+        return jsonify({"error": "sprints must be a list"}), 400
+    try:
+        out = capacity_engine.compute(batch if batch is not None else [data])
+    except Exception as e:
+        return jsonify({"error": f"Compute failed: {e}"}), 500
+    if batch is not None:
+        return jsonify({"sprints": out})
+    return jsonify(out[0])
+
+@app.route("/api/capacity/query", methods=["POST"])
+def api_capacity_query():
+    import time
+    import firestore, capacity_query
+    data = request.get_json(force=True, silent=True) or {}
+    try:
+        q = capacity_query.parse_query(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    t0 = time.perf_counter()
+    try:
+        rows = firestore.query_capacity(q)
+    except Exception as e:
+        return jsonify({"error": f"Query failed: {e}"}), 500
+    return jsonify({"rows": rows, "count": len(rows), "elapsed_ms": round((time.perf_counter() - t0) * 1000, 1)})
+
 @app.route("/api/jira/open_sprints", methods=["GET"])
 def api_jira_open_sprints():
     import jira
@@ -856,32 +1098,65 @@ def api_sprint_allocate_stories():
         return jsonify({"error": "Enter sprint name"}), 400
     if not isinstance(keys, list) or len(keys) == 0:
         return jsonify({"error": "No stories to allocate"}), 400
-    updated = []
-    errors = []
-    # Try bulk add via Agile API first
-    try:
-        jira.add_issues_to_sprint(sprint_name, keys)
-        updated = [str(k) for k in keys]
-    except Exception as bulk_err:
-        errors.append(str(bulk_err))
+
+    def work(chunk):
+        keys = [str(k) for k in chunk]
+        # Try bulk add via Agile API first
+        try:
+            jira.add_issues_to_sprint(sprint_name, keys)
+            return [{"key": k, "ok": True} for k in keys]
+        except Exception as bulk_err:
+            bulk = str(bulk_err)
         # Fallback to per-issue field update
-        updated = []
+        out = []
         for k in keys:
             try:
-                jira.update_sprint(str(k), sprint_name)
-                updated.append(str(k))
+                jira.update_sprint(k, sprint_name)
+                out.append({"key": k, "ok": True})
             except RuntimeError as re_err:
-                errors.append(f"{k}:{str(re_err)}")
+                out.append({"key": k, "ok": False, "error": f"{k}:{str(re_err)}"})
             except Exception as e:
-                errors.append(f"{k}:{str(e)}")
-    # Persist allocation locally for reference
+                out.append({"key": k, "ok": False, "error": f"{k}:{str(e)}"})
+        # the bulk error rides on the chunk's first result
+        out[0]["bulk_error"] = bulk
+        return out
+
+    def finish(results):
+        updated = [r["key"] for r in results if r.get("ok")]
+        errors = []
+        for r in results:
+            if r.get("bulk_error"):
+                errors.append(r["bulk_error"])
+            if r.get("error"):
+                errors.append(r["error"])
+        # Persist allocation locally for reference
+        try:
+            firestore.save_sprint_allocation(sprint_name, updated)
+        except Exception:
+            pass
+        if errors and not updated:
+            return {"error": "; ".join(errors)}, 502
+        return {"ok": True, "updated": updated, "errors": errors}, 200
+
+    return _run_batch_request("sprint_allocate", keys, work, finish, 50)
+
+@app.route("/api/jobs/<job_id>", methods=["GET"])
+def api_job_status(job_id):
     try:
-        firestore.save_sprint_allocation(sprint_name, updated)
+        since = int(request.args.get("since", 0))
     except Exception:
-        pass
-    if errors and not updated:
-        return jsonify({"error": "; ".join(errors)}), 502
-    return jsonify({"ok": True, "updated": updated, "errors": errors})
+        since = 0
+    job = jobs.get(job_id, since)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
+@app.route("/api/jobs/<job_id>/cancel", methods=["POST"])
+def api_job_cancel(job_id):
+    status = jobs.cancel(job_id)
+    if status is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify({"ok": True, "status": status})
 
 @app.route("/meeting/upload", methods=["GET", "POST"])
 def meeting_upload():
@@ -1013,6 +1288,11 @@ def config_jira():
             flash("JIRA config saved")
         except Exception:
             flash("Failed to save JIRA configuration")
+        try:
+            # pool size and rate limits take effect without a restart
+            jira.reconfigure(cur)
+        except Exception:
+            pass
         save_target = request.form.get("save_target", "file")
         if save_target == "secret":
             try:
@@ -1054,14 +1334,23 @@ def config_llm():
     cfg = load_config()
     if request.method == "POST":
         cur = cfg.get("llm", {})
+        prev = (cur.get("api_key", ""), cur.get("model", ""), list(cur.get("alternates") or []))
         cur.update({
             "api_key": request.form.get("api_key", ""),
             "model": request.form.get("model", ""),
         })
+        try:
+            mc = int(request.form.get("max_concurrent") or cur.get("max_concurrent", 4))
+            if mc > 0:
+                cur["max_concurrent"] = mc
+        except Exception:
+            pass
         cfg["llm"] = cur
         try:
             save_config(cfg)
             flash("LLM config saved")
+            if prev != (cur.get("api_key", ""), cur.get("model", ""), list(cur.get("alternates") or [])):
+                invalidate_models()
         except Exception:
             flash("Failed to save LLM configuration")
         save_target = request.form.get("save_target", "file")
@@ -1095,6 +1384,7 @@ def config_llm():
     return render_template("config_form.html", title="LLM Configuration", fields=[
         ("API Key", "api_key", cfg.get("llm", {}).get("api_key", "")),
         ("Model", "model", cfg.get("llm", {}).get("model", "")),
+        ("Max concurrent requests (all workers)", "max_concurrent", cfg.get("llm", {}).get("max_concurrent", 4)),
     ], secret_names=["api_key"]) 
 
 @app.route("/config/confluence", methods=["GET", "POST"]) 